@@ -0,0 +1,220 @@
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from grid_common import goal_box_tables
+
+INFINITY = float('inf')
+
+class AnytimeSearch:
+    """Anytime repairing A* (ARA*) that can be resumed across frames.
+
+    The search starts as weighted A* with f = g + weight * h, which finds a
+    route after few expansions, then lowers the weight step by step and
+    repairs the same search tree (cells improved after being closed wait in
+    an INCONS list instead of being re-expanded in the same pass) until the
+    weight reaches 1 and the route is optimal.  After each pass, bound is a
+    proven suboptimality factor: cost <= bound * optimal cost.
+
+    step() works until a time or expansion budget runs out and can be called
+    again on the next frame; path always holds the best route so far.  Only
+    cells in the start's connected component are searched, and with a cost
+    grid on the finder entering a cell costs costs[cell].  A layout or cost
+    change restarts the search.
+    """
+
+    def __init__(self, finder, start: Tuple[int, int], goals: Iterable[Tuple[int, int]],
+                 initial_weight: float = 3.0, weight_step: float = 0.5):
+        if initial_weight < 1 or weight_step <= 0:
+            raise ValueError("initial_weight must be at least 1 and weight_step positive")
+        self.finder = finder
+        self.start = start
+        self.goals = frozenset(goals)
+        self.initial_weight = initial_weight
+        self.weight_step = weight_step
+        self.reset()
+
+    def reset(self):
+        """Drop all search state and start again from initial_weight"""
+        finder = self.finder
+        self._versions = (finder.layout_version, finder.cost_version)
+        self.weight = self.initial_weight
+        self.path: Optional[List[Tuple[int, int]]] = None
+        self.target: Optional[Tuple[int, int]] = None
+        self.cost = INFINITY
+        self.bound = INFINITY      # suboptimality bound of path (INFINITY until one is found)
+        self.done = False          # path is optimal, or there is no path
+        self.expansions = 0
+        self.iterations = 0        # completed weight passes
+
+        cached = finder.route_cache.get((self.start, self.goals) + self._versions, None)
+        if cached is not None:
+            # An exact route for the same query is already known
+            self.target, path = cached
+            self.path = list(path)
+            self.cost = finder.path_cost(self.path) if finder.costs is not None else len(path) - 1
+            self.bound = 1.0
+            self.done = True
+            return
+
+        reachability = finder.reachability
+        self._labels = reachability.labels
+        self._cols = cols = finder.cols
+        self._rows = finder.rows
+        self._component = component = reachability.component_of(self.start)
+        goal_cells = [goal for goal in self.goals if reachability.component_of(goal) == component]
+        if component == -1 or not goal_cells:
+            self.done = True
+            return
+
+        self._goal_ids: Set[int] = {row * cols + col for row, col in goal_cells}
+        # Box distance to the goals, times the cheapest step so it stays admissible
+        scale = finder._min_cost if finder.costs is not None else 1
+        self._row_h, self._col_h = goal_box_tables(goal_cells, self._rows, cols, scale=scale)
+
+        start_id = self.start[0] * cols + self.start[1]
+        self._g: Dict[int, float] = {start_id: 0}
+        self._parent: Dict[int, int] = {start_id: -1}
+        self._closed: Set[int] = set()
+        self._incons: Set[int] = set()
+        # Incumbent: cheapest goal reached so far; path/cost publish it after each pass
+        self._best_goal = -1
+        self._best_cost = INFINITY
+        if start_id in self._goal_ids:
+            self._best_goal = start_id
+            self._best_cost = 0
+        self._open: List[Tuple[float, float, int]] = [(self.weight * self._h(start_id), 0, start_id)]
+
+    def _h(self, node: int) -> float:
+        row, col = divmod(node, self._cols)
+        return self._row_h[row] + self._col_h[col]
+
+    def step(self, time_budget: Optional[float] = None,
+             max_expansions: Optional[int] = None) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Search until done or a budget (seconds / expansions) runs out.
+
+        Returns (target, path) of the best route so far, or None while no
+        route is known.  Without budgets the search runs to the optimum.
+        """
+        if self._versions != (self.finder.layout_version, self.finder.cost_version):
+            self.reset()
+        if self.done:
+            return self.result()
+
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        limit = None if max_expansions is None else self.expansions + max_expansions
+        costs = self.finder.costs
+        labels, component = self._labels, self._component
+        cols, size = self._cols, len(self._labels)
+        last_col = cols - 1
+        g, parent, closed, incons = self._g, self._parent, self._closed, self._incons
+        goal_ids, open_set = self._goal_ids, self._open
+        row_h, col_h = self._row_h, self._col_h
+        heappush, heappop = heapq.heappush, heapq.heappop
+        expansions = self.expansions
+        pops = 0
+
+        while not self.done:
+            weight = self.weight
+            # One weighted pass: expand while some open cell could still beat the incumbent
+            while open_set and open_set[0][0] < self._best_cost:
+                if limit is not None and expansions >= limit:
+                    break
+                # The clock is read every 32 pops to keep its cost low
+                if deadline is not None and not pops & 31 and time.perf_counter() >= deadline:
+                    break
+                pops += 1
+                _, negative_g, node = heappop(open_set)
+                node_g = -negative_g
+                if node_g != g[node] or node in closed:
+                    continue  # stale entry
+                closed.add(node)
+                expansions += 1
+
+                col = node % cols
+                for neighbor, inside in ((node + 1, col < last_col), (node + cols, node + cols < size),
+                                         (node - 1, col > 0), (node - cols, node >= cols)):
+                    if not inside or labels[neighbor] != component:
+                        continue
+                    next_g = node_g + (costs[neighbor] if costs is not None else 1)
+                    if next_g < g.get(neighbor, INFINITY):
+                        g[neighbor] = next_g
+                        parent[neighbor] = node
+                        if neighbor in goal_ids and next_g < self._best_cost:
+                            self._best_cost = next_g
+                            self._best_goal = neighbor
+                        if neighbor in closed:
+                            incons.add(neighbor)
+                        else:
+                            row = neighbor // cols
+                            heappush(open_set, (next_g + weight * (row_h[row] + col_h[neighbor - row * cols]),
+                                                -next_g, neighbor))
+            else:
+                # Ending a pass touches the whole frontier; if the frame is
+                # already used up it runs at the start of the next step()
+                if deadline is None or time.perf_counter() < deadline:
+                    self._finish_pass()
+                    continue
+            break  # budget exhausted
+
+        self.expansions = expansions
+        return self.result()
+
+    def _finish_pass(self):
+        """Publish the pass's route and bound, then lower the weight"""
+        self.iterations += 1
+        g, closed = self._g, self._closed
+        if self._best_goal == -1:
+            # The whole component was searched without reaching a goal
+            self.done = True
+            self._release()
+            return
+
+        cols = self._cols
+        path = []
+        node = self._best_goal
+        while node != -1:
+            path.append(divmod(node, cols))
+            node = self._parent[node]
+        path.reverse()
+        self.path = path
+        self.target = path[-1]
+        self.cost = self._best_cost
+
+        if self.weight > 1.0:
+            # Every cheaper route passes through an open or inconsistent cell
+            open_cells = {node for _, negative_g, node in self._open
+                          if -negative_g == g[node] and node not in closed}
+            open_cells |= self._incons
+            lower = min((g[node] + self._h(node) for node in open_cells), default=INFINITY)
+            self.bound = 1.0 if lower >= self.cost else min(self.weight, self.cost / lower)
+        if self.weight <= 1.0 or self.bound <= 1.0:
+            self.bound = 1.0
+            self.done = True
+            finder = self.finder
+            finder.route_cache.put((self.start, self.goals) + self._versions, (self.target, tuple(path)), len(path))
+            self._release()
+            return
+
+        self.weight = max(1.0, self.weight - self.weight_step)
+        weight = self.weight
+        # Rebuilt in place: step() holds references to these containers
+        self._open[:] = [(g[node] + weight * self._h(node), -g[node], node) for node in open_cells]
+        heapq.heapify(self._open)
+        self._incons.clear()
+        closed.clear()
+
+    def _release(self):
+        # A finished search keeps its route, not its frontier
+        self._g = self._parent = {}
+        self._open = []
+        self._closed = self._incons = set()
+
+    def result(self) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        if self.path is None:
+            return None
+        return self.target, self.path
+
+    def __repr__(self) -> str:
+        return (f"AnytimeSearch(cost={self.cost}, bound={self.bound:.3f}, weight={self.weight}, "
+                f"expansions={self.expansions}, done={self.done})")
@@ -0,0 +1,254 @@
+import multiprocessing
+import os
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flow_field import FlowFieldRouter
+from grid_engine import GridAStar
+from supermarket_board import PRODUCT_CATEGORIES
+
+RouteQuery = Tuple[Tuple[int, int], str]  # (start cell, category name)
+RouteResult = Optional[Tuple[Tuple[int, int], Optional[List[Tuple[int, int]]], int]]
+
+class _BatchWorker:
+    """Answers chunks of same-category queries.
+
+    Built once per worker process by the pool initializer: the layout arrives
+    as one bytes object with the access cells of every category, so tasks
+    only carry (category, [(index, start), ...]).  Large chunks share one
+    distance field; small ones run one grid A* per query, which is cheaper
+    than a BFS over the whole store.
+    """
+
+    def __init__(self, cells: bytes, rows: int, cols: int, targets: Dict[str, Tuple[Tuple[int, int], ...]],
+                 max_cached_fields: int, field_threshold: int):
+        view = memoryview(cells)
+        layout = [view[row * cols:(row + 1) * cols] for row in range(rows)]
+        self.router = FlowFieldRouter(layout, max_cached_fields)
+        self.grid = GridAStar(layout)
+        self.targets = targets
+        self.field_threshold = field_threshold
+
+    def run(self, category: str, items: List[Tuple[int, Tuple[int, int]]], group_size: int,
+            with_paths: bool) -> List[Tuple[int, RouteResult]]:
+        goals = self.targets[category]
+        if group_size < self.field_threshold:
+            find = self.grid.find_path_to_any
+            found = [(index, find(start, goals)) for index, start in items]
+            return [(index, None if result is None else
+                     (result[0], result[1] if with_paths else None, len(result[1]) - 1))
+                    for index, result in found]
+
+        router = self.router
+        rows, cols = router.rows, router.cols
+        field = router.field_for(goals)
+        unreachable = router.unreachable
+        results = []
+        for index, start in items:
+            row, col = start
+            if not (0 <= row < rows and 0 <= col < cols) or field[row * cols + col] == unreachable:
+                results.append((index, None))
+                continue
+            path = router.walk(start, field)
+            if path is None:
+                results.append((index, None))
+            else:
+                results.append((index, (path[-1], path if with_paths else None, len(path) - 1)))
+        return results
+
+_worker: Optional[_BatchWorker] = None
+
+def _init_worker(*args):
+    global _worker
+    _worker = _BatchWorker(*args)
+
+def _run_tasks(tasks):
+    results = []
+    for task in tasks:
+        results.extend(_worker.run(*task))
+    return results
+
+class BatchRouter:
+    """Answers many (start, category) route queries at once.
+
+    Queries are read lazily, chunk_size * max_pending at a time, and grouped
+    by category within each such window.  A category asked at least
+    field_threshold times in a window gets one BFS distance field per worker
+    and each of its queries is a downhill walk (see FlowFieldRouter); rarer
+    ones run a grid A* per query.  With workers > 1 the chunks run on a
+    process pool whose processes receive the layout once, through the pool
+    initializer; at most max_pending round trips are in flight and results
+    are streamed back in input order, so memory stays bounded by a couple of
+    windows however long the input is.  The pool is kept between batches and
+    recreated when the finder's layout changes.
+
+    Results have the shape of find_nearest_shelf_access: (target, path,
+    steps), or None when the category cannot be reached.  Step costs are
+    uniform; a finder with a cost grid is answered serially by the finder
+    itself.
+    """
+
+    def __init__(self, finder, categories: Optional[Dict[str, Dict]] = None, workers: Optional[int] = None,
+                 chunk_size: int = 256, max_cached_fields: int = 64, field_threshold: int = 8,
+                 max_pending: Optional[int] = None):
+        self.finder = finder
+        self.categories = categories if categories is not None else PRODUCT_CATEGORIES
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        # Round trips in flight; two per worker keeps every process busy
+        self.max_pending = max(1, max_pending if max_pending is not None else 2 * self.workers)
+        self.max_cached_fields = max_cached_fields
+        self.field_threshold = field_threshold
+        self._pool = None
+        self._local: Optional[_BatchWorker] = None
+        self._layout_version = None
+
+    def _worker_args(self):
+        layout = self.finder.layout
+        rows = len(layout)
+        cols = len(layout[0]) if layout else 0
+        cells = bytearray(rows * cols)
+        for row, line in enumerate(layout):
+            cells[row * cols:(row + 1) * cols] = bytes(line)
+        targets = {name: tuple(self.finder.get_shelf_access_points(info['positions']))
+                   for name, info in self.categories.items()}
+        return bytes(cells), rows, cols, targets, self.max_cached_fields, self.field_threshold
+
+    def _refresh(self):
+        if self._layout_version == self.finder.layout_version:
+            return
+        self.close()
+        args = self._worker_args()
+        if self.workers > 1:
+            self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=args)
+        else:
+            self._local = _BatchWorker(*args)
+        self._layout_version = self.finder.layout_version
+
+    def _tasks(self, queries: Iterable[RouteQuery], with_paths: bool) -> Iterator[Tuple]:
+        """Per-category chunks of each window, categories ordered by their first query"""
+        queries = iter(queries)
+        size = self.chunk_size
+        window = size * self.max_pending
+        first = 0
+        while True:
+            batch = list(islice(queries, window))
+            if not batch:
+                return
+            groups: "OrderedDict[str, List[Tuple[int, Tuple[int, int]]]]" = OrderedDict()
+            for index, (start, category) in enumerate(batch, first):
+                if category not in self.categories:
+                    raise KeyError(f"Unknown category: {category!r}")
+                groups.setdefault(category, []).append((index, start))
+            first += len(batch)
+            for category, items in groups.items():
+                for offset in range(0, len(items), size):
+                    yield category, items[offset:offset + size], len(items), with_paths
+
+    def _round_trips(self, tasks: Iterator[Tuple]) -> Iterator[List[Tuple]]:
+        """Pack consecutive small chunks into lists of about chunk_size queries"""
+        packed, count = [], 0
+        for task in tasks:
+            packed.append(task)
+            count += len(task[1])
+            if count >= self.chunk_size:
+                yield packed
+                packed, count = [], 0
+        if packed:
+            yield packed
+
+    def route(self, queries: Iterable[RouteQuery], with_paths: bool = True) -> Iterator[RouteResult]:
+        """Yield one result per query, in input order.
+
+        with_paths=False sends back only (target, None, steps), which keeps
+        the inter-process traffic small for distance analytics.  queries may
+        be any iterable, e.g. a generator; an unknown category raises
+        KeyError when its window is read.
+        """
+        if self.finder.costs is not None:
+            for start, category in queries:
+                result = self.finder.find_nearest_shelf_access(start, self.categories[category]['positions'])
+                yield result if with_paths or result is None else (result[0], None, result[2])
+            return
+
+        self._refresh()
+        tasks = self._tasks(queries, with_paths)
+        if self._pool is None:
+            chunks = (self._local.run(*task) for task in tasks)
+        else:
+            chunks = self._pooled(tasks)
+
+        # Categories are grouped per window; hold results until the next index is in
+        buffered: Dict[int, RouteResult] = {}
+        next_index = 0
+        for chunk in chunks:
+            buffered.update(chunk)
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+
+    def _pooled(self, tasks: Iterator[Tuple]) -> Iterator[List[Tuple[int, RouteResult]]]:
+        """Run round trips on the pool, at most max_pending at a time, in submission order"""
+        pending = deque()
+        for round_trip in self._round_trips(tasks):
+            pending.append(self._pool.apply_async(_run_tasks, (round_trip,)))
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def close(self):
+        """Stop the worker processes (a later route() starts new ones)"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._local = None
+        self._layout_version = None
+
+    def __enter__(self) -> "BatchRouter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def route_batch(finder, queries: Sequence[RouteQuery], workers: Optional[int] = None,
+                with_paths: bool = True) -> List[RouteResult]:
+    """Convenience wrapper around BatchRouter for PRODUCT_CATEGORIES"""
+    with BatchRouter(finder, workers=workers) as router:
+        return list(router.route(queries, with_paths))
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from enhanced_pathfinding import EnhancedPathFinder
+    from layout_generator import generate_store_for_size
+    from supermarket_board import supermarket_layout
+
+    # Throughput of serial finder calls vs. batches, on the real store and a
+    # generated 256x256 one (about 1000 shelves, so few queries per field)
+    store = generate_store_for_size(256)
+    for name, layout, categories, count in (('supermarket', supermarket_layout, PRODUCT_CATEGORIES, 5000),
+                                            ('store_256', store.layout, store.categories, 2000)):
+        finder = EnhancedPathFinder(layout, cache_size=0)
+        rng = random.Random(1)
+        cells = [(row, col) for row, line in enumerate(layout) for col, cell in enumerate(line) if cell in (0, 9)]
+        names = list(categories)
+        queries = [(rng.choice(cells), rng.choice(names)) for _ in range(count)]
+
+        sample = queries[:300]
+        began = time.perf_counter()
+        expected = [finder.find_nearest_shelf_access(start, categories[category]['positions'])
+                    for start, category in sample]
+        print(f"{name}: serial find_nearest_shelf_access {len(sample) / (time.perf_counter() - began):.0f} queries/s")
+
+        for workers in sorted({1, 2, os.cpu_count() or 1}):
+            with BatchRouter(finder, categories, workers=workers) as router:
+                began = time.perf_counter()
+                results = list(router.route(queries))
+                elapsed = time.perf_counter() - began
+            for want, got in zip(expected, results):
+                assert (want is None) == (got is None) and (want is None or want[2] == got[2])
+            print(f"{name}: BatchRouter workers={workers} {len(queries) / elapsed:.0f} queries/s")
@@ -0,0 +1,260 @@
+"""Reproducible pathfinding benchmark.
+
+Runs fixed, seeded query sets against the real supermarket_layout and
+generated stores (layout_generator) of increasing size, for the reference PathFinder and every
+EnhancedPathFinder engine, and reports latency percentiles, search counters
+(nodes expanded, heap pushes, stale pops, peak open set, from the finder's
+collect_stats mode), peak memory and total path length (a cheap
+correctness checksum).
+
+    python benchmark.py                          # default maps, print a table
+    python benchmark.py --output results.json    # also write JSON
+    python benchmark.py --compare results.json   # flag p50 regressions (exit 1)
+
+Every case runs one untimed warm-up pass and then `--repeats` timed passes
+over its queries; a query's latency is its median over the passes.  A
+case only counts as a regression when its p50 grew by more than the
+threshold plus the pass-to-pass spread measured in both runs, and by at
+least MIN_REGRESSION_MS, so two runs of the same code compare clean.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from enhanced_pathfinding import ENGINES, EnhancedPathFinder
+from layout_generator import generate_store_for_size
+from pathfinding import PathFinder
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+Query = Tuple[Tuple[int, int], List[Tuple[int, int]]]
+
+DEFAULT_SIZES = (64, 128, 256)
+DEFAULT_QUERIES = 100
+DEFAULT_REPEATS = 5
+REGRESSION_THRESHOLD = 1.2  # p50 slower than baseline by more than 20%...
+MIN_REGRESSION_MS = 0.05    # ...and by at least this much (timer and scheduler noise)
+
+class CountingPathFinder(PathFinder):
+    # The reference A* has no stats of its own; it calls get_neighbors once per expansion
+    expansions = 0
+
+    def get_neighbors(self, row, col):
+        self.expansions += 1
+        return super().get_neighbors(row, col)
+
+def walkable_cells(layout: List[List[int]]) -> List[Tuple[int, int]]:
+    return [(row, col) for row, line in enumerate(layout) for col, cell in enumerate(line) if cell == 0 or cell == 9]
+
+def random_queries(layout: List[List[int]], count: int, seed: int = 1) -> List[Query]:
+    """Seeded single-goal queries between walkable cells"""
+    rng = random.Random(seed)
+    cells = walkable_cells(layout)
+    return [(rng.choice(cells), [rng.choice(cells)]) for _ in range(count)]
+
+def shelf_queries(layout: List[List[int]], categories: Dict[str, Dict], count: int, seed: int = 1) -> List[Query]:
+    """Seeded queries from walkable cells to every access cell of a shelf"""
+    rng = random.Random(seed)
+    finder = EnhancedPathFinder(layout)
+    cells = walkable_cells(layout)
+    shelves = [finder.get_shelf_access_points(info['positions']) for info in categories.values()]
+    return [(rng.choice(cells), rng.choice(shelves)) for _ in range(count)]
+
+def default_maps(sizes: Sequence[int], count: int) -> List[Tuple[str, List[List[int]], List[Query]]]:
+    maps = [('supermarket', supermarket_layout, shelf_queries(supermarket_layout, PRODUCT_CATEGORIES, count))]
+    for size in sizes:
+        # Generated stores (seed 0) with pillars and dead-end aisles
+        store = generate_store_for_size(size)
+        maps.append((f'store_{size}', store.layout, random_queries(store.layout, count)))
+        maps.append((f'store_{size}_shelves', store.layout, shelf_queries(store.layout, store.categories, count)))
+    return maps
+
+def _build(engine: str, layout: List[List[int]], collect_stats: bool = False):
+    if engine == 'pathfinder':
+        return CountingPathFinder(layout)
+    # cache_size=0: every query is a real search
+    finder = EnhancedPathFinder(layout, engine=engine, cache_size=0, collect_stats=collect_stats)
+    finder.reachability  # built lazily otherwise, inside the first query's latency
+    return finder
+
+def _run_query(finder, start: Tuple[int, int], goals: List[Tuple[int, int]]) -> Optional[List[Tuple[int, int]]]:
+    if isinstance(finder, PathFinder):
+        # The reference finder has no multi-goal search: take the best goal
+        best = None
+        for goal in goals:
+            path = finder.find_shortest_path(start, goal)
+            if path and (best is None or len(path) < len(best)):
+                best = path
+        return best
+    result = finder.find_path_to_any(start, goals)
+    return result[1] if result else None
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+def _median(values: Sequence[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+def run_case(engine: str, layout: List[List[int]], queries: Sequence[Query],
+             repeats: int = DEFAULT_REPEATS) -> Dict[str, object]:
+    """Time one engine on one map; memory and search counters come from a separate pass"""
+    began = time.perf_counter()
+    finder = _build(engine, layout)
+    build_ms = (time.perf_counter() - began) * 1000
+
+    # Warm-up: first-touch allocations, lazily built engine tables, CPU caches
+    path_cells = 0
+    found = 0
+    for start, goals in queries:
+        path = _run_query(finder, start, goals)
+        if path:
+            found += 1
+            path_cells += len(path)
+
+    passes = []
+    for _ in range(max(1, repeats)):
+        timings = []
+        for start, goals in queries:
+            began = time.perf_counter()
+            _run_query(finder, start, goals)
+            timings.append((time.perf_counter() - began) * 1000)
+        passes.append(timings)
+    latencies = [_median(timings) for timings in zip(*passes)]
+    # How far one pass's p50 moves from the next: the noise compare() allows for
+    pass_p50s = [_percentile(sorted(timings), 50) for timings in passes if timings]
+    typical = _median(pass_p50s) if pass_p50s else 0.0
+    p50_spread = (max(pass_p50s) - min(pass_p50s)) / typical if typical else 0.0
+
+    # tracemalloc (and stats collection) slow Python down, so they get their own pass
+    tracemalloc.start()
+    finder = _build(engine, layout, collect_stats=True)
+    for start, goals in queries:
+        _run_query(finder, start, goals)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(finder, PathFinder):
+        counters = {'expanded': finder.expansions, 'pushes': None, 'stale_pops': None, 'peak_open': None}
+    else:
+        totals = finder.stats_totals
+        # Engines without their own counters only report wall time
+        counters = {'expanded': totals.expanded or None, 'pushes': totals.pushes or None,
+                    'stale_pops': totals.stale_pops if totals.pushes else None,
+                    'peak_open': totals.peak_open or None}
+
+    latencies.sort()
+    result = {
+        'engine': engine,
+        'queries': len(queries),
+        'repeats': len(passes),
+        'found': found,
+        'path_cells': path_cells,
+        'build_ms': round(build_ms, 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        'p50_ms': round(_percentile(latencies, 50), 4) if latencies else 0.0,
+        'p90_ms': round(_percentile(latencies, 90), 4) if latencies else 0.0,
+        'p99_ms': round(_percentile(latencies, 99), 4) if latencies else 0.0,
+        'max_ms': round(latencies[-1], 4) if latencies else 0.0,
+        'p50_spread': round(p50_spread, 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+    result.update(counters)
+    return result
+
+def run_suite(engines: Sequence[str], sizes: Sequence[int] = DEFAULT_SIZES,
+              count: int = DEFAULT_QUERIES, repeats: int = DEFAULT_REPEATS) -> Dict[str, object]:
+    results = []
+    for name, layout, queries in default_maps(sizes, count):
+        for engine in engines:
+            result = run_case(engine, layout, queries, repeats)
+            result.update({'map': name, 'rows': len(layout), 'cols': len(layout[0])})
+            results.append(result)
+            print(_format_row(result), flush=True)
+    return {'meta': _metadata(count, repeats), 'results': results}
+
+def _metadata(count: int, repeats: int) -> Dict[str, object]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'queries_per_map': count,
+        'repeats': repeats,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def _format_row(result: Dict[str, object]) -> str:
+    expanded = '-' if result['expanded'] is None else result['expanded']
+    stale = '-' if result['stale_pops'] is None else result['stale_pops']
+    return (f"{result['map']:<16} {result['engine']:<14} p50 {result['p50_ms']:>9.3f} ms  "
+            f"p90 {result['p90_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  "
+            f"build {result['build_ms']:>9.1f} ms  expanded {expanded:>9}  stale {stale:>7}  "
+            f"peak {result['peak_kib']:>9.1f} KiB  cells {result['path_cells']}")
+
+def compare(current: Dict[str, object], baseline: Dict[str, object],
+            threshold: float = REGRESSION_THRESHOLD, min_ms: float = MIN_REGRESSION_MS) -> List[str]:
+    """Cases whose p50 grew beyond threshold and noise, or whose path total changed.
+
+    The allowed ratio is threshold plus the p50_spread of both runs (older
+    baselines without it count as noise-free), and the growth must also be
+    at least min_ms.
+    """
+    old = {(result['map'], result['engine']): result for result in baseline['results']}
+    problems = []
+    for result in current['results']:
+        before = old.get((result['map'], result['engine']))
+        if before is None:
+            continue
+        allowed = threshold + before.get('p50_spread', 0.0) + result.get('p50_spread', 0.0)
+        if (before['p50_ms'] and result['p50_ms'] > before['p50_ms'] * allowed
+                and result['p50_ms'] - before['p50_ms'] >= min_ms):
+            problems.append(f"{result['map']}/{result['engine']}: p50 {before['p50_ms']} -> {result['p50_ms']} ms")
+        if result['path_cells'] != before['path_cells']:
+            problems.append(f"{result['map']}/{result['engine']}: path cells "
+                            f"{before['path_cells']} -> {result['path_cells']}")
+    return problems
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engines', nargs='+', default=['pathfinder'] + list(ENGINES),
+                        choices=['pathfinder'] + list(ENGINES))
+    parser.add_argument('--sizes', nargs='*', type=int, default=list(DEFAULT_SIZES),
+                        help='approximate side lengths of the generated stores')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERIES, help='queries per map')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='timed passes per case after a warm-up pass; latencies are their median')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='p50 ratio against the baseline that counts as a regression')
+    parser.add_argument('--min-ms', type=float, default=MIN_REGRESSION_MS,
+                        help='smallest p50 growth in ms that counts as a regression')
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.engines, args.sizes, args.queries, args.repeats)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            problems = compare(report, json.load(handle), args.threshold, args.min_ms)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
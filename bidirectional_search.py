@@ -0,0 +1,197 @@
+import heapq
+import random
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from grid_common import goal_box_tables
+from grid_engine import GridAStar
+
+Query = Tuple[Tuple[int, int], List[Tuple[int, int]]]
+
+class BidirectionalSearch(GridAStar):
+    """Bidirectional A* for the 4-connected, uniform-cost store grid.
+
+    One search grows from the start towards the goal bounding box and one
+    grows from all goals at once towards the start; each step pops from
+    whichever open list is smaller.  Whenever a search reaches a cell the
+    other side has already seen, the combined length becomes the best route
+    so far.  The search stops as soon as either open list's lowest f is no
+    better than that route: with consistent heuristics no shorter path can
+    remain, so lengths always match A*.  expansions holds the number of
+    cells expanded (both sides) by the last query.
+    """
+
+    def rebuild(self, layout: List[List[int]]):
+        super().rebuild(layout)
+        # The forward side uses the inherited buffers, the backward side these
+        self.back_g = array('i', [0]) * self.size
+        self.back_parent = array('i', [0]) * self.size
+        self.back_seen = array('I', [0]) * self.size
+        self.back_closed = array('I', [0]) * self.size
+        self.expansions = 0
+
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Meet-in-the-middle A* from start towards the nearest goal"""
+        self.expansions = 0
+        if not self.is_walkable(start[0], start[1]):
+            return None
+        goal_cells = [goal for goal in goals if self.is_walkable(goal[0], goal[1])]
+        if not goal_cells:
+            return None
+        start_id = self.node_id(start[0], start[1])
+        goal_ids = {self.node_id(row, col) for row, col in goal_cells}
+        if start_id in goal_ids:
+            return start, [start]
+
+        stride = self.stride
+        size = self.size
+        walkable = self.walkable
+        self.generation += 1
+        if self.generation == 0xFFFFFFFF:
+            self.seen = array('I', [0]) * size
+            self.closed = array('I', [0]) * size
+            self.back_seen = array('I', [0]) * size
+            self.back_closed = array('I', [0]) * size
+            self.generation = 1
+        generation = self.generation
+
+        # Forward heuristic: distance to the goal bounding box; backward: to the start
+        forward_row_h, forward_col_h = goal_box_tables(goal_cells, self.rows, self.cols, padding=1)
+        backward_row_h, backward_col_h = goal_box_tables([start], self.rows, self.cols, padding=1)
+
+        # Heap keys pack (f, -g, node) into one int, as in GridAStar
+        depth = size
+        scale = (depth + 1) * size
+        forward = (self.g_score, self.parent, self.seen, self.closed, forward_row_h, forward_col_h, [])
+        backward = (self.back_g, self.back_parent, self.back_seen, self.back_closed,
+                    backward_row_h, backward_col_h, [])
+        for side, sources in ((forward, [start_id]), (backward, goal_ids)):
+            g_score, parent, seen, _, row_h, col_h, open_set = side
+            for node in sources:
+                row, col = divmod(node, stride)
+                g_score[node] = 0
+                parent[node] = -1
+                seen[node] = generation
+                open_set.append((row_h[row] + col_h[col]) * scale + depth * size + node)
+            heapq.heapify(open_set)
+
+        best = -1
+        meeting = -1
+        expansions = 0
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        while forward[6] and backward[6]:
+            if best != -1 and max(forward[6][0], backward[6][0]) // scale >= best:
+                break
+            side, other = (forward, backward) if len(forward[6]) <= len(backward[6]) else (backward, forward)
+            g_score, parent, seen, closed, row_h, col_h, open_set = side
+            other_g, _, other_seen = other[0], other[1], other[2]
+            node = heappop(open_set) % size
+            if closed[node] == generation:
+                continue
+            closed[node] = generation
+            expansions += 1
+
+            next_g = g_score[node] + 1
+            tie = depth - next_g
+            row, col = divmod(node, stride)
+            h_row = row_h[row]
+            h_col = col_h[col]
+            # Same neighbour order as EnhancedPathFinder.get_neighbors
+            for neighbor, h in ((node + 1, h_row + col_h[col + 1]),
+                                (node + stride, row_h[row + 1] + h_col),
+                                (node - 1, h_row + col_h[col - 1]),
+                                (node - stride, row_h[row - 1] + h_col)):
+                if walkable[neighbor] and (seen[neighbor] != generation or next_g < g_score[neighbor]):
+                    seen[neighbor] = generation
+                    g_score[neighbor] = next_g
+                    parent[neighbor] = node
+                    heappush(open_set, ((next_g + h) * (depth + 1) + tie) * size + neighbor)
+                    if other_seen[neighbor] == generation:
+                        length = next_g + other_g[neighbor]
+                        if best == -1 or length < best:
+                            best = length
+                            meeting = neighbor
+
+        self.expansions = expansions
+        if meeting == -1:
+            return None  # No path found
+        return self._join(meeting)
+
+    def _join(self, meeting: int) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+        """Forward chain start -> meeting, then backward chain meeting -> goal"""
+        path = self._reconstruct(meeting)
+        back_parent = self.back_parent
+        node = back_parent[meeting]
+        while node != -1:
+            path.append(self.cell(node))
+            node = back_parent[node]
+        return path[-1], path
+
+def benchmark(layout: List[List[int]], queries: Optional[Sequence[Query]] = None,
+              count: int = 200, seed: int = 0) -> Dict[str, float]:
+    """Compare expansions and time of the built-in A* and BidirectionalSearch.
+
+    queries are (start, goals) pairs; by default `count` random pairs of
+    walkable cells are used.  Raises AssertionError if any path length
+    differs between the two.
+    """
+    from enhanced_pathfinding import EnhancedPathFinder
+
+    class CountingFinder(EnhancedPathFinder):
+        # The built-in A* calls get_neighbors once per expanded cell
+        expansions = 0
+
+        def get_neighbors(self, row, col):
+            self.expansions += 1
+            return super().get_neighbors(row, col)
+
+    finder = CountingFinder(layout, cache_size=0)
+    engine = BidirectionalSearch(layout)
+    if queries is None:
+        rng = random.Random(seed)
+        cells = [(row, col) for row in range(finder.rows) for col in range(finder.cols)
+                 if finder.is_walkable(row, col)]
+        queries = [(rng.choice(cells), [rng.choice(cells)]) for _ in range(count)]
+
+    astar_expansions = bidirectional_expansions = 0
+    astar_time = bidirectional_time = 0.0
+    for start, goals in queries:
+        began = time.perf_counter()
+        finder.expansions = 0
+        expected = finder._search(start, frozenset(goals), None)
+        astar_time += time.perf_counter() - began
+        astar_expansions += finder.expansions
+
+        began = time.perf_counter()
+        result = engine.find_path_to_any(start, goals)
+        bidirectional_time += time.perf_counter() - began
+        bidirectional_expansions += engine.expansions
+
+        assert (expected is None) == (result is None), (start, goals)
+        assert expected is None or len(expected[1]) == len(result[1]), (start, goals)
+
+    return {
+        'queries': len(queries),
+        'astar_expansions': astar_expansions,
+        'bidirectional_expansions': bidirectional_expansions,
+        'expansion_reduction': 1 - bidirectional_expansions / astar_expansions if astar_expansions else 0.0,
+        'astar_ms': astar_time * 1000,
+        'bidirectional_ms': bidirectional_time * 1000,
+    }
+
+if __name__ == "__main__":
+    from supermarket_board import supermarket_layout, PRODUCT_CATEGORIES
+    from enhanced_pathfinding import EnhancedPathFinder
+
+    # Cross-store trips: from the back exit and the entrance to every shelf
+    finder = EnhancedPathFinder(supermarket_layout)
+    starts = finder.get_shelf_access_points([(0, 17)]) + [(26, 17)]
+    shelf_queries = [(start, finder.get_shelf_access_points(info['positions']))
+                     for start in starts for info in PRODUCT_CATEGORIES.values()]
+    for name, queries in (('shelf trips', shelf_queries), ('random pairs', None)):
+        stats = benchmark(supermarket_layout, queries)
+        print(f"{name}: {stats['queries']} queries, expansions {stats['astar_expansions']} -> "
+              f"{stats['bidirectional_expansions']} ({stats['expansion_reduction']:.0%} fewer), "
+              f"time {stats['astar_ms']:.1f} ms -> {stats['bidirectional_ms']:.1f} ms")
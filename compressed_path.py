@@ -0,0 +1,162 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# Direction codes in EnhancedPathFinder.get_neighbors order, with the labels
+# used by the direction readout
+STEPS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+DIRECTION_NAMES = ('PHAI', 'XUONG', 'TRAI', 'LEN')
+_CODES = {step: code for code, step in enumerate(STEPS)}
+
+class CompressedPath:
+    """A route stored as its start cell plus (direction, count) runs.
+
+    A straight aisle of any length is one run, so a long route takes a few
+    dozen bytes instead of one tuple per cell.  Cells are still available
+    through lazy iteration and indexing (path[i], path[-1], len(path)), and
+    popleft() drops the first cell in O(1) while the user walks the route.
+    """
+
+    __slots__ = ('_start', '_codes', '_ends', '_rows', '_cols', '_first', '_offset')
+
+    def __init__(self, start: Tuple[int, int], segments: Iterable[Tuple[str, int]] = ()):
+        self._start = start
+        self._codes = bytearray()     # direction code of each run
+        self._ends = array('I')       # cumulative step count at the end of each run
+        self._rows = array('i')       # cell where each run ends
+        self._cols = array('i')
+        self._first = 0               # index of the first run not fully walked
+        self._offset = 0              # steps already removed by popleft()
+        for name, count in segments:
+            self.append_run(DIRECTION_NAMES.index(name), count)
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[Tuple[int, int]]) -> "CompressedPath":
+        """Compress a list of 4-connected cells"""
+        iterator = iter(cells)
+        try:
+            previous = next(iterator)
+        except StopIteration:
+            raise ValueError("A path needs at least one cell") from None
+        path = cls(previous)
+        for cell in iterator:
+            code = _CODES.get((cell[0] - previous[0], cell[1] - previous[1]))
+            if code is None:
+                raise ValueError(f"Cells {previous} and {cell} are not adjacent")
+            path.append_run(code, 1)
+            previous = cell
+        return path
+
+    def append_run(self, code: int, count: int):
+        """Extend the path by count steps in direction STEPS[code]"""
+        if count <= 0:
+            return
+        dr, dc = STEPS[code]
+        if self._ends:
+            total, row, col = self._ends[-1], self._rows[-1], self._cols[-1]
+        else:
+            total, (row, col) = 0, self._start
+        row, col = row + dr * count, col + dc * count
+        if len(self._codes) > self._first and self._codes[-1] == code:
+            self._ends[-1] = total + count
+            self._rows[-1] = row
+            self._cols[-1] = col
+        else:
+            self._codes.append(code)
+            self._ends.append(total + count)
+            self._rows.append(row)
+            self._cols.append(col)
+
+    @property
+    def start(self) -> Tuple[int, int]:
+        return self._start
+
+    @property
+    def end(self) -> Tuple[int, int]:
+        if self._first >= len(self._codes):
+            return self._start
+        return self._rows[-1], self._cols[-1]
+
+    def corners(self) -> Iterator[Tuple[int, int]]:
+        """Start cell and the cell where each remaining run ends"""
+        yield self._start
+        for index in range(self._first, len(self._codes)):
+            yield self._rows[index], self._cols[index]
+
+    def segments(self) -> Iterator[Tuple[str, int]]:
+        """(direction name, count) runs that are still ahead"""
+        previous = self._offset
+        for index in range(self._first, len(self._codes)):
+            end = self._ends[index]
+            yield DIRECTION_NAMES[self._codes[index]], end - previous
+            previous = end
+
+    def runs(self) -> Iterator[Tuple[int, int, int]]:
+        """(dr, dc, count) runs that are still ahead, for drawing"""
+        previous = self._offset
+        for index in range(self._first, len(self._codes)):
+            end = self._ends[index]
+            dr, dc = STEPS[self._codes[index]]
+            yield dr, dc, end - previous
+            previous = end
+
+    def popleft(self) -> Tuple[int, int]:
+        """Remove and return the first cell; the next cell becomes the start"""
+        if self._first >= len(self._codes):
+            raise IndexError("pop from a single-cell path")
+        removed = self._start
+        dr, dc = STEPS[self._codes[self._first]]
+        self._start = (removed[0] + dr, removed[1] + dc)
+        self._offset += 1
+        if self._offset == self._ends[self._first]:
+            self._first += 1
+        return removed
+
+    def __len__(self) -> int:
+        """Number of cells, start included (as for a list of cells)"""
+        total = self._ends[-1] if self._ends else 0
+        return total - self._offset + 1
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        row, col = self._start
+        yield row, col
+        for dr, dc, count in self.runs():
+            for _ in range(count):
+                row += dr
+                col += dc
+                yield row, col
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Tuple[int, int], List[Tuple[int, int]]]:
+        if isinstance(index, slice):
+            return list(self)[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("path index out of range")
+        # Binary search for the run holding the cell, then step from where
+        # the previous run ended
+        step = self._offset + index
+        run = bisect_right(self._ends, step - 1, self._first)
+        if run == self._first:
+            (row, col), previous = self._start, self._offset
+        else:
+            row, col, previous = self._rows[run - 1], self._cols[run - 1], self._ends[run - 1]
+        if step == previous:
+            return row, col
+        dr, dc = STEPS[self._codes[run]]
+        remaining = step - previous
+        return row + dr * remaining, col + dc * remaining
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CompressedPath):
+            return self._start == other._start and list(self.segments()) == list(other.segments())
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def to_list(self) -> List[Tuple[int, int]]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"CompressedPath(start={self._start}, segments={list(self.segments())})"
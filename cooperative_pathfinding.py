@@ -0,0 +1,321 @@
+import heapq
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from grid_common import compile_walkable, goal_box_tables
+
+Agent = Tuple[Tuple[int, int], Iterable[Tuple[int, int]]]
+
+class AgentPlan:
+    """Timed route of one robot: path[t] is its cell at time step t"""
+
+    def __init__(self, agent: int, path: Optional[List[Tuple[int, int]]], planning_time: float, expansions: int,
+                 start: Optional[Tuple[int, int]] = None):
+        self.agent = agent                  # index in the list passed to plan()
+        self.path = path                    # None when no conflict-free route was found
+        self.planning_time = planning_time  # seconds spent planning this robot
+        self.expansions = expansions        # (cell, time) states expanded
+        self.start = start                  # where a robot without a route stays
+
+    @property
+    def target(self) -> Optional[Tuple[int, int]]:
+        return self.path[-1] if self.path else None
+
+    @property
+    def arrival(self) -> Optional[int]:
+        """Time step at which the robot parks on its target"""
+        return len(self.path) - 1 if self.path else None
+
+    def position_at(self, t: int) -> Optional[Tuple[int, int]]:
+        """Cell at time t; robots park on their target, robots without a route on their start"""
+        if not self.path:
+            return self.start
+        return self.path[min(t, len(self.path) - 1)]
+
+    def __repr__(self) -> str:
+        return f"AgentPlan(agent={self.agent}, arrival={self.arrival}, planning_time={self.planning_time:.4f})"
+
+class ReservationTable:
+    """Space-time reservations of the robots planned so far.
+
+    Cells are flat ids (row * cols + col).  A vertex entry reserves a cell at
+    one time step, an edge entry reserves a move from one cell to another
+    between t and t + 1, and a parked robot holds its cell from its arrival
+    time onwards.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.vertices: Set[int] = set()
+        self.edges: Set[int] = set()
+        self.parked: Dict[int, int] = {}
+        self.latest: Dict[int, int] = {}  # last time step each cell is reserved
+
+    def is_free(self, cell: int, t: int) -> bool:
+        parked = self.parked.get(cell)
+        return (parked is None or t < parked) and t * self.size + cell not in self.vertices
+
+    def crosses(self, source: int, target: int, t: int) -> bool:
+        """True if someone moves target -> source while we move source -> target"""
+        return (t * self.size + target) * self.size + source in self.edges
+
+    def hold(self, cell: int):
+        """Block a cell for the whole horizon (a robot that has not moved yet)"""
+        self.parked[cell] = 0
+
+    def release(self, cell: int):
+        self.parked.pop(cell, None)
+
+    def reserve(self, cells: List[int]):
+        """Reserve a timed path and park its last cell from the arrival time on"""
+        size = self.size
+        for t, cell in enumerate(cells):
+            self.vertices.add(t * size + cell)
+            if self.latest.get(cell, -1) < t:
+                self.latest[cell] = t
+            if t:
+                self.edges.add(((t - 1) * size + cells[t - 1]) * size + cell)
+        self.parked[cells[-1]] = len(cells) - 1
+
+class ReverseResumableSearch:
+    """Exact walking distance to a goal set, computed only where it is asked for.
+
+    A backward A* from the goals towards the robot's start (Reverse Resumable
+    A*): a query for a cell that is not closed yet resumes the search until
+    it is.  The Manhattan distance to the start keeps the heuristic
+    consistent, so every closed distance is exact, and usually only a band
+    around the start-goal route is ever expanded instead of the whole map.
+    """
+
+    def __init__(self, walkable: bytearray, cols: int, goals: Iterable[int], start: int,
+                 deadline: Optional[float] = None):
+        self.walkable = walkable
+        self.cols = cols
+        self.deadline = deadline
+        self.timed_out = False
+        self.expansions = 0
+        size = len(walkable)
+        # distances[cell] is exact once set (-1 = not closed yet)
+        self.distances = array('i', [-1]) * size
+        self._g = array('i', [size]) * size
+        self._row_h, self._col_h = goal_box_tables([divmod(start, cols)], size // cols if cols else 0, cols)
+        # Heap keys pack (f, g, cell) into one int, as in GridAStar
+        self._open: List[int] = []
+        for goal in goals:
+            self._g[goal] = 0
+            row, col = divmod(goal, cols)
+            self._open.append((self._row_h[row] + self._col_h[col]) * size * size + goal)
+        heapq.heapify(self._open)
+
+    def distance(self, cell: int) -> Optional[int]:
+        """Steps from cell to the nearest goal; None if unreachable (or out of time)"""
+        distances = self.distances
+        distance = distances[cell]
+        if distance != -1:
+            return distance
+        walkable, cols = self.walkable, self.cols
+        size = len(walkable)
+        last_col = cols - 1
+        g, open_set = self._g, self._open
+        row_h, col_h = self._row_h, self._col_h
+        heappush, heappop = heapq.heappush, heapq.heappop
+        deadline = self.deadline
+        expansions = self.expansions
+        try:
+            while open_set:
+                if deadline is not None and not expansions & 63 and time.perf_counter() >= deadline:
+                    self.timed_out = True
+                    return None
+                current = heappop(open_set) % size
+                if distances[current] != -1:
+                    continue
+                current_g = g[current]
+                distances[current] = current_g
+                expansions += 1
+                next_g = current_g + 1
+                row, col = divmod(current, cols)
+                h_row, h_col = row_h[row], col_h[col]
+                if col < last_col:
+                    neighbor = current + 1
+                    if walkable[neighbor] and next_g < g[neighbor]:
+                        g[neighbor] = next_g
+                        heappush(open_set, ((next_g + h_row + col_h[col + 1]) * size + next_g) * size + neighbor)
+                neighbor = current + cols
+                if neighbor < size and walkable[neighbor] and next_g < g[neighbor]:
+                    g[neighbor] = next_g
+                    heappush(open_set, ((next_g + row_h[row + 1] + h_col) * size + next_g) * size + neighbor)
+                if col > 0:
+                    neighbor = current - 1
+                    if walkable[neighbor] and next_g < g[neighbor]:
+                        g[neighbor] = next_g
+                        heappush(open_set, ((next_g + h_row + col_h[col - 1]) * size + next_g) * size + neighbor)
+                neighbor = current - cols
+                if neighbor >= 0 and walkable[neighbor] and next_g < g[neighbor]:
+                    g[neighbor] = next_g
+                    heappush(open_set, ((next_g + row_h[row - 1] + h_col) * size + next_g) * size + neighbor)
+                if current == cell:
+                    return current_g
+            return None
+        finally:
+            self.expansions = expansions
+
+class CooperativePlanner:
+    """Cooperative A* for several robots on one floor.
+
+    Robots are planned one after another in priority order (the order they
+    are given in).  Each one runs A* over (cell, time) states, where waiting
+    in place is a move, against the reservations of the robots before it, so
+    the resulting routes have no vertex conflicts (two robots in one cell)
+    and no edge conflicts (two robots swapping cells).  The heuristic is the
+    exact walking distance to the robot's goals, computed on demand by a
+    ReverseResumableSearch, so the time search only explores detours around
+    other robots and neither pays for a full-map distance field.
+
+    Every robot's start is held from time 0 until that robot is planned, so
+    higher-priority robots never route through a robot that has not moved
+    yet.  Robots park on their target after arriving; a robot that cannot
+    reach its goals within max_delay extra steps, max_expansions states or
+    time_budget seconds stays on its start cell, which is then consistent
+    with every other plan.
+    """
+
+    def __init__(self, finder, max_delay: int = 64, max_expansions: int = 20000,
+                 time_budget: Optional[float] = None):
+        self.finder = finder
+        self.max_delay = max_delay
+        self.max_expansions = max_expansions
+        self.time_budget = time_budget  # per robot, in seconds; None = no limit
+        self._walkable = None
+        self._layout_version = None
+
+    def _get_walkable(self) -> bytearray:
+        if self._walkable is None or self._layout_version != self.finder.layout_version:
+            self._walkable = compile_walkable(self.finder.layout)
+            self._layout_version = self.finder.layout_version
+        return self._walkable
+
+    def plan(self, agents: Sequence[Agent]) -> List[AgentPlan]:
+        """Plan every (start, goals) pair; returns one AgentPlan per robot, in order"""
+        walkable = self._get_walkable()
+        rows, cols = self.finder.rows, self.finder.cols
+        reservations = ReservationTable(rows * cols)
+
+        def node(cell: Tuple[int, int]) -> Optional[int]:
+            row, col = cell
+            return row * cols + col if 0 <= row < rows and 0 <= col < cols else None
+
+        starts = [node(start) for start, _ in agents]
+        for start in starts:
+            if start is not None:
+                reservations.hold(start)
+        plans = []
+        for index, (start, goals) in enumerate(agents):
+            began = time.perf_counter()
+            deadline = None if self.time_budget is None else began + self.time_budget
+            source = starts[index]
+            if source is not None:
+                reservations.release(source)
+            # Goals already taken by parked or waiting robots can never be reached
+            goal_ids = {goal for goal in map(node, goals) if goal is not None and goal not in reservations.parked}
+            cells, expansions = None, 0
+            if goal_ids and source is not None and walkable[source]:
+                cells, expansions = self._plan_agent(walkable, cols, reservations, source, goal_ids, deadline)
+            if cells is None:
+                # Stay on the start for good; nobody planned so far passes it
+                if source is not None:
+                    reservations.reserve([source])
+                path = None
+            else:
+                reservations.reserve(cells)
+                path = [divmod(cell, cols) for cell in cells]
+            plans.append(AgentPlan(index, path, time.perf_counter() - began, expansions, start))
+        return plans
+
+    def _plan_agent(self, walkable: bytearray, cols: int, reservations: ReservationTable, source: int,
+                    goal_ids: Set[int], deadline: Optional[float]) -> Tuple[Optional[List[int]], int]:
+        """Space-time A* for one robot; returns (timed cell ids, expansions)"""
+        size = reservations.size
+        oracle = ReverseResumableSearch(walkable, cols, goal_ids, source, deadline)
+        remaining = oracle.distance(source)
+        if remaining is None:
+            return None, 0
+        horizon = remaining + self.max_delay
+        last_col = cols - 1
+
+        came_from = {source: -1}
+        closed = set()
+        # Entries are (f, -t, cell): ties go to the state furthest in time
+        open_set = [(remaining, 0, source)]
+        expansions = 0
+        max_expansions = self.max_expansions
+        while open_set and expansions < max_expansions:
+            if deadline is not None and not expansions & 63 and time.perf_counter() >= deadline:
+                break
+            _, negative_t, cell = heapq.heappop(open_set)
+            t = -negative_t
+            state = t * size + cell
+            if state in closed:
+                continue
+            closed.add(state)
+            expansions += 1
+            # Park only where no earlier robot passes through later on
+            if cell in goal_ids and reservations.latest.get(cell, -1) < t:
+                cells = []
+                while state != -1:
+                    cells.append(state % size)
+                    state = came_from[state]
+                cells.reverse()
+                return cells, expansions
+            if t >= horizon:
+                continue
+
+            next_t = t + 1
+            col = cell % cols
+            # Same neighbour order as EnhancedPathFinder.get_neighbors, then wait
+            for neighbor, inside in ((cell + 1, col < last_col), (cell + cols, cell + cols < size),
+                                     (cell - 1, col > 0), (cell - cols, cell >= cols), (cell, True)):
+                if not inside or not walkable[neighbor]:
+                    continue
+                distance = oracle.distance(neighbor)
+                if distance is None:
+                    if oracle.timed_out:
+                        return None, expansions
+                    continue
+                next_state = next_t * size + neighbor
+                if next_state in closed or next_state in came_from:
+                    continue
+                if not reservations.is_free(neighbor, next_t):
+                    continue
+                if neighbor != cell and reservations.crosses(cell, neighbor, t):
+                    continue
+                came_from[next_state] = state
+                heapq.heappush(open_set, (next_t + distance, -next_t, neighbor))
+        return None, expansions
+
+def find_conflicts(plans: Sequence[AgentPlan]) -> List[Tuple[str, int, int, int]]:
+    """Vertex/edge conflicts between robots as (kind, agent_a, agent_b, t).
+
+    A robot without a route counts as standing on its start throughout.
+    """
+    planned = [plan for plan in plans if plan.position_at(0) is not None]
+    horizon = max((len(plan.path) for plan in planned if plan.path), default=1)
+    conflicts = []
+    for t in range(horizon):
+        occupied = {}
+        for plan in planned:
+            cell = plan.position_at(t)
+            if cell in occupied:
+                conflicts.append(('vertex', occupied[cell], plan.agent, t))
+            occupied[cell] = plan.agent
+        if t == 0:
+            continue
+        moves = {}
+        for plan in planned:
+            move = (plan.position_at(t - 1), plan.position_at(t))
+            if move[0] != move[1]:
+                other = moves.get((move[1], move[0]))
+                if other is not None:
+                    conflicts.append(('edge', other, plan.agent, t - 1))
+                moves[move] = plan.agent
+    return conflicts
@@ -1,14 +1,267 @@
 import heapq
+import importlib
+import time
+from array import array
 import math
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterable, Hashable
+
+from anytime_search import AnytimeSearch
+from path_history import PathHistory
+from reachability import ReachabilityIndex
+from route_cache import RouteCache
+from search_stats import SearchStats, SearchStatsTotals
+from shelf_index import ShelfIndex
+from turn_minimizing import TurnMinimizingSearch
+
+_CACHE_MISS = object()
+
+# Alternative search engines: name -> (module, class).  Each engine is built
+# from the layout and exposes find_path_to_any(start, goals) and rebuild(layout);
+# engines are imported lazily so the built-in A* ('astar') needs nothing extra.
+ENGINES = {
+    'astar': None,
+    'flow_field': ('flow_field', 'FlowFieldRouter'),
+    'grid': ('grid_engine', 'GridAStar'),
+    'jps': ('jump_point_search', 'JumpPointSearch'),
+    'hpa': ('hierarchical_pathfinding', 'HierarchicalPathFinder'),
+    'bidirectional': ('bidirectional_search', 'BidirectionalSearch'),
+    'alt': ('landmarks', 'LandmarkAStar'),
+}
 
 class EnhancedPathFinder:
-    def __init__(self, layout: List[List[int]]):
+    def __init__(self, layout: List[List[int]], engine: str = 'astar', cache_size: int = 256,
+                 history_size: int = 100, costs: Optional[List[List[float]]] = None,
+                 collect_stats: bool = False, precomputed=None,
+                 categories: Optional[Dict[Hashable, Dict]] = None):
+        self.path_history = PathHistory(history_size)
+        # Opt-in per-query counters; when off, searches run the plain loops
+        self.collect_stats = collect_stats
+        self.last_stats: Optional[SearchStats] = None
+        self.stats_totals = SearchStatsTotals()
+        self.engine_name = 'astar'
+        self.engine = None
+        self._prepared_shelves = {}
+        # Bumped on every layout replacement or edit; part of every cache key
+        self.layout_version = 0
+        self.route_cache = RouteCache(cache_size)
+        self._reachability = None
+        self._turn_search: Optional[TurnMinimizingSearch] = None
+        # Optional PRODUCT_CATEGORIES-style table; its ShelfIndex serves
+        # access cells and is rebuilt lazily after layout edits
+        self._categories = categories
+        self._shelf_index: Optional[ShelfIndex] = None
+        # Optional per-cell cost of stepping onto a cell (row-major array('f'));
+        # None means every step costs 1.  cost_version is part of every cache key
+        self.costs: Optional[array] = None
+        self.cost_version = 0
+        self._min_cost = 1.0
+        # PrecomputedTables for the current layout (see precompute.py); dropped on edits
+        self._precomputed = None
         self.layout = layout
-        self.rows = len(layout)
-        self.cols = len(layout[0]) if layout else 0
-        self.path_history = []
+        if precomputed is not None:
+            self.load_precomputed(precomputed)
+        self.set_engine(engine)
+        if costs is not None:
+            self.set_costs(costs)
+    
+    @property
+    def layout(self) -> List[List[int]]:
+        return self._layout
+    
+    @layout.setter
+    def layout(self, layout: List[List[int]]):
+        """Replacing the layout invalidates cached routes and rebuilds the engine"""
+        self._layout = layout
+        self.rebuild_engine()
+    
+    def update_cells(self, changes: Dict[Tuple[int, int], int]):
+        """Edit layout cells in place, e.g. {(row, col): 3} to block a cell.
+
+        Every change is checked before any is written, so a bad entry leaves
+        the layout, the engine and the cached routes untouched.
+        """
+        for (row, col), value in changes.items():
+            if not (0 <= row < self.rows and 0 <= col < self.cols):
+                raise ValueError(f"Cell {(row, col)} is outside the {self.rows}x{self.cols} layout")
+            if not isinstance(value, int) or not 0 <= value <= 255:
+                raise ValueError(f"Cell code must be an integer 0-255, got {value!r}")
+        if not changes:
+            return
+        for (row, col), value in changes.items():
+            self._layout[row][col] = value
+        self.rebuild_engine(changes.keys())
+    
+    def layout_changed(self):
+        """Call after mutating the layout lists directly"""
+        self.rebuild_engine()
+    
+    def set_engine(self, name: str):
+        """Select the search engine used by find_shortest_path and shelf lookups"""
+        if name not in ENGINES:
+            raise ValueError(f"Unknown pathfinding engine: {name}")
+        spec = ENGINES[name]
+        if spec is None:
+            self.engine = None
+        else:
+            module_name, class_name = spec
+            engine_class = getattr(importlib.import_module(module_name), class_name)
+            if self._precomputed is not None and hasattr(engine_class, 'from_precomputed'):
+                self.engine = engine_class.from_precomputed(self.layout, self._precomputed)
+            else:
+                self.engine = engine_class(self.layout)
+            self._prepare_engine()
+        self.engine_name = name
+        self.route_cache.clear()
+    
+    def load_precomputed(self, precomputed):
+        """Adopt tables from a precompute file (path or PrecomputedTables).
+
+        Component labels, shelf fields and landmark tables are then read from
+        the memory-mapped file instead of being rebuilt; engines without a
+        from_precomputed constructor build as usual.  Any layout edit drops
+        the tables again.
+        """
+        if isinstance(precomputed, str):
+            from precompute import PrecomputedTables
+            precomputed = PrecomputedTables(precomputed)
+        if not precomputed.matches(self.layout):
+            raise ValueError(f"{precomputed.path} was built for a different layout")
+        self._precomputed = precomputed
+        self._reachability = precomputed.reachability()
+        if self.engine is not None:
+            self.set_engine(self.engine_name)
+    
+    def prepare_shelves(self, shelves: Dict[Hashable, List[Tuple[int, int]]]):
+        """Let the engine precompute routing data for shelves queried repeatedly"""
+        self._prepared_shelves = dict(shelves)
+        self._prepare_engine()
+    
+    def _prepare_engine(self):
+        if self._prepared_shelves and self.engine is not None and hasattr(self.engine, 'prepare'):
+            self.engine.prepare([self.get_shelf_access_points(positions)
+                                 for positions in self._prepared_shelves.values()])
+    
+    def rebuild_engine(self, changed_cells: Optional[Iterable[Tuple[int, int]]] = None):
+        """Recompute engine data after the layout has been edited.
+
+        Engines with an update_cells(layout, cells) method only rebuild what
+        the changed cells touch; the others are rebuilt from scratch.
+        """
+        self.rows = len(self.layout)
+        self.cols = len(self.layout[0]) if self.layout else 0
+        self.layout_version += 1
+        self.route_cache.clear()
+        if changed_cells is not None and self._reachability is not None:
+            # Cell edits relabel locally; anything else relabels on the next query
+            self._reachability.update_cells(self.layout, changed_cells)
+        else:
+            self._reachability = None
+        self._precomputed = None
+        self._shelf_index = None
+        if self.costs is not None and len(self.costs) != self.rows * self.cols:
+            self.clear_costs()  # resized layout: the old cost grid no longer lines up
+        if self.engine is not None:
+            if changed_cells is not None and hasattr(self.engine, 'update_cells'):
+                self.engine.update_cells(self.layout, changed_cells)
+            else:
+                self.engine.rebuild(self.layout)
+            self._prepare_engine()
         
+    def set_costs(self, costs: Optional[List[List[float]]]):
+        """Replace the whole cost grid (rows x cols, every cost > 0); None restores unit costs"""
+        if costs is None:
+            self.clear_costs()
+            return
+        if len(costs) != self.rows or any(len(row) != self.cols for row in costs):
+            raise ValueError(f"Cost grid must be {self.rows}x{self.cols}")
+        grid = array('f')
+        for row in costs:
+            grid.extend(row)
+        if grid and min(grid) <= 0:
+            raise ValueError("Cell costs must be positive")
+        self.costs = grid
+        self._min_cost = min(grid) if grid else 1.0
+        self._costs_changed()
+    
+    def set_cost_region(self, top_left: Tuple[int, int], bottom_right: Tuple[int, int], cost: float):
+        """Give every cell in the rectangle (inclusive corners) the same cost"""
+        if cost <= 0:
+            raise ValueError("Cell costs must be positive")
+        row0, col0 = max(top_left[0], 0), max(top_left[1], 0)
+        row1, col1 = min(bottom_right[0], self.rows - 1), min(bottom_right[1], self.cols - 1)
+        if row0 > row1 or col0 > col1:
+            return
+        grid = self._cost_grid()
+        span = array('f', [cost]) * (col1 - col0 + 1)
+        for row in range(row0, row1 + 1):
+            base = row * self.cols
+            grid[base + col0:base + col1 + 1] = span
+        self._lower_min_cost(cost)
+        self._costs_changed()
+    
+    def update_costs(self, changes: Dict[Tuple[int, int], float]):
+        """Set individual cell costs, e.g. {(row, col): 5.0} for a wet floor tile.
+
+        Every change is checked before any is written, so a bad entry leaves
+        the grid untouched.
+        """
+        for (row, col), cost in changes.items():
+            if not (0 <= row < self.rows and 0 <= col < self.cols):
+                raise ValueError(f"Cell {(row, col)} is outside the {self.rows}x{self.cols} layout")
+            if cost <= 0:
+                raise ValueError("Cell costs must be positive")
+        if not changes:
+            return
+        grid = self._cost_grid()
+        for (row, col), cost in changes.items():
+            grid[row * self.cols + col] = cost
+        self._lower_min_cost(min(changes.values()))
+        self._costs_changed()
+    
+    def clear_costs(self):
+        """Back to uniform step costs (and the selected engine)"""
+        self.costs = None
+        self._min_cost = 1.0
+        self._costs_changed()
+    
+    def get_cost(self, row: int, col: int) -> float:
+        """Cost of stepping onto a cell"""
+        return self.costs[row * self.cols + col] if self.costs is not None else 1
+    
+    def path_cost(self, path: List[Tuple[int, int]]) -> float:
+        """Total cost of a path (the start cell is free)"""
+        if self.costs is None:
+            return max(len(path) - 1, 0)
+        costs, cols = self.costs, self.cols
+        return sum(costs[row * cols + col] for row, col in path[1:])
+    
+    def _cost_grid(self) -> array:
+        if self.costs is None:
+            self.costs = array('f', [1.0]) * (self.rows * self.cols)
+            self._min_cost = 1.0
+        return self.costs
+    
+    def _lower_min_cost(self, cost: float):
+        # Raising a region's cost never lowers the true minimum, so keeping the
+        # old value stays a valid (if looser) lower bound without a full scan
+        if cost < self._min_cost:
+            self._min_cost = cost
+    
+    def _costs_changed(self):
+        self.cost_version += 1
+        self.route_cache.clear()
+    
+    @property
+    def reachability(self) -> ReachabilityIndex:
+        """Component labels for the current layout, rebuilt lazily after edits"""
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self.layout)
+        return self._reachability
+    
+    def is_reachable(self, start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        """O(1) check whether any walkable path joins start and goal"""
+        return self.reachability.is_reachable(start, goal)
+    
     def is_walkable(self, row: int, col: int) -> bool:
         """Check if a position is walkable (not a wall or shelf)"""
         if 0 <= row < self.rows and 0 <= col < self.cols:
@@ -41,38 +294,131 @@ class EnhancedPathFinder:
     
     def find_shortest_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
         """A* pathfinding algorithm for shortest path"""
-        if not self.is_walkable(start[0], start[1]) or not self.is_walkable(goal[0], goal[1]):
+        result = self.find_path_to_any(start, [goal])
+        if result:
+            return result[1]
+        return None
+    
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]],
+                         goal_groups: Optional[List[List[Tuple[int, int]]]] = None) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Single A* search from start that stops at the first goal reached.
+
+        goal_groups optionally splits the goals into clusters (e.g. one per
+        shelf); the heuristic is then the distance to the nearest cluster
+        bounding box, which stays admissible and costs O(groups) per node.
+        Results (including "no route") are served from the route cache when
+        the same start, goals, layout version and cost version were queried
+        before.  With a cost grid set the cheapest route is returned, not
+        necessarily the one with the fewest steps.
+        """
+        goals = frozenset(goals)
+        cache_key = (start, goals, self.layout_version, self.cost_version)
+        cached = self.route_cache.get(cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            if self.collect_stats:
+                stats = SearchStats(self.engine_name)
+                stats.cached = True
+                stats.found = cached is not None
+                self._record_stats(stats)
+            if cached is None:
+                return None
+            target, path = cached
+            self._record_path(start, target, path)
+            return target, list(path)
+        
+        if self.collect_stats:
+            stats = SearchStats(self.engine_name)
+            began = time.perf_counter()
+            result = self._search(start, goals, goal_groups, stats)
+            stats.wall_time = time.perf_counter() - began
+            stats.found = result is not None
+            self._record_stats(stats)
+        else:
+            result = self._search(start, goals, goal_groups)
+        if result:
+            target, path = result
+            self._record_path(start, target, path)
+            self.route_cache.put(cache_key, (target, tuple(path)), len(path))
+        else:
+            self.route_cache.put(cache_key, None)
+        return result
+    
+    def _search(self, start: Tuple[int, int], goals: frozenset,
+                goal_groups: Optional[List[List[Tuple[int, int]]]],
+                stats: Optional[SearchStats] = None) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Run the selected engine (or the built-in A*) without touching cache or history"""
+        # Walled-off goals are dropped up front instead of exhausting the
+        # start's whole component; this also rejects unwalkable start/goals
+        reachability = self.reachability
+        component = reachability.component_of(start)
+        if component == -1:
+            return None
+        
+        goal_set = {goal for goal in goals if reachability.component_of(goal) == component}
+        if not goal_set:
             return None
         
-        if start == goal:
-            return [start]
+        if start in goal_set:
+            return start, [start]
         
-        open_set = [(0, start)]
+        if self.costs is not None:
+            # The engines assume unit steps, so weighted queries always use A*
+            boxes = self._goal_boxes(goal_groups if goal_groups else [goal_set], goal_set)
+            return self._weighted_search(start, goal_set, boxes, stats)
+        
+        if self.engine is not None:
+            result = self.engine.find_path_to_any(start, goal_set)
+            if stats is not None:
+                # Engines keep their own loops; some count expansions
+                stats.expanded = getattr(self.engine, 'expansions', None)
+            return result
+        
+        boxes = self._goal_boxes(goal_groups if goal_groups else [goal_set], goal_set)
+        if stats is not None:
+            return self._astar_with_stats(start, goal_set, boxes, stats)
+        
+        open_set = [(self._box_heuristic(start, boxes), start)]
         came_from = {}
         g_score = {start: 0}
-        f_score = {start: self.heuristic(start, goal)}
         
         while open_set:
             current = heapq.heappop(open_set)[1]
             
-            if current == goal:
-                # Reconstruct path
-                path = []
-                while current in came_from:
-                    path.append(current)
-                    current = came_from[current]
-                path.append(start)
-                path.reverse()
-                
-                # Store in history
-                self.path_history.append({
-                    'start': start,
-                    'goal': goal,
-                    'path': path,
-                    'length': len(path)
-                })
+            if current in goal_set:
+                return current, self._reconstruct_path(came_from, start, current)
+            
+            for neighbor in self.get_neighbors(current[0], current[1]):
+                tentative_g_score = g_score[current] + 1  # Each step costs 1
                 
-                return path
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    f_score = tentative_g_score + self._box_heuristic(neighbor, boxes)
+                    heapq.heappush(open_set, (f_score, neighbor))
+        
+        return None  # No path found
+    
+    def _astar_with_stats(self, start: Tuple[int, int], goal_set: set, boxes: List[Tuple[int, int, int, int]],
+                          stats: SearchStats) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """The built-in A* loop above, step for step, plus counters.
+
+        It is a separate copy so that queries without stats pay nothing.
+        Outdated entries are still expanded, exactly like the plain loop;
+        they are only counted.
+        """
+        open_set = []
+        stats.push(open_set, (self._box_heuristic(start, boxes), start))
+        came_from = {}
+        g_score = {start: 0}
+        
+        while open_set:
+            f_score, current = stats.pop(open_set)
+            if f_score > g_score[current] + self._box_heuristic(current, boxes):
+                stats.stale_pops += 1  # pushed before a cheaper route to current was found
+            
+            if current in goal_set:
+                return current, self._reconstruct_path(came_from, start, current)
+            stats.expanded += 1
             
             for neighbor in self.get_neighbors(current[0], current[1]):
                 tentative_g_score = g_score[current] + 1  # Each step costs 1
@@ -80,48 +426,250 @@ class EnhancedPathFinder:
                 if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + self.heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                    f_score = tentative_g_score + self._box_heuristic(neighbor, boxes)
+                    stats.push(open_set, (f_score, neighbor))
         
         return None  # No path found
     
-    def find_nearest_shelf_access(self, start: Tuple[int, int], shelf_positions: List[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]], float]]:
-        """Find the nearest accessible point around a shelf using shortest path"""
-        best_path = None
-        best_target = None
-        min_distance = float('inf')
+    def _weighted_search(self, start: Tuple[int, int], goal_set: set, boxes: List[Tuple[int, int, int, int]],
+                         stats: Optional[SearchStats] = None) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """A* where entering a cell costs costs[cell].
+
+        The heuristic is the box distance times the smallest cell cost, so it
+        never overestimates and the returned route is the cheapest one.
+        """
+        costs, cols = self.costs, self.cols
+        min_cost = self._min_cost
+        # With stats the heap calls go through counting wrappers
+        heappush = heapq.heappush if stats is None else stats.push
+        heappop = heapq.heappop if stats is None else stats.pop
+        open_set = []
+        heappush(open_set, (self._box_heuristic(start, boxes) * min_cost, 0.0, start))
+        came_from = {}
+        g_score = {start: 0.0}
         
-        # For each shelf position, find nearby walkable positions
-        for shelf_pos in shelf_positions:
-            row, col = shelf_pos
+        while open_set:
+            _, current_g, current = heappop(open_set)
+            if current_g > g_score[current]:
+                if stats is not None:
+                    stats.stale_pops += 1
+                continue  # stale entry
+            
+            if current in goal_set:
+                if stats is not None:
+                    stats.expanded = stats.pops - stats.stale_pops - 1
+                return current, self._reconstruct_path(came_from, start, current)
             
-            # Check positions around the shelf (4 cardinal directions)
+            for neighbor in self.get_neighbors(current[0], current[1]):
+                tentative_g_score = current_g + costs[neighbor[0] * cols + neighbor[1]]
+                
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    f_score = tentative_g_score + self._box_heuristic(neighbor, boxes) * min_cost
+                    heappush(open_set, (f_score, tentative_g_score, neighbor))
+        
+        if stats is not None:
+            stats.expanded = stats.pops - stats.stale_pops
+        return None  # No path found
+    
+    def _goal_boxes(self, goal_groups, goal_set) -> List[Tuple[int, int, int, int]]:
+        """Bounding boxes (min_row, max_row, min_col, max_col) of each goal group"""
+        boxes = []
+        for group in goal_groups:
+            cells = [cell for cell in group if cell in goal_set]
+            if cells:
+                rows = [cell[0] for cell in cells]
+                cols = [cell[1] for cell in cells]
+                boxes.append((min(rows), max(rows), min(cols), max(cols)))
+        return boxes
+    
+    def _box_heuristic(self, pos: Tuple[int, int], boxes: List[Tuple[int, int, int, int]]) -> int:
+        """Manhattan distance to the nearest goal bounding box (admissible)"""
+        row, col = pos
+        best = None
+        for min_row, max_row, min_col, max_col in boxes:
+            dr = min_row - row if row < min_row else (row - max_row if row > max_row else 0)
+            dc = min_col - col if col < min_col else (col - max_col if col > max_col else 0)
+            if best is None or dr + dc < best:
+                best = dr + dc
+        return best
+    
+    def _reconstruct_path(self, came_from: Dict, start: Tuple[int, int], current: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Walk came_from links back to start"""
+        path = []
+        while current in came_from:
+            path.append(current)
+            current = came_from[current]
+        path.append(start)
+        path.reverse()
+        return path
+    
+    def _record_path(self, start: Tuple[int, int], goal: Tuple[int, int], path: List[Tuple[int, int]]):
+        """Store a successful search in history"""
+        self.path_history.append(start, goal, len(path))
+    
+    def set_categories(self, categories: Optional[Dict[Hashable, Dict]]):
+        """Index a PRODUCT_CATEGORIES-style table (None turns the index off)"""
+        self._categories = categories
+        self._shelf_index = None
+    
+    @property
+    def shelf_index(self) -> Optional[ShelfIndex]:
+        """ShelfIndex for the categories and the current layout, or None without categories"""
+        if self._shelf_index is None and self._categories is not None:
+            self._shelf_index = ShelfIndex(self.layout, self._categories)
+        return self._shelf_index
+    
+    def get_category_access_points(self, category: Hashable) -> List[Tuple[int, int]]:
+        """Access cells of a category by name (needs categories)"""
+        if self.shelf_index is None:
+            raise ValueError("EnhancedPathFinder was created without categories")
+        return self.shelf_index.access_points(category)
+    
+    def get_shelf_access_points(self, shelf_positions: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Walkable cells next to a shelf (4 cardinal directions), without duplicates.
+
+        Scans the given positions; get_category_access_points reads a known
+        category's cells from the shelf index instead.
+        """
+        access_points = []
+        seen = set()
+        for row, col in shelf_positions:
             adjacent_positions = [
                 (row - 1, col),  # up
                 (row + 1, col),  # down
                 (row, col - 1),  # left
                 (row, col + 1)   # right
             ]
-            
-            for target_row, target_col in adjacent_positions:
-                if self.is_walkable(target_row, target_col):
-                    path = self.find_shortest_path(start, (target_row, target_col))
-                    if path:
-                        distance = len(path) - 1  # Number of steps
-                        
-                        if distance < min_distance:
-                            min_distance = distance
-                            best_path = path
-                            best_target = (target_row, target_col)
-        
-        if best_path and best_target:
-            return best_target, best_path, min_distance
+            for target in adjacent_positions:
+                if target not in seen and self.is_walkable(target[0], target[1]):
+                    seen.add(target)
+                    access_points.append(target)
+        return access_points
+    
+    def find_nearest_shelf_access(self, start: Tuple[int, int], shelf_positions: List[Tuple[int, int]],
+                                  min_turns: bool = False, turn_penalty: float = 0.0) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]], float]]:
+        """Find the nearest accessible point around a shelf using shortest path.
+
+        min_turns=True uses find_path_min_turns, i.e. the shortest route with
+        the fewest turns (or the turn_penalty trade-off).
+        """
+        access_points = self.get_shelf_access_points(shelf_positions)
+        if min_turns:
+            result = self.find_path_min_turns(start, access_points, turn_penalty)
+        else:
+            result = self.find_path_to_any(start, access_points)
+        if result:
+            target, path = result
+            return target, path, len(path) - 1  # Number of steps
+        return None
+    
+    def find_path_min_turns(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]],
+                            turn_penalty: float = 0.0) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Route with few heading changes, for shorter spoken directions.
+
+        turn_penalty=0 keeps the route shortest and breaks ties by the number
+        of turns; a positive penalty trades that many steps per turn.  Uses
+        its own (cell, heading) search whatever the engine, and the route
+        cache under a separate key; statistics are recorded as engine 'turns'.
+        """
+        goals = frozenset(goals)
+        cache_key = (start, goals, self.layout_version, self.cost_version, 'turns', turn_penalty)
+        cached = self.route_cache.get(cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            if self.collect_stats:
+                stats = SearchStats('turns')
+                stats.cached = True
+                stats.found = cached is not None
+                self._record_stats(stats)
+            if cached is None:
+                return None
+            target, path = cached
+            self._record_path(start, target, path)
+            return target, list(path)
+        
+        if self._turn_search is None or self._turn_search.turn_penalty != turn_penalty:
+            self._turn_search = TurnMinimizingSearch(self, turn_penalty)
+        if self.collect_stats:
+            stats = SearchStats('turns')
+            began = time.perf_counter()
+            result = self._turn_search.find_path_to_any(start, goals)
+            stats.wall_time = time.perf_counter() - began
+            stats.expanded = self._turn_search.expansions
+            stats.found = result is not None
+            self._record_stats(stats)
+        else:
+            result = self._turn_search.find_path_to_any(start, goals)
+        if result:
+            target, path = result
+            self._record_path(start, target, path)
+            self.route_cache.put(cache_key, (target, tuple(path)), len(path))
+        else:
+            self.route_cache.put(cache_key, None)
+        return result
+    
+    def find_nearest_shelf(self, start: Tuple[int, int], shelves: Dict[Hashable, List[Tuple[int, int]]]) -> Optional[Tuple[Hashable, Tuple[int, int], List[Tuple[int, int]], float]]:
+        """Find the nearest of several shelves in one search.
+
+        shelves maps any key (e.g. a PRODUCT_CATEGORIES name) to shelf positions.
+        Returns (key, target, path, distance) for the closest one.
+        """
+        owner = {}
+        groups = []
+        for key, positions in shelves.items():
+            access_points = self.get_shelf_access_points(positions)
+            for target in access_points:
+                owner.setdefault(target, key)
+            groups.append(access_points)
+        
+        result = self.find_path_to_any(start, owner.keys(), goal_groups=groups)
+        if result:
+            target, path = result
+            return owner[target], target, path, len(path) - 1
         return None
     
-    def get_path_history(self) -> List[Dict]:
-        """Get pathfinding history"""
+    def find_path_anytime(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]],
+                          time_budget: Optional[float] = None, max_expansions: Optional[int] = None,
+                          initial_weight: float = 3.0, weight_step: float = 0.5) -> AnytimeSearch:
+        """Start a budgeted ARA* search and run its first slice.
+
+        The returned AnytimeSearch holds the best route so far (path, cost)
+        and its suboptimality bound; call step(time_budget) on later frames
+        until done to refine it.  The optimal route ends up in the route cache.
+        """
+        search = AnytimeSearch(self, start, goals, initial_weight, weight_step)
+        search.step(time_budget, max_expansions)
+        return search
+    
+    def _record_stats(self, stats: SearchStats):
+        self.last_stats = stats
+        self.stats_totals.record(stats)
+    
+    def set_collect_stats(self, enabled: bool):
+        """Turn per-query statistics on or off (totals are kept)"""
+        self.collect_stats = enabled
+    
+    def get_search_stats(self) -> Dict[str, object]:
+        """Last query's counters plus lifetime totals, for UI panels and benchmarks"""
+        return {
+            'enabled': self.collect_stats,
+            'last': self.last_stats.as_dict() if self.last_stats else None,
+            'totals': self.stats_totals.summary(),
+        }
+    
+    def get_cache_stats(self) -> Dict[str, float]:
+        """Route cache hits, misses and occupancy"""
+        return self.route_cache.stats()
+    
+    def get_path_history(self) -> PathHistory:
+        """Get pathfinding history (the most recent records plus aggregates)"""
         return self.path_history
     
+    def get_history_summary(self) -> Dict[str, object]:
+        """Query count, mean/percentile length and most frequent targets"""
+        return self.path_history.summary()
+    
     def clear_history(self):
         """Clear pathfinding history"""
         self.path_history.clear()
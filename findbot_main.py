@@ -1,8 +1,11 @@
 import pygame
 import math
 import time
-from supermarket_board import supermarket_layout, PRODUCT_CATEGORIES, get_category_by_key, get_shelf_center
+from supermarket_board import supermarket_layout, PRODUCT_CATEGORIES
 from enhanced_pathfinding import EnhancedPathFinder
+from precompute import load_precomputed
+from compressed_path import CompressedPath
+from incremental_pathfinding import DStarLitePlanner
 from tts_manager import TTSManager
 from stt_manager import STTManager
 import unicodedata
@@ -80,8 +83,19 @@ class FinalSupermarketFindBot:
         
         # Core systems
         self.layout = supermarket_layout
-        self.pathfinder = EnhancedPathFinder(self.layout)
+        # Shelf routes use the turn-minimizing search and off-route moves the
+        # D* Lite replanner, so no engine is selected: the built-in A* only
+        # serves plain queries.  Component labels come from
+        # `python precompute.py` output when it matches the layout
+        self.pathfinder = EnhancedPathFinder(self.layout, collect_stats=True,
+                                             precomputed=load_precomputed(self.layout),
+                                             categories=PRODUCT_CATEGORIES)
         self.sound_manager = SimpleSoundManager()
+        # Incremental planner kept alive while the user walks towards one shelf
+        self.replanner = None
+        self.replanner_category = None
+        # Set by off-route moves; the replan runs at most once per frame
+        self.replan_pending = False
         
         # Game state - Start near entrance
         self.user_pos = (26, 17)  # Near entrance at bottom center
@@ -243,31 +257,36 @@ class FinalSupermarketFindBot:
         
         # Animate path drawing
         visible_path_length = min(len(self.current_path), int(self.path_animation_index))
+        if visible_path_length == 0:
+            return
         
-        # Draw path segments
-        points = []
-        for i in range(visible_path_length):
-            row, col = self.current_path[i]
-            x = col * cell_width + cell_width // 2
-            y = row * cell_height + cell_height // 2 + 25
-            points.append((x, y))
-        
-        # Draw path line
-        if len(points) > 1:
-            for i in range(len(points) - 1):
-                # Bright yellow path on black walkways
-                pygame.draw.line(self.screen, YELLOW, points[i], points[i + 1], 5)
+        def to_pixels(row, col):
+            return col * cell_width + cell_width // 2, row * cell_height + cell_height // 2 + 25
+        
+        # Draw path line: one segment per straight run of the visible part
+        row, col = self.current_path.start
+        remaining = visible_path_length - 1
+        for dr, dc, count in self.current_path.runs():
+            if remaining <= 0:
+                break
+            count = min(count, remaining)
+            end_row, end_col = row + dr * count, col + dc * count
+            # Bright yellow path on black walkways
+            pygame.draw.line(self.screen, YELLOW, to_pixels(row, col), to_pixels(end_row, end_col), 5)
+            row, col = end_row, end_col
+            remaining -= count
         
         # Draw path dots
-        for i, point in enumerate(points):
-            if i < visible_path_length - 1:
-                pulse = math.sin(self.animation_time * 3 + i * 0.5) * 2
-                radius = 5 + pulse
-                pygame.draw.circle(self.screen, YELLOW, point, int(radius))
+        for i, (row, col) in enumerate(self.current_path):
+            if i >= visible_path_length - 1:
+                break
+            pulse = math.sin(self.animation_time * 3 + i * 0.5) * 2
+            radius = 5 + pulse
+            pygame.draw.circle(self.screen, YELLOW, to_pixels(row, col), int(radius))
         
         # Draw target with special effect
         if self.current_path and visible_path_length == len(self.current_path):
-            target_row, target_col = self.current_path[-1]
+            target_row, target_col = self.current_path.end
             x = target_col * cell_width + cell_width // 2
             y = target_row * cell_height + cell_height // 2 + 25
             
@@ -455,6 +474,17 @@ class FinalSupermarketFindBot:
             avg_text = f"TB khoang cach: {avg_dist:.1f}"
             text = self.font_small.render(avg_text, True, WHITE)
             self.screen.blit(text, (panel_x + 5, y_offset))
+            y_offset += 18
+
+        last = self.pathfinder.last_stats
+        if last is not None:
+            if last.cached:
+                last_text = "Lan cuoi: cache"
+            else:
+                expanded = '-' if last.expanded is None else last.expanded
+                last_text = f"Lan cuoi: {last.wall_time * 1000:.2f} ms, {expanded} o"
+            text = self.font_small.render(last_text, True, WHITE)
+            self.screen.blit(text, (panel_x + 5, y_offset))
         
         # Stylish current mode badge
         badge_color = GREEN if self.input_mode == 'voice' else BLUE
@@ -484,7 +514,8 @@ class FinalSupermarketFindBot:
     def handle_keyboard_input(self, key):
         """Handle keyboard input for product selection"""
         # Number keys and letter keys for product selection
-        category = get_category_by_key(key)
+        # The finder's own index, rebuilt with the layout
+        category = self.pathfinder.shelf_index.category_by_key(key)
         if category:
             self.selected_category = category
             self.find_path_to_product(category)
@@ -509,6 +540,7 @@ class FinalSupermarketFindBot:
             self.selected_category = None
             self.current_path = []
             self.path_animation_index = 0
+            self.replan_pending = False
             self.sound_manager.play_sound('error')
         # Voice input is handled directly in the main event loop, not here.
         elif key == 't' and not self.is_input_mode:
@@ -557,13 +589,18 @@ class FinalSupermarketFindBot:
             return
         
         info = PRODUCT_CATEGORIES[category]
-        product_positions = info['positions']
+        access_points = self.pathfinder.get_category_access_points(category)
         
-        result = self.pathfinder.find_nearest_shelf_access(self.user_pos, product_positions)
+        # Shortest route with the fewest turns: one spoken sentence per turn
+        result = self.pathfinder.find_path_min_turns(self.user_pos, access_points)
+        self.replan_pending = False
         
         if result:
-            target_pos, path, distance = result
-            self.current_path = path
+            target_pos, path = result
+            distance = len(path) - 1
+            # Run-length path: popleft() trims on-route steps in O(1), and
+            # drawing/directions work per straight run instead of per cell
+            self.current_path = CompressedPath.from_cells(path)
             self.path_animation_index = 0
             
             # Update statistics
@@ -581,6 +618,45 @@ class FinalSupermarketFindBot:
             self.sound_manager.play_sound('error')
             print(f"Khong tim thay duong den Ke {info['shelf_id']} - {info['name']}")
     
+    def replan_incrementally(self, category):
+        """Repair the D* Lite search for the shelf instead of searching from scratch"""
+        if self.replanner is None or self.replanner_category != category:
+            goals = self.pathfinder.get_category_access_points(category)
+            self.replanner = DStarLitePlanner(self.pathfinder, goals, self.user_pos)
+            self.replanner_category = category
+        else:
+            self.replanner.move_start(self.user_pos)
+        
+        path = self.replanner.get_path()
+        if path:
+            return path[-1], path, len(path) - 1
+        return None
+    
+    def replan_after_move(self):
+        """Coalesced replan for every off-route move made since the last frame.
+
+        The repaired D* Lite route is a shortest one but not turn-minimized,
+        so after leaving the route the directions may have more turns than
+        find_path_to_product gave; selecting the shelf again restores the
+        fewest-turns route.
+        """
+        self.replan_pending = False
+        if not self.selected_category:
+            return
+        
+        result = self.replan_incrementally(self.selected_category)
+        if result:
+            _, path, _ = result
+            self.current_path = CompressedPath.from_cells(path)
+            # Show the new route at once instead of replaying the draw animation
+            self.path_animation_index = len(path)
+            if self.tts.is_available() and len(path) > 1:
+                # Only the next instruction; the full readout blocks movement
+                self.tts.speak(self.generate_directions()[0])
+        else:
+            self.current_path = []
+            self.sound_manager.play_sound('error')
+    
     def _strip_accents(self, text: str) -> str:
         """Remove Vietnamese diacritics for display/text output."""
         return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
@@ -592,40 +668,14 @@ class FinalSupermarketFindBot:
         
         directions = []
         
-        # Get direction for each step
-        path_directions = []
-        for i in range(len(self.current_path) - 1):
-            current_pos = self.current_path[i]
-            next_pos = self.current_path[i + 1]
-            
-            dr = next_pos[0] - current_pos[0]
-            dc = next_pos[1] - current_pos[1]
-            
-            if dr == 0 and dc == 1:
-                path_directions.append("PHAI")
-            elif dr == 0 and dc == -1:
-                path_directions.append("TRAI")
-            elif dr == 1 and dc == 0:
-                path_directions.append("XUONG")
-            elif dr == -1 and dc == 0:
-                path_directions.append("LEN")
-        
-        if not path_directions:
+        # Straight runs come straight from the compressed path, so every run
+        # after the first is a turn
+        segments = list(self.current_path.segments())
+        if not segments:
             return ["Bạn đã đến nơi!"]
         
-        # Group consecutive same directions
-        i = 0
-        step = 1
-        while i < len(path_directions):
-            current_dir = path_directions[i]
-            count = 1
-            
-            # Count consecutive same directions
-            while i + count < len(path_directions) and path_directions[i + count] == current_dir:
-                count += 1
-            
-            # Determine if this is a turn or straight movement
-            if i == 0:
+        for step, (current_dir, count) in enumerate(segments, 1):
+            if step == 1:
                 # First movement
                 if current_dir == "LEN":
                     directions.append(f"Bước {step}: Đi thẳng {count} bước")
@@ -636,24 +686,15 @@ class FinalSupermarketFindBot:
                 elif current_dir == "PHAI":
                     directions.append(f"Bước {step}: Rẽ phải {count} bước")
             else:
-                # Check if direction changed (turn)
-                prev_dir = path_directions[i - 1]
-                if current_dir != prev_dir:
-                    # This is a turn
-                    if current_dir == "TRAI":
-                        directions.append(f"Bước {step}: Rẽ trái {count} bước")
-                    elif current_dir == "PHAI":
-                        directions.append(f"Bước {step}: Rẽ phải {count} bước")
-                    elif current_dir == "LEN":
-                        directions.append(f"Bước {step}: Đi lên {count} bước")
-                    elif current_dir == "XUONG":
-                        directions.append(f"Bước {step}: Đi xuống {count} bước")
-                else:
-                    # Continue in same direction
-                    directions.append(f"Bước {step}: Đi thẳng {count} bước")
-            
-            i += count
-            step += 1
+                # This is a turn
+                if current_dir == "TRAI":
+                    directions.append(f"Bước {step}: Rẽ trái {count} bước")
+                elif current_dir == "PHAI":
+                    directions.append(f"Bước {step}: Rẽ phải {count} bước")
+                elif current_dir == "LEN":
+                    directions.append(f"Bước {step}: Đi lên {count} bước")
+                elif current_dir == "XUONG":
+                    directions.append(f"Bước {step}: Đi xuống {count} bước")
         
         directions.append("Bạn đã đến nơi!")
         return directions
@@ -680,8 +721,13 @@ class FinalSupermarketFindBot:
             self.sound_manager.play_sound('navigate')
             
             # Update path if user moved
-            if self.current_path and self.selected_category:
-                self.find_path_to_product(self.selected_category)
+            if self.current_path and self.selected_category and not self.replan_pending:
+                if len(self.current_path) > 1 and self.current_path[1] == self.user_pos:
+                    # Stepped onto the next cell: the rest of the route is still shortest
+                    self.current_path.popleft()
+                    self.path_animation_index = max(0, self.path_animation_index - 1)
+                else:
+                    self.replan_pending = True
     
     def update_animations(self, dt):
         """Update animation timers"""
@@ -786,6 +832,10 @@ class FinalSupermarketFindBot:
                         key_name = pygame.key.name(event.key)
                         self.handle_keyboard_input(key_name)
             
+            # At most one replan per frame, however many moves key-repeat produced
+            if self.replan_pending:
+                self.replan_after_move()
+            
             # Update animations
             self.update_animations(dt)
             
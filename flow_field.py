@@ -0,0 +1,154 @@
+from array import array
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from grid_common import compile_walkable
+
+class FlowFieldRouter:
+    """Routing engine backed by precomputed reverse-BFS distance fields.
+
+    A field stores, for every cell, the number of steps to the nearest cell of
+    a goal set.  Once a field exists, the route from any walkable cell is found
+    by walking downhill, which costs O(path length) and no search at all.
+
+    Fields for goal sets passed to prepare() are pinned until the next rebuild;
+    fields built on demand for other goals live in a small LRU cache.
+    """
+
+    def __init__(self, layout: List[List[int]], max_cached_fields: int = 64):
+        self.max_cached_fields = max_cached_fields
+        self._prepared: Dict[FrozenSet[Tuple[int, int]], array] = {}
+        self._cached: "OrderedDict[FrozenSet[Tuple[int, int]], array]" = OrderedDict()
+        self.rebuild(layout)
+
+    @classmethod
+    def from_precomputed(cls, layout: List[List[int]], tables) -> "FlowFieldRouter":
+        """Router with every shelf field of a PrecomputedTables pinned, none rebuilt"""
+        router = cls(layout)
+        for name, field in tables.fields.items():
+            router.add_field(tables.shelf_targets[name], field)
+        return router
+
+    def rebuild(self, layout: List[List[int]]):
+        """Recompile walkability and drop every field (call after layout edits, then prepare() again)"""
+        self.rows = len(layout)
+        self.cols = len(layout[0]) if layout else 0
+        self.walkable = compile_walkable(layout)
+        # 'H' halves memory on store-sized maps; fall back to 'i' on huge ones
+        if self.rows * self.cols < 0xFFFF:
+            self._typecode, self.unreachable = 'H', 0xFFFF
+        else:
+            self._typecode, self.unreachable = 'i', -1
+        self._prepared = {}
+        self._cached.clear()
+
+    def prepare(self, goal_sets: Iterable[Iterable[Tuple[int, int]]]):
+        """Build and pin fields for goal sets that are queried repeatedly (e.g. shelves)"""
+        for goals in goal_sets:
+            key = frozenset(goals)
+            if key not in self._prepared:
+                self._prepared[key] = self.build_field(key)
+
+    def add_field(self, goals: Iterable[Tuple[int, int]], field):
+        """Pin a field computed elsewhere; any indexable of rows * cols distances works"""
+        if len(field) != self.rows * self.cols:
+            raise ValueError("Field size does not match the layout")
+        self._prepared[frozenset(goals)] = field
+
+    def build_field(self, goals: Iterable[Tuple[int, int]]) -> array:
+        """Multi-source BFS from the goals over walkable cells"""
+        cols = self.cols
+        walkable = self.walkable
+        unreachable = self.unreachable
+        field = array(self._typecode, [unreachable]) * (self.rows * cols)
+        queue = deque()
+        for row, col in goals:
+            if 0 <= row < self.rows and 0 <= col < cols:
+                node = row * cols + col
+                if walkable[node] and field[node] == unreachable:
+                    field[node] = 0
+                    queue.append(node)
+
+        last_col = cols - 1
+        size = len(field)
+        while queue:
+            node = queue.popleft()
+            next_distance = field[node] + 1
+            col = node % cols
+            if col < last_col:
+                neighbor = node + 1
+                if walkable[neighbor] and field[neighbor] == unreachable:
+                    field[neighbor] = next_distance
+                    queue.append(neighbor)
+            if col > 0:
+                neighbor = node - 1
+                if walkable[neighbor] and field[neighbor] == unreachable:
+                    field[neighbor] = next_distance
+                    queue.append(neighbor)
+            neighbor = node + cols
+            if neighbor < size and walkable[neighbor] and field[neighbor] == unreachable:
+                field[neighbor] = next_distance
+                queue.append(neighbor)
+            neighbor = node - cols
+            if neighbor >= 0 and walkable[neighbor] and field[neighbor] == unreachable:
+                field[neighbor] = next_distance
+                queue.append(neighbor)
+        return field
+
+    def field_for(self, goals: Iterable[Tuple[int, int]]) -> array:
+        """Return the distance field for a goal set, building it if needed"""
+        key = goals if isinstance(goals, frozenset) else frozenset(goals)
+        field = self._prepared.get(key)
+        if field is not None:
+            return field
+        field = self._cached.get(key)
+        if field is not None:
+            self._cached.move_to_end(key)
+            return field
+        field = self.build_field(key)
+        self._cached[key] = field
+        if len(self._cached) > self.max_cached_fields:
+            self._cached.popitem(last=False)
+        return field
+
+    def distance(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[int]:
+        """Steps from start to the nearest goal, or None if unreachable"""
+        row, col = start
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        value = self.field_for(goals)[row * self.cols + col]
+        return None if value == self.unreachable else value
+
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Walk downhill from start to the nearest goal"""
+        row, col = start
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+        path = self.walk(start, self.field_for(goals))
+        if path is None:
+            return None
+        return path[-1], path
+
+    def walk(self, start: Tuple[int, int], field: array) -> Optional[List[Tuple[int, int]]]:
+        """Follow a distance field downhill from start to one of its sources"""
+        cols = self.cols
+        node = start[0] * cols + start[1]
+        remaining = field[node]
+        if remaining == self.unreachable or not self.walkable[node]:
+            return None
+
+        path = [start]
+        while remaining:
+            remaining -= 1
+            # Same neighbor order as EnhancedPathFinder.get_neighbors
+            row, col = divmod(node, cols)
+            if col + 1 < cols and field[node + 1] == remaining:
+                node += 1
+            elif row + 1 < self.rows and field[node + cols] == remaining:
+                node += cols
+            elif col > 0 and field[node - 1] == remaining:
+                node -= 1
+            else:
+                node -= cols
+            path.append(divmod(node, cols))
+        return path
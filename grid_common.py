@@ -0,0 +1,41 @@
+from typing import Iterable, List, Sequence, Tuple
+
+# Layout codes a robot can stand on: 0 = walkway, 9 = entrance/exit
+WALKABLE_CODES = (0, 9)
+_WALKABLE_TABLE = bytes(1 if code in WALKABLE_CODES else 0 for code in range(256))
+
+def compile_walkable(layout: Sequence[Sequence[int]], padding: int = 0) -> bytearray:
+    """Row-major walkability bitmap (1 = walkable) of a layout.
+
+    padding adds that many blocked cells around the map, so a cell (row, col)
+    sits at (row + padding) * (cols + 2 * padding) + col + padding and
+    neighbour ids need no bounds checks.
+    """
+    rows = len(layout)
+    cols = len(layout[0]) if layout else 0
+    stride = cols + 2 * padding
+    walkable = bytearray(stride * (rows + 2 * padding))
+    for row, line in enumerate(layout):
+        base = (row + padding) * stride + padding
+        walkable[base:base + cols] = bytes(line).translate(_WALKABLE_TABLE)
+    return walkable
+
+def goal_box_tables(goal_cells: Iterable[Tuple[int, int]], rows: int, cols: int, padding: int = 0,
+                    scale: float = 1) -> Tuple[List[float], List[float]]:
+    """Per-row and per-column distance to the bounding box of the goals.
+
+    row_h[row] + col_h[col] is the Manhattan distance from a cell to the box
+    times scale (the cheapest step), which never overestimates the distance
+    to the nearest goal.  Indices are in the coordinates of a bitmap with the
+    given padding.
+    """
+    goal_cells = list(goal_cells)
+    min_row = min(row for row, _ in goal_cells) + padding
+    max_row = max(row for row, _ in goal_cells) + padding
+    min_col = min(col for _, col in goal_cells) + padding
+    max_col = max(col for _, col in goal_cells) + padding
+    row_h = [(min_row - row if row < min_row else (row - max_row if row > max_row else 0)) * scale
+             for row in range(rows + 2 * padding)]
+    col_h = [(min_col - col if col < min_col else (col - max_col if col > max_col else 0)) * scale
+             for col in range(cols + 2 * padding)]
+    return row_h, col_h
@@ -0,0 +1,135 @@
+import heapq
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from grid_common import WALKABLE_CODES, compile_walkable, goal_box_tables
+
+class GridAStar:
+    """A* over a flat walkability bitmap with integer node ids.
+
+    The layout is compiled once into a bytearray with a one-cell blocked
+    border, so a cell (row, col) has id (row + 1) * stride + (col + 1) and its
+    neighbours are id +/- 1 and id +/- stride with no bounds checks.  g-scores,
+    parents and visit stamps live in preallocated arrays that are reused by
+    every query; a generation counter replaces clearing them.
+    """
+
+    def __init__(self, layout: List[List[int]]):
+        self.rebuild(layout)
+
+    def rebuild(self, layout: List[List[int]]):
+        """Recompile the bitmap and reallocate buffers (call after layout edits)"""
+        self.rows = len(layout)
+        self.cols = len(layout[0]) if layout else 0
+        self.stride = self.cols + 2
+        self.size = (self.rows + 2) * self.stride
+        self.walkable = compile_walkable(layout, padding=1)
+        self.g_score = array('i', [0]) * self.size
+        self.parent = array('i', [0]) * self.size
+        self.seen = array('I', [0]) * self.size
+        self.closed = array('I', [0]) * self.size
+        self.generation = 0
+        self.expansions = 0  # cells expanded by the last query
+
+    def update_cells(self, layout: List[List[int]], cells: Iterable[Tuple[int, int]]):
+        """Apply walkability edits to the bitmap; the search buffers stay valid"""
+        if len(layout) != self.rows or (layout and len(layout[0]) != self.cols):
+            self.rebuild(layout)
+            return
+        for row, col in cells:
+            self.walkable[self.node_id(row, col)] = 1 if layout[row][col] in WALKABLE_CODES else 0
+
+    def node_id(self, row: int, col: int) -> int:
+        return (row + 1) * self.stride + col + 1
+
+    def cell(self, node: int) -> Tuple[int, int]:
+        row, col = divmod(node, self.stride)
+        return row - 1, col - 1
+
+    def is_walkable(self, row: int, col: int) -> bool:
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.walkable[self.node_id(row, col)] == 1
+
+    def find_shortest_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Same contract as EnhancedPathFinder.find_shortest_path"""
+        result = self.find_path_to_any(start, [goal])
+        if result:
+            return result[1]
+        return None
+
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """A* from start that stops at the first goal reached"""
+        if not self.is_walkable(start[0], start[1]):
+            return None
+        goal_cells = [goal for goal in goals if self.is_walkable(goal[0], goal[1])]
+        if not goal_cells:
+            return None
+
+        stride = self.stride
+        size = self.size
+        walkable = self.walkable
+        g_score = self.g_score
+        parent = self.parent
+        seen = self.seen
+        closed = self.closed
+        goal_ids = {self.node_id(row, col) for row, col in goal_cells}
+
+        self.generation += 1
+        if self.generation == 0xFFFFFFFF:
+            # Stamp overflow: clear once every four billion queries
+            self.seen = seen = array('I', [0]) * size
+            self.closed = closed = array('I', [0]) * size
+            self.generation = 1
+        generation = self.generation
+
+        # Distance to the goal bounding box in padded coordinates; the
+        # heuristic of a cell is row_h[row] + col_h[col]
+        row_h, col_h = goal_box_tables(goal_cells, self.rows, self.cols, padding=1)
+
+        start_id = self.node_id(start[0], start[1])
+        g_score[start_id] = 0
+        parent[start_id] = -1
+        seen[start_id] = generation
+        # Heap keys pack (f, -g, node) into one int: lowest f first, ties broken
+        # towards the deepest node, which keeps open aisles from fanning out
+        depth = size
+        open_set = [((row_h[start[0] + 1] + col_h[start[1] + 1]) * (depth + 1) + depth) * size + start_id]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
+
+        while open_set:
+            node = heappop(open_set) % size
+            if closed[node] == generation:
+                continue
+            if node in goal_ids:
+                self.expansions = expansions
+                return self.cell(node), self._reconstruct(node)
+            closed[node] = generation
+            expansions += 1
+
+            next_g = g_score[node] + 1
+            tie = depth - next_g
+            row, col = divmod(node, stride)
+            h_row = row_h[row]
+            h_col = col_h[col]
+            for neighbor, h in ((node + 1, h_row + col_h[col + 1]),
+                                (node + stride, row_h[row + 1] + h_col),
+                                (node - 1, h_row + col_h[col - 1]),
+                                (node - stride, row_h[row - 1] + h_col)):
+                if walkable[neighbor] and (seen[neighbor] != generation or next_g < g_score[neighbor]):
+                    seen[neighbor] = generation
+                    g_score[neighbor] = next_g
+                    parent[neighbor] = node
+                    heappush(open_set, ((next_g + h) * (depth + 1) + tie) * size + neighbor)
+
+        self.expansions = expansions
+        return None  # No path found
+
+    def _reconstruct(self, node: int) -> List[Tuple[int, int]]:
+        parent = self.parent
+        path = []
+        while node != -1:
+            path.append(self.cell(node))
+            node = parent[node]
+        path.reverse()
+        return path
@@ -0,0 +1,285 @@
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from grid_common import WALKABLE_CODES, compile_walkable, goal_box_tables
+
+Cluster = Tuple[int, int]
+
+class HierarchicalPathFinder:
+    """HPA* engine for warehouse-scale layouts.
+
+    The grid is cut into cluster_size x cluster_size clusters.  Along every
+    shared cluster border, each run of cells walkable on both sides gets one
+    entrance pair (two for runs of 6+ cells, at the run ends).  Distances
+    between the entrances of a cluster are precomputed with a BFS that stays
+    inside it.  A query links the start and goals into this abstract graph
+    with local BFS, runs A* on the abstract graph, and then refines each
+    abstract edge back into cells.  Paths are near-optimal: they may be a few
+    steps longer than A* where the best route hugs a cluster border.
+
+    update_cells() rebuilds only the borders and entrance tables of the
+    clusters an edit touches.
+    """
+
+    def __init__(self, layout: List[List[int]], cluster_size: int = 16):
+        self.cluster_size = cluster_size
+        self.rebuild(layout)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def rebuild(self, layout: List[List[int]]):
+        """Recompile the whole abstract graph (call after layout edits)"""
+        self.rows = len(layout)
+        self.cols = len(layout[0]) if layout else 0
+        self.walkable = compile_walkable(layout)
+        size = self.cluster_size
+        self.cluster_rows = -(-self.rows // size)
+        self.cluster_cols = -(-self.cols // size)
+
+        self._borders: Dict[Tuple[Cluster, Cluster], List[Tuple[int, int]]] = {}
+        self._inter: Dict[int, Set[int]] = {}
+        self._intra: Dict[Cluster, Dict[int, Dict[int, int]]] = {}
+        self._intra_paths: Dict[Cluster, Dict[Tuple[int, int], List[int]]] = {}
+        for cluster_row in range(self.cluster_rows):
+            for cluster_col in range(self.cluster_cols):
+                cluster = (cluster_row, cluster_col)
+                for neighbor in ((cluster_row, cluster_col + 1), (cluster_row + 1, cluster_col)):
+                    if neighbor[0] < self.cluster_rows and neighbor[1] < self.cluster_cols:
+                        self._build_border(cluster, neighbor)
+        for cluster_row in range(self.cluster_rows):
+            for cluster_col in range(self.cluster_cols):
+                self._build_intra((cluster_row, cluster_col))
+
+    def update_cells(self, layout: List[List[int]], cells: Iterable[Tuple[int, int]]):
+        """Apply walkability edits, rebuilding only the clusters they touch"""
+        if len(layout) != self.rows or (layout and len(layout[0]) != self.cols):
+            self.rebuild(layout)
+            return
+        size = self.cluster_size
+        touched_clusters = set()
+        touched_borders = set()
+        for row, col in cells:
+            cell = layout[row][col]
+            self.walkable[row * self.cols + col] = 1 if cell in WALKABLE_CODES else 0
+            cluster = (row // size, col // size)
+            touched_clusters.add(cluster)
+            # An edit on a cluster edge changes the border with the neighbour
+            if col % size == size - 1 and cluster[1] + 1 < self.cluster_cols:
+                touched_borders.add((cluster, (cluster[0], cluster[1] + 1)))
+            if col % size == 0 and cluster[1] > 0:
+                touched_borders.add(((cluster[0], cluster[1] - 1), cluster))
+            if row % size == size - 1 and cluster[0] + 1 < self.cluster_rows:
+                touched_borders.add((cluster, (cluster[0] + 1, cluster[1])))
+            if row % size == 0 and cluster[0] > 0:
+                touched_borders.add(((cluster[0] - 1, cluster[1]), cluster))
+        for first, second in touched_borders:
+            self._build_border(first, second)
+            touched_clusters.update((first, second))
+        for cluster in touched_clusters:
+            self._build_intra(cluster)
+
+    def _bounds(self, cluster: Cluster) -> Tuple[int, int, int, int]:
+        size = self.cluster_size
+        row0, col0 = cluster[0] * size, cluster[1] * size
+        return row0, min(row0 + size, self.rows), col0, min(col0 + size, self.cols)
+
+    def _cluster_of(self, node: int) -> Cluster:
+        row, col = divmod(node, self.cols)
+        return row // self.cluster_size, col // self.cluster_size
+
+    def _build_border(self, first: Cluster, second: Cluster):
+        """Entrance pairs on the border between first and its right/lower neighbour"""
+        for a, b in self._borders.get((first, second), ()):
+            self._inter.get(a, set()).discard(b)
+            self._inter.get(b, set()).discard(a)
+
+        cols = self.cols
+        walkable = self.walkable
+        row0, row1, col0, col1 = self._bounds(first)
+        if second[1] > first[1]:
+            # Vertical border: first's last column against second's first column
+            line = [(row * cols + col1 - 1, row * cols + col1) for row in range(row0, row1)]
+        else:
+            line = [((row1 - 1) * cols + col, row1 * cols + col) for col in range(col0, col1)]
+
+        pairs = []
+        run: List[Tuple[int, int]] = []
+        for a, b in line + [(-1, -1)]:
+            if a >= 0 and walkable[a] and walkable[b]:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) < 6:
+                    pairs.append(run[len(run) // 2])
+                else:
+                    pairs.extend((run[0], run[-1]))
+                run = []
+        self._borders[(first, second)] = pairs
+        for a, b in pairs:
+            self._inter.setdefault(a, set()).add(b)
+            self._inter.setdefault(b, set()).add(a)
+
+    def _entrances(self, cluster: Cluster) -> Set[int]:
+        row, col = cluster
+        entrances = set()
+        for border, cluster_index in ((((row, col), (row, col + 1)), 0), (((row, col), (row + 1, col)), 0),
+                                      (((row, col - 1), (row, col)), 1), (((row - 1, col), (row, col)), 1)):
+            for pair in self._borders.get(border, ()):
+                entrances.add(pair[cluster_index])
+        return entrances
+
+    def _build_intra(self, cluster: Cluster):
+        """Distances between every pair of entrances, staying inside the cluster"""
+        entrances = self._entrances(cluster)
+        table = {}
+        for entrance in entrances:
+            distances, _ = self._local_bfs([entrance], cluster)
+            table[entrance] = {other: distances[other] for other in entrances
+                               if other != entrance and other in distances}
+        self._intra[cluster] = table
+        self._intra_paths[cluster] = {}
+
+    def _local_bfs(self, sources: Iterable[int], cluster: Cluster) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """BFS from sources restricted to one cluster; returns (distance, parent)"""
+        row0, row1, col0, col1 = self._bounds(cluster)
+        cols = self.cols
+        walkable = self.walkable
+        distances = {}
+        parents = {}
+        queue = deque()
+        for source in sources:
+            if source not in distances:
+                distances[source] = 0
+                parents[source] = -1
+                queue.append(source)
+        while queue:
+            node = queue.popleft()
+            row, col = divmod(node, cols)
+            next_distance = distances[node] + 1
+            # Same neighbour order as EnhancedPathFinder.get_neighbors
+            for neighbor, inside in ((node + 1, col + 1 < col1), (node + cols, row + 1 < row1),
+                                     (node - 1, col > col0), (node - cols, row > row0)):
+                if inside and walkable[neighbor] and neighbor not in distances:
+                    distances[neighbor] = next_distance
+                    parents[neighbor] = node
+                    queue.append(neighbor)
+        return distances, parents
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """Abstract A* from start to the nearest goal, refined into cells"""
+        cols = self.cols
+        if not (0 <= start[0] < self.rows and 0 <= start[1] < cols):
+            return None
+        source = start[0] * cols + start[1]
+        if not self.walkable[source]:
+            return None
+        goal_ids = {row * cols + col for row, col in goals
+                    if 0 <= row < self.rows and 0 <= col < cols and self.walkable[row * cols + col]}
+        if not goal_ids:
+            return None
+        if source in goal_ids:
+            return start, [start]
+
+        goals_by_cluster: Dict[Cluster, List[int]] = {}
+        for goal in goal_ids:
+            goals_by_cluster.setdefault(self._cluster_of(goal), []).append(goal)
+        # Per goal cluster: distance (and downhill parent) of every cell to its nearest goal
+        goal_fields = {cluster: self._local_bfs(cluster_goals, cluster)
+                       for cluster, cluster_goals in goals_by_cluster.items()}
+        start_cluster = self._cluster_of(source)
+        start_distances, start_parents = self._local_bfs([source], start_cluster)
+
+        row_h, col_h = goal_box_tables([divmod(goal, cols) for goal in goal_ids], self.rows, cols)
+
+        def heuristic(node: int) -> int:
+            row, col = divmod(node, cols)
+            return row_h[row] + col_h[col]
+
+        goal_node = -1
+        g_score = {source: 0}
+        came_from = {source: (None, None)}
+        # Entries are (f, -g, node): ties go to the deepest node
+        open_set = [(heuristic(source), 0, source)]
+        while open_set:
+            _, negative_g, node = heapq.heappop(open_set)
+            node_g = -negative_g
+            if node_g > g_score.get(node, node_g):
+                continue  # stale entry
+            if node == goal_node:
+                return self._refine(came_from, start_cluster, start_parents, goal_fields)
+
+            edges = []
+            cluster = self._cluster_of(node)
+            if node == source:
+                edges.extend((entrance, distance, 'start') for entrance, distance in start_distances.items()
+                             if entrance != source and entrance in self._intra[start_cluster])
+            if node in self._intra[cluster]:
+                edges.extend((other, distance, 'intra') for other, distance in self._intra[cluster][node].items())
+                edges.extend((other, 1, 'inter') for other in self._inter.get(node, ()))
+            if cluster in goal_fields and node in goal_fields[cluster][0]:
+                edges.append((goal_node, goal_fields[cluster][0][node], 'goal'))
+
+            for neighbor, cost, kind in edges:
+                tentative = node_g + cost
+                if tentative < g_score.get(neighbor, tentative + 1):
+                    g_score[neighbor] = tentative
+                    came_from[neighbor] = (node, kind)
+                    h = 0 if neighbor == goal_node else heuristic(neighbor)
+                    heapq.heappush(open_set, (tentative + h, -tentative, neighbor))
+
+        return None  # No path found
+
+    def _refine(self, came_from, start_cluster, start_parents, goal_fields) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+        """Expand the abstract edge chain into a full cell path"""
+        chain = []
+        node = -1
+        while node is not None:
+            previous, kind = came_from[node]
+            chain.append((previous, node, kind))
+            node = previous
+        chain.reverse()
+
+        cells: List[int] = []
+        for previous, node, kind in chain:
+            if previous is None:
+                cells.append(node)  # the start
+            elif kind == 'start':
+                leg = []
+                while node != -1:
+                    leg.append(node)
+                    node = start_parents[node]
+                cells.extend(reversed(leg[:-1]))
+            elif kind == 'intra':
+                cells.extend(self._intra_path(previous, node)[1:])
+            elif kind == 'inter':
+                cells.append(node)
+            else:
+                # Walk the goal cluster's field downhill to the nearest goal
+                _, parents = goal_fields[self._cluster_of(previous)]
+                node = parents[previous]
+                while node != -1:
+                    cells.append(node)
+                    node = parents[node]
+        path = [divmod(cell, self.cols) for cell in cells]
+        return path[-1], path
+
+    def _intra_path(self, first: int, second: int) -> List[int]:
+        """Cell path between two entrances of one cluster (cached until it is rebuilt)"""
+        cluster = self._cluster_of(first)
+        cache = self._intra_paths[cluster]
+        path = cache.get((first, second))
+        if path is None:
+            _, parents = self._local_bfs([first], cluster)
+            path = []
+            node = second
+            while node != -1:
+                path.append(node)
+                node = parents[node]
+            path.reverse()
+            cache[(first, second)] = path
+        return path
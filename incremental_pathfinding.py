@@ -0,0 +1,140 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INFINITY = float('inf')
+
+class DStarLitePlanner:
+    """Incremental shortest-path planner (D* Lite) towards a fixed goal set.
+
+    The search runs backwards from the goals, so g(s) is the distance from s
+    to the nearest goal.  Moving the start only shifts the heuristic (the km
+    offset), and walkability changes only touch the changed cells and their
+    neighbours; compute() then repairs just the part of the search tree that
+    is affected instead of starting over.
+    """
+
+    def __init__(self, finder, goals: Iterable[Tuple[int, int]], start: Tuple[int, int]):
+        self.finder = finder
+        self.goals = frozenset(goals)
+        self.start = start
+        self._layout_version = finder.layout_version
+        self.reset()
+
+    def reset(self):
+        """Drop all search state and plan from scratch"""
+        self.g: Dict[Tuple[int, int], float] = {}
+        self.rhs: Dict[Tuple[int, int], float] = {}
+        self._open: Dict[Tuple[int, int], Tuple[float, float]] = {}
+        self._heap: List = []
+        self.km = 0
+        self._last_start = self.start
+        self.expansions = 0
+        for goal in self.goals:
+            if self.finder.is_walkable(goal[0], goal[1]):
+                self.rhs[goal] = 0
+                self._push(goal, self._key(goal))
+        self._layout_version = self.finder.layout_version
+
+    def _heuristic(self, pos: Tuple[int, int]) -> int:
+        return abs(pos[0] - self.start[0]) + abs(pos[1] - self.start[1])
+
+    def _key(self, pos: Tuple[int, int]) -> Tuple[float, float]:
+        best = min(self.g.get(pos, INFINITY), self.rhs.get(pos, INFINITY))
+        return best + self._heuristic(pos) + self.km, best
+
+    def _push(self, pos: Tuple[int, int], key: Tuple[float, float]):
+        self._open[pos] = key
+        heapq.heappush(self._heap, (key, pos))
+
+    def _top_key(self) -> Tuple[float, float]:
+        heap = self._heap
+        while heap:
+            key, pos = heap[0]
+            if self._open.get(pos) == key:
+                return key
+            heapq.heappop(heap)  # stale entry
+        return INFINITY, INFINITY
+
+    def _update_vertex(self, pos: Tuple[int, int]):
+        best = INFINITY
+        if self.finder.is_walkable(pos[0], pos[1]):
+            if pos in self.goals:
+                best = 0
+            else:
+                g = self.g
+                for neighbor in self.finder.get_neighbors(pos[0], pos[1]):
+                    cost = g.get(neighbor, INFINITY) + 1
+                    if cost < best:
+                        best = cost
+        self.rhs[pos] = best
+        self._open.pop(pos, None)
+        if self.g.get(pos, INFINITY) != self.rhs.get(pos, INFINITY):
+            self._push(pos, self._key(pos))
+
+    def compute(self):
+        """Repair the search until the start's distance is consistent"""
+        start = self.start
+        g = self.g
+        rhs = self.rhs
+        while True:
+            top_key = self._top_key()
+            if not (top_key < self._key(start) or rhs.get(start, INFINITY) != g.get(start, INFINITY)):
+                break
+            _, pos = heapq.heappop(self._heap)
+            del self._open[pos]
+            new_key = self._key(pos)
+            if top_key < new_key:
+                self._push(pos, new_key)
+                continue
+            self.expansions += 1
+            if g.get(pos, INFINITY) > rhs.get(pos, INFINITY):
+                g[pos] = rhs[pos]
+                for neighbor in self.finder.get_neighbors(pos[0], pos[1]):
+                    self._update_vertex(neighbor)
+            else:
+                g[pos] = INFINITY
+                self._update_vertex(pos)
+                for neighbor in self.finder.get_neighbors(pos[0], pos[1]):
+                    self._update_vertex(neighbor)
+
+    def move_start(self, start: Tuple[int, int]):
+        """The user moved: shift the heuristic instead of re-planning"""
+        self.km += abs(start[0] - self._last_start[0]) + abs(start[1] - self._last_start[1])
+        self._last_start = start
+        self.start = start
+
+    def update_cells(self, cells: Iterable[Tuple[int, int]]):
+        """Cells changed walkability (already applied to the finder's layout)"""
+        self._layout_version = self.finder.layout_version
+        touched = set()
+        for row, col in cells:
+            touched.add((row, col))
+            touched.update([(row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)])
+        for pos in touched:
+            if 0 <= pos[0] < self.finder.rows and 0 <= pos[1] < self.finder.cols:
+                self._update_vertex(pos)
+
+    def distance(self) -> Optional[int]:
+        """Steps from the start to the nearest goal after repairing, or None"""
+        self._sync()
+        self.compute()
+        value = self.g.get(self.start, INFINITY)
+        return None if value == INFINITY else int(value)
+
+    def get_path(self) -> Optional[List[Tuple[int, int]]]:
+        """Repair the search and follow g downhill from the start to a goal"""
+        distance = self.distance()
+        if distance is None or not self.finder.is_walkable(self.start[0], self.start[1]):
+            return None
+        g = self.g
+        pos = self.start
+        path = [pos]
+        for _ in range(distance):
+            pos = min(self.finder.get_neighbors(pos[0], pos[1]), key=lambda cell: g.get(cell, INFINITY))
+            path.append(pos)
+        return path
+
+    def _sync(self):
+        # Layout edited without update_cells(): the old search tree cannot be trusted
+        if self._layout_version != self.finder.layout_version:
+            self.reset()
@@ -0,0 +1,149 @@
+import heapq
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from grid_common import goal_box_tables
+from grid_engine import GridAStar
+
+class JumpPointSearch(GridAStar):
+    """Jump Point Search for the 4-connected, uniform-cost store grid.
+
+    Straight runs are scanned in the bitmap instead of being pushed through
+    the heap cell by cell: only jump points (cells where the shortest path may
+    have to turn) are expanded.  Paths turn from vertical to horizontal
+    anywhere, so every vertical scan step also probes left and right; they turn
+    from horizontal to vertical only where an obstacle ends (a forced
+    neighbour).  The result is expanded back into the full cell-by-cell path.
+    """
+
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """JPS from start that stops at the first goal reached"""
+        if not self.is_walkable(start[0], start[1]):
+            return None
+        goal_cells = [goal for goal in goals if self.is_walkable(goal[0], goal[1])]
+        if not goal_cells:
+            return None
+
+        stride = self.stride
+        size = self.size
+        g_score = self.g_score
+        parent = self.parent
+        seen = self.seen
+        closed = self.closed
+        goal_ids = {self.node_id(row, col) for row, col in goal_cells}
+        row_h, col_h = goal_box_tables(goal_cells, self.rows, self.cols, padding=1)
+
+        self.generation += 1
+        if self.generation == 0xFFFFFFFF:
+            # Stamp overflow: clear once every four billion queries
+            self.seen = seen = array('I', [0]) * size
+            self.closed = closed = array('I', [0]) * size
+            self.generation = 1
+        generation = self.generation
+
+        start_id = self.node_id(start[0], start[1])
+        g_score[start_id] = 0
+        parent[start_id] = -1
+        seen[start_id] = generation
+        depth = size
+        open_set = [((row_h[start[0] + 1] + col_h[start[1] + 1]) * (depth + 1) + depth) * size + start_id]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
+
+        while open_set:
+            node = heappop(open_set) % size
+            if closed[node] == generation:
+                continue
+            if node in goal_ids:
+                self.expansions = expansions
+                return self.cell(node), self._expand(node)
+            closed[node] = generation
+            expansions += 1
+
+            node_g = g_score[node]
+            for direction in self._pruned_directions(node):
+                jump_point = self._jump(node, direction, goal_ids)
+                if jump_point < 0:
+                    continue
+                next_g = node_g + (jump_point - node) // direction  # straight run length
+                if seen[jump_point] != generation or next_g < g_score[jump_point]:
+                    seen[jump_point] = generation
+                    g_score[jump_point] = next_g
+                    parent[jump_point] = node
+                    row, col = divmod(jump_point, stride)
+                    f = next_g + row_h[row] + col_h[col]
+                    heappush(open_set, (f * (depth + 1) + depth - next_g) * size + jump_point)
+
+        self.expansions = expansions
+        return None  # No path found
+
+    def _pruned_directions(self, node: int) -> Tuple[int, ...]:
+        """Directions worth scanning from node, given the direction it was reached in"""
+        stride = self.stride
+        walkable = self.walkable
+        previous = self.parent[node]
+        if previous == -1:
+            candidates = (1, stride, -1, -stride)
+        else:
+            direction = self._direction(previous, node)
+            if direction == 1 or direction == -1:
+                candidates = (direction, stride, -stride)
+            else:
+                candidates = (direction, 1, -1)
+        return tuple(d for d in candidates if walkable[node + d])
+
+    def _direction(self, source: int, target: int) -> int:
+        """Unit step (+/-1 or +/-stride) leading from source to a collinear target"""
+        delta = target - source
+        if -self.stride < delta < self.stride:
+            return 1 if delta > 0 else -1
+        return self.stride if delta > 0 else -self.stride
+
+    def _jump(self, node: int, direction: int, goal_ids) -> int:
+        """Scan from node in direction; return the next jump point id or -1"""
+        if direction == 1 or direction == -1:
+            return self._jump_horizontal(node, direction, goal_ids)
+
+        walkable = self.walkable
+        while True:
+            node += direction
+            if not walkable[node]:
+                return -1
+            if node in goal_ids:
+                return node
+            # Forced neighbour: a side opens up right after an obstacle
+            if (walkable[node - 1] and not walkable[node - 1 - direction]) or \
+                    (walkable[node + 1] and not walkable[node + 1 - direction]):
+                return node
+            # A horizontal scan from here finds something: turning here may be optimal
+            if self._jump_horizontal(node, 1, goal_ids) >= 0 or self._jump_horizontal(node, -1, goal_ids) >= 0:
+                return node
+
+    def _jump_horizontal(self, node: int, direction: int, goal_ids) -> int:
+        stride = self.stride
+        walkable = self.walkable
+        while True:
+            node += direction
+            if not walkable[node]:
+                return -1
+            if node in goal_ids:
+                return node
+            if (walkable[node - stride] and not walkable[node - stride - direction]) or \
+                    (walkable[node + stride] and not walkable[node + stride - direction]):
+                return node
+
+    def _expand(self, node: int) -> List[Tuple[int, int]]:
+        """Turn the chain of jump points into the full cell path"""
+        jump_points = []
+        while node != -1:
+            jump_points.append(node)
+            node = self.parent[node]
+        jump_points.reverse()
+
+        path = [self.cell(jump_points[0])]
+        for source, target in zip(jump_points, jump_points[1:]):
+            step = self._direction(source, target)
+            for node in range(source + step, target + step, step):
+                path.append(self.cell(node))
+        return path
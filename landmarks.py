@@ -0,0 +1,184 @@
+import heapq
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+from grid_common import goal_box_tables
+from grid_engine import GridAStar
+from reachability import ReachabilityIndex
+
+class LandmarkAStar(GridAStar):
+    """A* with the ALT heuristic (A*, landmarks, triangle inequality).
+
+    A few landmark cells are picked by farthest-point selection inside the
+    largest walkable region, and the exact walking distance from each of
+    them to every cell is stored in a compact array.  For any cell n and goal
+    g, |d(L, n) - d(L, g)| never exceeds the real distance from n to g; for a
+    goal set the bound is the distance from d(L, n) to the interval of the
+    goals' d(L, .) values.  The heuristic is the largest of these bounds and
+    the Manhattan box distance, which stays consistent, so paths are as short
+    as A*'s while walls and shelves no longer fool the heuristic.
+
+    The tables are built in rebuild(), i.e. once at startup and again
+    whenever EnhancedPathFinder reports a layout change.  expansions holds
+    the number of cells expanded by the last query.
+    """
+
+    def __init__(self, layout: List[List[int]], landmark_count: int = 8, precomputed=None):
+        self.landmark_count = landmark_count
+        # (landmarks, tables) adopted by the first rebuild instead of the BFS passes
+        self._precomputed = precomputed
+        super().__init__(layout)
+
+    @classmethod
+    def from_precomputed(cls, layout: List[List[int]], tables) -> "LandmarkAStar":
+        """Engine over the landmark tables of a PrecomputedTables (e.g. memory-mapped)"""
+        return cls(layout, len(tables.landmarks), precomputed=(tables.landmarks, tables.landmark_tables))
+
+    def rebuild(self, layout: List[List[int]]):
+        """Recompile the bitmap and recompute every landmark table"""
+        super().rebuild(layout)
+        self.expansions = 0
+        # 'H' halves memory on store-sized maps; fall back to 'i' on huge ones
+        if self.size < 0xFFFF:
+            self._typecode, self.unreachable = 'H', 0xFFFF
+        else:
+            self._typecode, self.unreachable = 'i', -1
+        self.landmarks: List[int] = []
+        self.tables: List[array] = []
+        if self._precomputed is not None:
+            landmarks, tables = self._precomputed
+            self._precomputed = None  # later rebuilds follow layout edits
+            self.landmarks = list(landmarks)
+            self.tables = list(tables)
+            return
+
+        labels = ReachabilityIndex(layout)
+        if not labels.component_sizes:
+            return
+        largest = max(range(len(labels.component_sizes)), key=labels.component_sizes.__getitem__)
+        seed = labels.labels.index(largest)
+        seed = self.node_id(*divmod(seed, self.cols))
+
+        # Farthest-point selection: the first landmark is the cell farthest
+        # from an arbitrary seed, each next one the cell farthest from all
+        # landmarks chosen so far
+        unreachable = self.unreachable
+        nearest = self._bfs(seed)
+        for _ in range(min(self.landmark_count, labels.component_sizes[largest])):
+            best, landmark = -1, -1
+            for node, distance in enumerate(nearest):
+                if distance != unreachable and distance > best:
+                    best, landmark = distance, node
+            if best <= 0 and self.landmarks:
+                break
+            table = self._bfs(landmark)
+            self.landmarks.append(landmark)
+            self.tables.append(table)
+            if not self.landmarks[1:]:
+                nearest = table[:]
+            else:
+                nearest = array(self._typecode, map(min, nearest, table))
+
+    def update_cells(self, layout: List[List[int]], cells: Iterable[Tuple[int, int]]):
+        """Any walkability edit can change landmark distances: rebuild every table"""
+        self.rebuild(layout)
+
+    def _bfs(self, source: int) -> array:
+        """Walking distance from source to every padded cell"""
+        stride = self.stride
+        walkable = self.walkable
+        unreachable = self.unreachable
+        distances = array(self._typecode, [unreachable]) * self.size
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            next_distance = distances[node] + 1
+            for neighbor in (node + 1, node + stride, node - 1, node - stride):
+                if walkable[neighbor] and distances[neighbor] == unreachable:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+        return distances
+
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """A* with the landmark heuristic; stops at the first goal reached"""
+        self.expansions = 0
+        if not self.is_walkable(start[0], start[1]):
+            return None
+        goal_cells = [goal for goal in goals if self.is_walkable(goal[0], goal[1])]
+        if not goal_cells:
+            return None
+
+        stride = self.stride
+        size = self.size
+        walkable = self.walkable
+        g_score = self.g_score
+        parent = self.parent
+        seen = self.seen
+        closed = self.closed
+        unreachable = self.unreachable
+        goal_ids = {self.node_id(row, col) for row, col in goal_cells}
+        row_h, col_h = goal_box_tables(goal_cells, self.rows, self.cols, padding=1)
+
+        # Per landmark: the interval of its distances to the goals.  Landmarks
+        # that cannot reach every goal give no bound and are skipped
+        bounds = []
+        for table in self.tables:
+            values = [table[goal] for goal in goal_ids]
+            if unreachable not in values:
+                bounds.append((table, min(values), max(values)))
+
+        def heuristic(node: int, row: int, col: int) -> int:
+            best = row_h[row] + col_h[col]
+            for table, low, high in bounds:
+                distance = table[node]
+                if distance > high:
+                    if distance - high > best:
+                        best = distance - high
+                elif low - distance > best:
+                    best = low - distance
+            return best
+
+        self.generation += 1
+        if self.generation == 0xFFFFFFFF:
+            self.seen = seen = array('I', [0]) * size
+            self.closed = closed = array('I', [0]) * size
+            self.generation = 1
+        generation = self.generation
+
+        start_id = self.node_id(start[0], start[1])
+        g_score[start_id] = 0
+        parent[start_id] = -1
+        seen[start_id] = generation
+        # Heap keys pack (f, -g, node) into one int, as in GridAStar
+        depth = size
+        open_set = [(heuristic(start_id, start[0] + 1, start[1] + 1) * (depth + 1) + depth) * size + start_id]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
+
+        while open_set:
+            node = heappop(open_set) % size
+            if closed[node] == generation:
+                continue
+            if node in goal_ids:
+                self.expansions = expansions
+                return self.cell(node), self._reconstruct(node)
+            closed[node] = generation
+            expansions += 1
+
+            next_g = g_score[node] + 1
+            tie = depth - next_g
+            row, col = divmod(node, stride)
+            for neighbor, neighbor_row, neighbor_col in ((node + 1, row, col + 1), (node + stride, row + 1, col),
+                                                         (node - 1, row, col - 1), (node - stride, row - 1, col)):
+                if walkable[neighbor] and (seen[neighbor] != generation or next_g < g_score[neighbor]):
+                    seen[neighbor] = generation
+                    g_score[neighbor] = next_g
+                    parent[neighbor] = node
+                    h = heuristic(neighbor, neighbor_row, neighbor_col)
+                    heappush(open_set, ((next_g + h) * (depth + 1) + tie) * size + neighbor)
+
+        self.expansions = expansions
+        return None  # No path found
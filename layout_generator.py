@@ -0,0 +1,138 @@
+import random
+from typing import Dict, List, Optional, Tuple
+
+# Cell codes, as in supermarket_layout
+WALKWAY = 0
+SHELF = 1
+WALL_VERTICAL = 3
+WALL_HORIZONTAL = 4
+CORNER_TOP_RIGHT = 5
+CORNER_TOP_LEFT = 6
+CORNER_BOTTOM_LEFT = 7
+CORNER_BOTTOM_RIGHT = 8
+ENTRANCE = 9
+
+# Keyboard keys of the hand-written store, reused for the first generated shelves
+SHELF_KEYS = '1234567890qwertyuiop'
+
+class GeneratedStore:
+    """A generated layout plus its PRODUCT_CATEGORIES-style shelf table.
+
+    cells is one bytearray of rows * cols codes; layout is a list of
+    memoryview rows over it, so layout[row][col] reads (and writes) work
+    like the nested lists of supermarket_layout without a Python int per
+    cell.
+    """
+
+    def __init__(self, cells: bytearray, rows: int, cols: int, categories: Dict[str, Dict],
+                 entrance: Tuple[int, int], seed: int):
+        self.cells = cells
+        self.rows = rows
+        self.cols = cols
+        self.categories = categories
+        self.entrance = entrance  # walkable cell inside the entrance
+        self.seed = seed
+        view = memoryview(cells)
+        self.layout = [view[row * cols:(row + 1) * cols] for row in range(rows)]
+
+    def to_lists(self) -> List[List[int]]:
+        """Plain nested lists (e.g. for JSON); costs one int object per cell"""
+        return [list(row) for row in self.layout]
+
+    def __repr__(self) -> str:
+        return f"GeneratedStore({self.rows}x{self.cols}, shelves={len(self.categories)}, seed={self.seed})"
+
+def generate_store(shelf_rows: int = 5, shelf_cols: int = 4, shelf_length: int = 5, shelf_depth: int = 3,
+                   aisle_width: int = 3, cross_aisle_width: int = 2, margin: int = 2,
+                   obstacles: int = 0, dead_ends: int = 0, seed: int = 0) -> GeneratedStore:
+    """Build a walled store with a shelf_rows x shelf_cols grid of shelves.
+
+    Shelves are shelf_depth rows by shelf_length columns, separated by
+    vertical aisles of aisle_width and horizontal cross aisles of
+    cross_aisle_width, with a walkway of `margin` cells along the walls and
+    a three-cell entrance in the middle of the bottom wall.  The defaults
+    give the same 5 x 4 grid of 5 x 3 shelves as the hand-written store.
+    `obstacles` single-cell pillars are dropped on random walkway cells and
+    `dead_ends` aisle segments between two shelves are walled off at one
+    end.  The same seed always gives the same store.
+    """
+    if min(shelf_rows, shelf_cols, shelf_length, shelf_depth, aisle_width, cross_aisle_width, margin) < 1:
+        raise ValueError("Shelf counts, sizes, aisle widths and margin must be at least 1")
+    rng = random.Random(seed)
+    cols = 2 + 2 * margin + shelf_cols * shelf_length + (shelf_cols - 1) * aisle_width
+    rows = 2 + 2 * margin + shelf_rows * shelf_depth + (shelf_rows - 1) * cross_aisle_width
+
+    # Row templates, copied into place with slice assignment
+    walkway_row = bytes([WALL_VERTICAL]) + bytes(cols - 2) + bytes([WALL_VERTICAL])
+    shelf_row = bytearray(walkway_row)
+    shelf_starts = [1 + margin + index * (shelf_length + aisle_width) for index in range(shelf_cols)]
+    for start in shelf_starts:
+        shelf_row[start:start + shelf_length] = bytes([SHELF]) * shelf_length
+    shelf_row = bytes(shelf_row)
+
+    cells = bytearray(rows * cols)
+    cells[0:cols] = bytes([CORNER_TOP_LEFT]) + bytes([WALL_HORIZONTAL]) * (cols - 2) + bytes([CORNER_TOP_RIGHT])
+    band_starts = [1 + margin + index * (shelf_depth + cross_aisle_width) for index in range(shelf_rows)]
+    shelf_band_rows = set()
+    for start in band_starts:
+        shelf_band_rows.update(range(start, start + shelf_depth))
+    for row in range(1, rows - 1):
+        cells[row * cols:(row + 1) * cols] = shelf_row if row in shelf_band_rows else walkway_row
+    bottom = (rows - 1) * cols
+    cells[bottom:bottom + cols] = (bytes([CORNER_BOTTOM_LEFT]) + bytes([WALL_HORIZONTAL]) * (cols - 2)
+                                   + bytes([CORNER_BOTTOM_RIGHT]))
+
+    # Entrance: three cells through the bottom wall and the walkway above it
+    center = cols // 2
+    for row in (rows - 2, rows - 1):
+        for col in range(center - 1, center + 2):
+            cells[row * cols + col] = ENTRANCE
+    entrance = (rows - 2, center)
+
+    # Dead ends: wall the lower end of an aisle segment between two shelves
+    if shelf_cols > 1:
+        for _ in range(dead_ends):
+            band = rng.choice(band_starts)
+            start = shelf_starts[rng.randrange(shelf_cols - 1)] + shelf_length
+            base = (band + shelf_depth - 1) * cols
+            cells[base + start:base + start + aisle_width] = bytes([WALL_VERTICAL]) * aisle_width
+
+    # Pillars on random walkway cells (never inside the entrance)
+    placed = 0
+    attempts = 0
+    while placed < obstacles and attempts < obstacles * 20:
+        attempts += 1
+        node = rng.randrange(cols, bottom)
+        if cells[node] == WALKWAY:
+            cells[node] = WALL_VERTICAL
+            placed += 1
+
+    categories = {}
+    shelf_id = 0
+    for band in band_starts:
+        for start in shelf_starts:
+            shelf_id += 1
+            categories[f'ke_{shelf_id}'] = {
+                'name': f'Ke {shelf_id}',
+                'key': SHELF_KEYS[shelf_id - 1] if shelf_id <= len(SHELF_KEYS) else str(shelf_id),
+                'shelf_id': shelf_id,
+                'positions': [(row, col) for row in range(band, band + shelf_depth)
+                              for col in range(start, start + shelf_length)],
+                'color': (rng.randrange(64, 256), rng.randrange(64, 256), rng.randrange(64, 256)),
+                'description': f'Ke {shelf_id}: hang tong hop',
+            }
+    return GeneratedStore(cells, rows, cols, categories, entrance, seed)
+
+def generate_store_for_size(rows: int, cols: Optional[int] = None, seed: int = 0, **options) -> GeneratedStore:
+    """Store with about rows x cols cells, using the default shelf and aisle sizes"""
+    cols = rows if cols is None else cols
+    shelf_length = options.get('shelf_length', 5)
+    shelf_depth = options.get('shelf_depth', 3)
+    aisle_width = options.get('aisle_width', 3)
+    cross_aisle_width = options.get('cross_aisle_width', 2)
+    margin = options.get('margin', 2)
+    shelf_rows = max(1, (rows - 2 - 2 * margin + cross_aisle_width) // (shelf_depth + cross_aisle_width))
+    shelf_cols = max(1, (cols - 2 - 2 * margin + aisle_width) // (shelf_length + aisle_width))
+    options.setdefault('obstacles', rows * cols // 200)
+    options.setdefault('dead_ends', shelf_rows * shelf_cols // 20)
+    return generate_store(shelf_rows=shelf_rows, shelf_cols=shelf_cols, seed=seed, **options)
@@ -0,0 +1,466 @@
+"""Store layouts from external files, compiled to a binary cache.
+
+Two source formats are read:
+
+* JSON: {"rows": R, "cols": C, "border": true, "grid": ["6444...5", ...],
+  "regions": [{"rect": [top, left, height, width], "code": 9}, ...],
+  "shelves": {"sua_nuoc": {"rect": [3, 3, 3, 5], "name": ..., "key": "1",
+  "shelf_id": 1, "color": [0, 255, 255], "description": ...}, ...}}.
+  grid (one digit per cell) and border are optional; shelves are
+  rectangles (or "cells": [[row, col], ...] for odd shapes) stamped with
+  code 1.
+* Text: one line of digits per row ('#' comments and spaces ignored);
+  every 4-connected group of shelf cells becomes a shelf ke_1, ke_2, ...
+
+The compiled grid, shelf geometry and access cells are written next to the
+source as <source>.bin and reused while the source's size and mtime are
+unchanged, so repeat loads skip parsing and validation entirely.
+"""
+import json
+import os
+import struct
+from array import array
+from collections import deque
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from layout_generator import (CORNER_BOTTOM_LEFT, CORNER_BOTTOM_RIGHT, CORNER_TOP_LEFT, CORNER_TOP_RIGHT,
+                              SHELF, SHELF_KEYS, WALKWAY, WALL_HORIZONTAL, WALL_VERTICAL)
+
+CELL_CODES = frozenset((0, 1, 3, 4, 5, 6, 7, 8, 9))
+CACHE_MAGIC = b'FBLAYOUT'
+CACHE_VERSION = 1
+# magic, version, source size, source mtime (ns), rows, cols, JSON length
+_CACHE_HEADER = struct.Struct('<8sIQqIII')
+
+class ShelfRect(Sequence):
+    """Row-major cells of a rectangular shelf, without a tuple per cell"""
+
+    __slots__ = ('top', 'left', 'height', 'width')
+
+    def __init__(self, top: int, left: int, height: int, width: int):
+        self.top = top
+        self.left = left
+        self.height = height
+        self.width = width
+
+    def __len__(self) -> int:
+        return self.height * self.width
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("shelf cell index out of range")
+        row, col = divmod(index, self.width)
+        return self.top + row, self.left + col
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for row in range(self.top, self.top + self.height):
+            for col in range(self.left, self.left + self.width):
+                yield row, col
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ShelfRect):
+            return (self.top, self.left, self.height, self.width) == (other.top, other.left, other.height, other.width)
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ShelfRect(top={self.top}, left={self.left}, height={self.height}, width={self.width})"
+
+class LoadedStore:
+    """A layout file compiled to one bytearray plus a PRODUCT_CATEGORIES-style table.
+
+    As with GeneratedStore, layout is a list of memoryview rows over cells.
+    categories is a ShelfTable; each entry also has 'access_points', the
+    walkable cells next to the shelf in get_shelf_access_points order.
+    """
+
+    def __init__(self, cells: bytearray, rows: int, cols: int, categories: "ShelfTable",
+                 source: str, from_cache: bool):
+        self.cells = cells
+        self.rows = rows
+        self.cols = cols
+        self.categories = categories
+        self.source = source
+        self.from_cache = from_cache  # True when the binary cache was used
+        view = memoryview(cells)
+        self.layout = [view[row * cols:(row + 1) * cols] for row in range(rows)]
+
+    def to_lists(self) -> List[List[int]]:
+        return [list(row) for row in self.layout]
+
+    def __repr__(self) -> str:
+        return f"LoadedStore({self.source!r}, {self.rows}x{self.cols}, shelves={len(self.categories)})"
+
+class FlatCells(Sequence):
+    """(row, col) view over a run of flat cell ids (row * cols + col)"""
+
+    __slots__ = ('ids', 'cols')
+
+    def __init__(self, ids: array, cols: int):
+        self.ids = ids
+        self.cols = cols
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [divmod(node, self.cols) for node in self.ids[index]]
+        return divmod(self.ids[index], self.cols)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        cols = self.cols
+        for node in self.ids:
+            yield divmod(node, cols)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (FlatCells, list, tuple)):
+            return len(other) == len(self) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FlatCells({list(self)!r})"
+
+class ShelfTable(Mapping):
+    """PRODUCT_CATEGORIES-style mapping backed by flat arrays.
+
+    Per shelf: geometry holds top, left, height, width (odd shapes store
+    offset, count, -1, -1 into extra), access cells are access_ids between
+    two access_offsets, and the rest (name, key, color, ...) is a JSON blob
+    between two meta_offsets.  Entries become dicts only when looked up, so
+    a store with 100k shelves opens without building 100k dicts.
+    """
+
+    def __init__(self, names: List[str], cols: int, geometry: array, extra: array, access_ids: array,
+                 access_offsets: array, meta: bytes, meta_offsets: array):
+        self.names = names
+        self.cols = cols
+        self.geometry = geometry
+        self.extra = extra
+        self.access_ids = access_ids
+        self.access_offsets = access_offsets
+        self.meta = meta
+        self.meta_offsets = meta_offsets
+        self._index: Optional[Dict[str, int]] = None
+        self._entries: Dict[str, Dict] = {}
+
+    @classmethod
+    def build(cls, shelves, access: List[array], cols: int) -> "ShelfTable":
+        geometry, extra = array('i'), array('i')
+        access_ids, access_offsets = array('i'), array('i', [0])
+        meta, meta_offsets = bytearray(), array('i', [0])
+        for (_, positions, shelf_meta), ids in zip(shelves, access):
+            if isinstance(positions, ShelfRect):
+                geometry.extend((positions.top, positions.left, positions.height, positions.width))
+            else:
+                geometry.extend((len(extra), len(positions), -1, -1))
+                extra.extend(row * cols + col for row, col in positions)
+            access_ids.extend(ids)
+            access_offsets.append(len(access_ids))
+            meta += json.dumps(shelf_meta, separators=(',', ':'), ensure_ascii=False).encode()
+            meta_offsets.append(len(meta))
+        return cls([name for name, _, _ in shelves], cols, geometry, extra, access_ids, access_offsets,
+                   bytes(meta), meta_offsets)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name) -> bool:
+        return self._lookup(name) is not None
+
+    def _lookup(self, name) -> Optional[int]:
+        if self._index is None:
+            self._index = {shelf: index for index, shelf in enumerate(self.names)}
+        return self._index.get(name)
+
+    def __getitem__(self, name: str) -> Dict:
+        entry = self._entries.get(name)
+        if entry is not None:
+            return entry
+        index = self._lookup(name)
+        if index is None:
+            raise KeyError(name)
+        entry = json.loads(self.meta[self.meta_offsets[index]:self.meta_offsets[index + 1]])
+        entry.setdefault('name', name)
+        if 'color' in entry:
+            entry['color'] = tuple(entry['color'])
+        first, second, height, width = self.geometry[index * 4:index * 4 + 4]
+        if height >= 0:
+            entry['positions'] = ShelfRect(first, second, height, width)
+        else:
+            entry['positions'] = FlatCells(self.extra[first:first + second], self.cols)
+        entry['access_points'] = FlatCells(
+            self.access_ids[self.access_offsets[index]:self.access_offsets[index + 1]], self.cols)
+        self._entries[name] = entry
+        return entry
+
+def load_layout(path: str, use_cache: bool = True) -> LoadedStore:
+    """Load a JSON or text layout, through <path>.bin when it is up to date"""
+    stat = os.stat(path)
+    cache_path = path + '.bin'
+    if use_cache:
+        store = _read_cache(cache_path, path, stat)
+        if store is not None:
+            return store
+
+    with open(path, encoding='utf-8') as handle:
+        text = handle.read()
+    if path.endswith('.json'):
+        cells, rows, cols, shelves = _parse_json(json.loads(text), path)
+    else:
+        cells, rows, cols, shelves = _parse_text(text, path)
+    access = [_access_ids(cells, rows, cols, positions) for _, positions, _ in shelves]
+    store = LoadedStore(cells, rows, cols, ShelfTable.build(shelves, access, cols), path, False)
+    if use_cache:
+        try:
+            _write_cache(cache_path, store, stat)
+        except OSError:
+            pass  # read-only directory: parse the source every time
+    return store
+
+def _parse_json(data: Dict, path: str):
+    grid = data.get('grid')
+    rows = data.get('rows', len(grid) if grid else 0)
+    cols = data.get('cols', len(grid[0]) if grid else 0)
+    if rows <= 0 or cols <= 0:
+        raise ValueError(f"{path}: a layout needs rows and cols (or a grid)")
+    cells = bytearray(rows * cols)
+    if grid:
+        if len(grid) != rows:
+            raise ValueError(f"{path}: grid has {len(grid)} rows, expected {rows}")
+        for row, line in enumerate(grid):
+            _put_row(cells, row, cols, line.replace(' ', ''), path)
+    if data.get('border'):
+        _draw_border(cells, rows, cols)
+    for region in data.get('regions', ()):
+        code = region.get('code')
+        if code not in CELL_CODES:
+            raise ValueError(f"{path}: invalid cell code {code!r} in region {region}")
+        for row, col in _checked_rect(region.get('rect'), rows, cols, f"region {region}", path):
+            cells[row * cols + col] = code
+
+    shelves = []
+    owner = {}
+    for name, info in data.get('shelves', {}).items():
+        if 'rect' in info:
+            positions = _checked_rect(info['rect'], rows, cols, f"shelf {name!r}", path)
+        elif 'cells' in info:
+            positions = [tuple(cell) for cell in info['cells']]
+            if not positions or not all(0 <= row < rows and 0 <= col < cols for row, col in positions):
+                raise ValueError(f"{path}: shelf {name!r} has no cells or cells outside the layout")
+        else:
+            raise ValueError(f"{path}: shelf {name!r} needs a rect or cells")
+        for row, col in positions:
+            node = row * cols + col
+            if node in owner:
+                raise ValueError(f"{path}: shelves {owner[node]!r} and {name!r} overlap at {(row, col)}")
+            if cells[node] not in (WALKWAY, SHELF):
+                raise ValueError(f"{path}: shelf {name!r} covers a wall or entrance at {(row, col)}")
+            owner[node] = name
+            cells[node] = SHELF
+        meta = {key: value for key, value in info.items() if key not in ('rect', 'cells')}
+        shelves.append((name, positions, meta))
+    _check_unique(shelves, path)
+    return cells, rows, cols, shelves
+
+def _parse_text(text: str, path: str):
+    lines = [line.split('#', 1)[0].replace(' ', '').replace('\t', '') for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if not lines:
+        raise ValueError(f"{path}: empty layout")
+    rows, cols = len(lines), len(lines[0])
+    cells = bytearray(rows * cols)
+    for row, line in enumerate(lines):
+        _put_row(cells, row, cols, line, path)
+
+    # Shelves are the 4-connected groups of shelf cells, numbered row-major
+    shelves = []
+    seen = bytearray(rows * cols)
+    last_col = cols - 1
+    size = rows * cols
+    for seed in range(size):
+        if cells[seed] != SHELF or seen[seed]:
+            continue
+        seen[seed] = 1
+        group = [seed]
+        queue = deque([seed])
+        while queue:
+            node = queue.popleft()
+            col = node % cols
+            for neighbor, inside in ((node + 1, col < last_col), (node - 1, col > 0),
+                                     (node + cols, node + cols < size), (node - cols, node >= cols)):
+                if inside and cells[neighbor] == SHELF and not seen[neighbor]:
+                    seen[neighbor] = 1
+                    group.append(neighbor)
+                    queue.append(neighbor)
+        group.sort()
+        top, left = divmod(group[0], cols)
+        bottom, right = divmod(group[-1], cols)
+        height, width = bottom - top + 1, right - left + 1
+        if right >= left and len(group) == height * width and all(
+                node == (top + index // width) * cols + left + index % width for index, node in enumerate(group)):
+            positions = ShelfRect(top, left, height, width)
+        else:
+            positions = [divmod(node, cols) for node in group]
+        shelf_id = len(shelves) + 1
+        shelves.append((f'ke_{shelf_id}', positions, {
+            'name': f'Ke {shelf_id}',
+            'key': SHELF_KEYS[shelf_id - 1] if shelf_id <= len(SHELF_KEYS) else str(shelf_id),
+            'shelf_id': shelf_id,
+        }))
+    return cells, rows, cols, shelves
+
+def _put_row(cells: bytearray, row: int, cols: int, line: str, path: str):
+    if len(line) != cols:
+        raise ValueError(f"{path}: row {row} has {len(line)} cells, expected {cols}")
+    if not line.isdigit():
+        raise ValueError(f"{path}: row {row} contains something other than digits")
+    codes = line.encode('ascii').translate(_DIGITS)
+    invalid = set(codes) - CELL_CODES
+    if invalid:
+        raise ValueError(f"{path}: invalid cell code(s) {sorted(invalid)} in row {row}")
+    cells[row * cols:(row + 1) * cols] = codes
+
+_DIGITS = bytes.maketrans(b'0123456789', bytes(range(10)))
+
+def _draw_border(cells: bytearray, rows: int, cols: int):
+    """Walls and corners around the edge, as in layout_generator"""
+    cells[0:cols] = bytes([CORNER_TOP_LEFT]) + bytes([WALL_HORIZONTAL]) * (cols - 2) + bytes([CORNER_TOP_RIGHT])
+    bottom = (rows - 1) * cols
+    cells[bottom:bottom + cols] = (bytes([CORNER_BOTTOM_LEFT]) + bytes([WALL_HORIZONTAL]) * (cols - 2)
+                                   + bytes([CORNER_BOTTOM_RIGHT]))
+    for row in range(1, rows - 1):
+        cells[row * cols] = WALL_VERTICAL
+        cells[row * cols + cols - 1] = WALL_VERTICAL
+
+def _checked_rect(rect, rows: int, cols: int, what: str, path: str) -> ShelfRect:
+    if not isinstance(rect, (list, tuple)) or len(rect) != 4:
+        raise ValueError(f"{path}: {what} needs a rect [top, left, height, width]")
+    top, left, height, width = rect
+    if height < 1 or width < 1 or top < 0 or left < 0 or top + height > rows or left + width > cols:
+        raise ValueError(f"{path}: {what} rect {list(rect)} does not fit the {rows}x{cols} layout")
+    return ShelfRect(top, left, height, width)
+
+def _check_unique(shelves, path: str):
+    for field in ('key', 'shelf_id'):
+        seen = {}
+        for name, _, meta in shelves:
+            value = meta.get(field)
+            if value is not None:
+                if value in seen:
+                    raise ValueError(f"{path}: shelves {seen[value]!r} and {name!r} share {field} {value!r}")
+                seen[value] = name
+
+def _access_ids(cells: bytearray, rows: int, cols: int, positions) -> array:
+    """Walkable neighbours of a shelf, in get_shelf_access_points order"""
+    ids = array('i')
+    seen = set()
+    for row, col in positions:
+        for target_row, target_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= target_row < rows and 0 <= target_col < cols:
+                node = target_row * cols + target_col
+                if node not in seen and cells[node] in (0, 9):
+                    seen.add(node)
+                    ids.append(node)
+    return ids
+
+def _write_cache(cache_path: str, store: LoadedStore, stat: os.stat_result):
+    table = store.categories
+    names = '\n'.join(table.names).encode()
+    arrays = (table.geometry, table.extra, table.access_ids, table.access_offsets, table.meta_offsets)
+    counts = json.dumps({'shelves': len(table), 'names': len(names), 'meta': len(table.meta),
+                         'arrays': [len(values) for values in arrays]}).encode()
+
+    # Written beside the target and renamed, so readers never see a partial file
+    temporary = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(_CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime_ns,
+                                        store.rows, store.cols, len(counts)))
+        handle.write(counts)
+        handle.write(store.cells)
+        handle.write(names)
+        handle.write(table.meta)
+        for values in arrays:
+            handle.write(values.tobytes())
+    os.replace(temporary, cache_path)
+
+def _read_cache(cache_path: str, path: str, stat: os.stat_result) -> Optional[LoadedStore]:
+    """The cached store, or None when the cache is missing, stale or damaged"""
+    try:
+        with open(cache_path, 'rb') as handle:
+            data = handle.read()
+        magic, version, size, mtime, rows, cols, counts_length = _CACHE_HEADER.unpack_from(data, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or size != stat.st_size or mtime != stat.st_mtime_ns:
+            return None
+        return _decode_cache(memoryview(data), path, rows, cols, counts_length)
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        # Truncated or corrupt files (a crash mid-copy, a disk error) are a
+        # cache miss too: the source is parsed again and the cache rewritten
+        return None
+
+def _decode_cache(view: memoryview, path: str, rows: int, cols: int, counts_length: int) -> LoadedStore:
+    offset = _CACHE_HEADER.size
+
+    def take(length: int) -> memoryview:
+        nonlocal offset
+        if length < 0 or offset + length > len(view):
+            raise ValueError(f"{path}.bin: truncated cache")
+        section = view[offset:offset + length]
+        offset += length
+        return section
+
+    counts = json.loads(take(counts_length).tobytes())
+    shelves = counts['shelves']
+    cells = bytearray(take(rows * cols))
+    names = take(counts['names']).tobytes().decode().split('\n') if shelves else []
+    meta = take(counts['meta']).tobytes()
+    arrays = []
+    for count in counts['arrays']:
+        values = array('i')
+        values.frombytes(take(count * values.itemsize))
+        arrays.append(values)
+    if offset != len(view) or len(arrays) != 5:
+        raise ValueError(f"{path}.bin: unexpected cache size")
+    geometry, extra, access_ids, access_offsets, meta_offsets = arrays
+    if (len(names) != shelves or len(geometry) != 4 * shelves or len(access_offsets) != shelves + 1
+            or len(meta_offsets) != shelves + 1 or access_offsets[-1] != len(access_ids)
+            or meta_offsets[-1] != len(meta)):
+        raise ValueError(f"{path}.bin: inconsistent shelf table")
+    table = ShelfTable(names, cols, geometry, extra, access_ids, access_offsets, meta, meta_offsets)
+    return LoadedStore(cells, rows, cols, table, path, True)
+
+def dump_layout(path: str, layout: List[List[int]], categories: Dict[str, Dict]):
+    """Write a layout and its shelf table in the JSON format above.
+
+    Rectangular shelves become rects, other shapes cell lists; the grid is
+    written with shelf cells as walkway since the shelves stamp them.
+    """
+    rows = len(layout)
+    cols = len(layout[0]) if layout else 0
+    shelf_cells = set()
+    shelves = {}
+    for name, info in categories.items():
+        positions = sorted(tuple(cell) for cell in info['positions'])
+        shelf_cells.update(positions)
+        (top, left), (bottom, right) = positions[0], positions[-1]
+        entry = {key: value for key, value in info.items() if key not in ('positions', 'access_points')}
+        if len(positions) == (bottom - top + 1) * (right - left + 1) and all(
+                left <= col <= right for _, col in positions):
+            entry['rect'] = [top, left, bottom - top + 1, right - left + 1]
+        else:
+            entry['cells'] = [list(cell) for cell in positions]
+        shelves[name] = entry
+    grid = [''.join(str(WALKWAY if (row, col) in shelf_cells else cell) for col, cell in enumerate(line))
+            for row, line in enumerate(layout)]
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'rows': rows, 'cols': cols, 'grid': grid, 'shelves': shelves}, handle, indent=1,
+                  ensure_ascii=False)
@@ -0,0 +1,92 @@
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class PathRecord:
+    """One successful route query; the full path is not kept"""
+    __slots__ = ('start', 'goal', 'length')
+
+    def __init__(self, start: Tuple[int, int], goal: Tuple[int, int], length: int):
+        self.start = start
+        self.goal = goal
+        self.length = length  # number of cells, including start and goal
+
+    def __getitem__(self, key: str):
+        # Dict-style access keeps old record['length'] callers working
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __repr__(self) -> str:
+        return f"PathRecord(start={self.start}, goal={self.goal}, length={self.length})"
+
+class PathHistory:
+    """Fixed-capacity ring buffer of recent routes plus lifetime aggregates.
+
+    Only the last `capacity` records are kept; the aggregates (query count,
+    length histogram for mean/percentiles, per-target frequency) cover every
+    query since the last clear() and take memory proportional to the number
+    of distinct lengths and targets, not to the number of queries.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self._records: deque = deque(maxlen=capacity)
+        self.count = 0
+        self._total_length = 0
+        self._length_counts: Counter = Counter()
+        self.target_counts: Counter = Counter()
+
+    @property
+    def capacity(self) -> int:
+        return self._records.maxlen
+
+    def append(self, start: Tuple[int, int], goal: Tuple[int, int], length: int):
+        self._records.append(PathRecord(start, goal, length))
+        self.count += 1
+        self._total_length += length
+        self._length_counts[length] += 1
+        self.target_counts[goal] += 1
+
+    def clear(self):
+        self._records.clear()
+        self.count = 0
+        self._total_length = 0
+        self._length_counts.clear()
+        self.target_counts.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[PathRecord]:
+        return iter(self._records)
+
+    def __getitem__(self, index: int) -> PathRecord:
+        return self._records[index]
+
+    def mean_length(self) -> float:
+        return self._total_length / self.count if self.count else 0.0
+
+    def percentile_length(self, percent: float) -> Optional[int]:
+        """Nearest-rank percentile of route length over all recorded queries"""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for length in sorted(self._length_counts):
+            seen += self._length_counts[length]
+            if seen >= rank:
+                return length
+        return max(self._length_counts)
+
+    def most_common_targets(self, n: int = 5) -> List[Tuple[Tuple[int, int], int]]:
+        return self.target_counts.most_common(n)
+
+    def summary(self) -> Dict[str, object]:
+        """Aggregates for UI panels and benchmarks"""
+        return {
+            'queries': self.count,
+            'mean_length': self.mean_length(),
+            'p50_length': self.percentile_length(50),
+            'p95_length': self.percentile_length(95),
+            'top_targets': self.most_common_targets(),
+        }
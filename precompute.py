@@ -0,0 +1,240 @@
+"""Offline precompute of routing tables, memory-mapped at startup.
+
+Builds, in parallel across processes, everything that is otherwise
+recomputed from the layout at every start: component labels
+(ReachabilityIndex), one BFS distance field per shelf (FlowFieldRouter),
+the ALT landmark tables (LandmarkAStar) and the shelf-to-shelf distance
+matrix.  They are written to one versioned binary file keyed by a hash of
+the layout; at startup the file is mapped read-only with mmap and the
+tables are memoryviews over it, so nothing is rebuilt and several kiosk
+processes share the same pages.
+
+    python precompute.py                       # supermarket_layout -> findbot_<hash>.bin
+    python precompute.py --size 512 --workers 8
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flow_field import FlowFieldRouter
+from landmarks import LandmarkAStar
+from reachability import ReachabilityIndex
+
+MAGIC = b'FBPRECMP'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sII')  # magic, format version, JSON index length
+_ALIGN = 8
+
+def layout_hash(layout: List[List[int]]) -> str:
+    """SHA-256 of the layout size and cell codes"""
+    rows = len(layout)
+    cols = len(layout[0]) if layout else 0
+    digest = hashlib.sha256(f'{rows}x{cols}:'.encode())
+    for row in layout:
+        digest.update(bytes(row))
+    return digest.hexdigest()
+
+def default_path(layout: List[List[int]], directory: str = '.') -> str:
+    return os.path.join(directory, f'findbot_{layout_hash(layout)[:16]}.bin')
+
+def _layout_bytes(layout: List[List[int]]) -> bytes:
+    return b''.join(bytes(row) for row in layout)
+
+# Worker side: the layout and shelf targets arrive once through the pool initializer
+_router: Optional[FlowFieldRouter] = None
+_targets: Dict[str, Tuple[Tuple[int, int], ...]] = {}
+_layout: List = []
+
+def _init_worker(cells: bytes, rows: int, cols: int, targets: Dict[str, Tuple[Tuple[int, int], ...]]):
+    global _router, _targets, _layout
+    view = memoryview(cells)
+    _layout = [view[row * cols:(row + 1) * cols] for row in range(rows)]
+    _router = FlowFieldRouter(_layout)
+    _targets = targets
+
+def _field_task(name: str):
+    """One shelf's distance field plus its row of the shelf matrix"""
+    field = _router.build_field(_targets[name])
+    cols, unreachable = _router.cols, _router.unreachable
+    row = array('i')
+    for goals in _targets.values():
+        distances = [field[r * cols + c] for r, c in goals]
+        distances = [distance for distance in distances if distance != unreachable]
+        row.append(min(distances) if distances else -1)
+    return name, field.typecode, field.tobytes(), row.tobytes()
+
+def _landmark_task(count: int):
+    engine = LandmarkAStar(_layout, count)
+    return engine.landmarks, engine._typecode, [table.tobytes() for table in engine.tables]
+
+def _labels_task():
+    index = ReachabilityIndex(_layout)
+    return index.labels.tobytes(), index.component_sizes
+
+def build_precomputed(layout: List[List[int]], categories: Dict[str, Dict], path: Optional[str] = None,
+                      workers: Optional[int] = None, landmark_count: int = 8) -> str:
+    """Compute every table with a process pool and write the file; returns its path"""
+    from enhanced_pathfinding import EnhancedPathFinder
+
+    rows = len(layout)
+    cols = len(layout[0]) if layout else 0
+    path = path or default_path(layout)
+    finder = EnhancedPathFinder(layout)
+    targets = {name: tuple(finder.get_shelf_access_points(info['positions'])) for name, info in categories.items()}
+    workers = workers or os.cpu_count() or 1
+
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(_layout_bytes(layout), rows, cols, targets)) as pool:
+        # The landmark pass is the longest single task: start it first
+        landmark_job = pool.apply_async(_landmark_task, (landmark_count,))
+        labels_job = pool.apply_async(_labels_task)
+        fields = {name: (typecode, data, matrix_row)
+                  for name, typecode, data, matrix_row in pool.imap_unordered(_field_task, list(targets))}
+        landmarks, landmark_typecode, landmark_tables = landmark_job.get()
+        labels, component_sizes = labels_job.get()
+
+    sections: List[Tuple[str, str, bytes]] = [('labels', 'i', labels)]
+    names = list(targets)
+    sections += [(f'field/{name}', fields[name][0], fields[name][1]) for name in names]
+    sections += [(f'landmark/{index}', landmark_typecode, table) for index, table in enumerate(landmark_tables)]
+    sections.append(('shelf_matrix', 'i', b''.join(fields[name][2] for name in names)))
+
+    index = {
+        'layout_hash': layout_hash(layout),
+        'rows': rows,
+        'cols': cols,
+        'byteorder': sys.byteorder,
+        'itemsizes': {typecode: array(typecode).itemsize for typecode in 'Hi'},
+        'component_sizes': component_sizes,
+        'landmarks': landmarks,
+        'shelves': names,
+        'shelf_targets': {name: [list(cell) for cell in targets[name]] for name in names},
+        'sections': {},
+    }
+    offset = 0
+    for name, typecode, data in sections:
+        index['sections'][name] = [typecode, offset, len(data) // array(typecode).itemsize]
+        offset += -(-len(data) // _ALIGN) * _ALIGN
+    header = json.dumps(index, separators=(',', ':')).encode()
+
+    # Write next to the target and rename, so readers never map a partial file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+        handle.write(header)
+        handle.write(bytes(-handle.tell() % _ALIGN))
+        for _, _, data in sections:
+            handle.write(data)
+            handle.write(bytes(-len(data) % _ALIGN))
+    os.replace(temporary, path)
+    return path
+
+class PrecomputedTables:
+    """Read-only view of a precompute file.
+
+    Every table is a memoryview cast over one shared mmap, indexable like the
+    array it was written from: labels, fields[shelf], landmark_tables[i] and
+    shelf_matrix (row-major, len(shelves) squared, -1 = unreachable).
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} precompute file")
+        index = json.loads(self._mmap[_HEADER.size:_HEADER.size + header_length])
+        if index['byteorder'] != sys.byteorder or any(array(typecode).itemsize != size
+                                                      for typecode, size in index['itemsizes'].items()):
+            raise ValueError(f"{path} was built on a platform with another byte order or item size")
+
+        self.path = path
+        self.layout_hash: str = index['layout_hash']
+        self.rows: int = index['rows']
+        self.cols: int = index['cols']
+        self.component_sizes: List[int] = index['component_sizes']
+        self.landmarks: List[int] = index['landmarks']
+        self.shelves: List[str] = index['shelves']
+        self.shelf_targets = {name: [tuple(cell) for cell in cells] for name, cells in index['shelf_targets'].items()}
+
+        data_start = _HEADER.size + header_length
+        data_start += -data_start % _ALIGN
+        view = memoryview(self._mmap)
+        tables = {}
+        for name, (typecode, offset, count) in index['sections'].items():
+            start = data_start + offset
+            end = start + count * array(typecode).itemsize
+            if offset < 0 or count < 0 or end > len(view):
+                raise ValueError(f"{path}: section {name} runs past the end of the file")
+            tables[name] = view[start:end].cast(typecode)
+        self.labels = tables['labels']
+        self.fields = {name: tables[f'field/{name}'] for name in self.shelves}
+        self.landmark_tables = [tables[f'landmark/{index}'] for index in range(len(self.landmarks))]
+        self.shelf_matrix = tables['shelf_matrix']
+
+        # A short table would only fail on the first query that reads past it
+        cells = self.rows * self.cols
+        padded = (self.rows + 2) * (self.cols + 2)
+        if (len(self.labels) != cells or any(len(field) != cells for field in self.fields.values())
+                or any(len(table) != padded for table in self.landmark_tables)
+                or len(self.shelf_matrix) != len(self.shelves) ** 2):
+            raise ValueError(f"{path}: table sizes do not match the {self.rows}x{self.cols} layout")
+        self._shelf_index = {name: index for index, name in enumerate(self.shelves)}
+
+    def matches(self, layout: List[List[int]]) -> bool:
+        return layout_hash(layout) == self.layout_hash
+
+    def reachability(self) -> ReachabilityIndex:
+        return ReachabilityIndex.from_labels(self.rows, self.cols, self.labels, self.component_sizes)
+
+    def shelf_distance(self, first: str, second: str) -> Optional[int]:
+        """Steps between the nearest access cells of two shelves"""
+        distance = self.shelf_matrix[self._shelf_index[first] * len(self.shelves) + self._shelf_index[second]]
+        return None if distance < 0 else distance
+
+def load_precomputed(layout: List[List[int]], path: Optional[str] = None) -> Optional[PrecomputedTables]:
+    """Map the precompute file for this layout; None if it is missing, stale or damaged"""
+    path = path or default_path(layout)
+    if not os.path.exists(path):
+        return None
+    try:
+        tables = PrecomputedTables(path)
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        # A truncated or corrupt file is a miss: the finder builds its tables itself
+        return None
+    return tables if tables.matches(layout) else None
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='file to write (default: findbot_<layout hash>.bin)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--landmarks', type=int, default=8, help='ALT landmark count')
+    parser.add_argument('--size', type=int, help='use a generated store of about this side length')
+    args = parser.parse_args(argv)
+
+    if args.size:
+        from layout_generator import generate_store_for_size
+        store = generate_store_for_size(args.size)
+        layout, categories = store.layout, store.categories
+    else:
+        from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+        layout, categories = supermarket_layout, PRODUCT_CATEGORIES
+
+    began = time.perf_counter()
+    path = build_precomputed(layout, categories, args.output, args.workers, args.landmarks)
+    print(f"built {path} ({os.path.getsize(path) / 1024:.1f} KiB) in {time.perf_counter() - began:.2f} s")
+    began = time.perf_counter()
+    load_precomputed(layout, path)
+    print(f"mapped in {(time.perf_counter() - began) * 1000:.2f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+from grid_common import WALKABLE_CODES, compile_walkable
+
+class ReachabilityIndex:
+    """Connected-component labels over walkable cells (0 and 9).
+
+    labels[row * cols + col] is the component id of a walkable cell and -1
+    for anything else, so "can B be reached from A" is two array reads.
+    update_cells() keeps the labels current after edits without a full
+    relabel; ids of components merged away keep a size of 0.
+    """
+
+    def __init__(self, layout: List[List[int]]):
+        self.rebuild(layout)
+
+    @classmethod
+    def from_labels(cls, rows: int, cols: int, labels, component_sizes: List[int]) -> "ReachabilityIndex":
+        """Wrap labels computed elsewhere (e.g. a precompute file) without relabelling"""
+        index = cls.__new__(cls)
+        index.rows = rows
+        index.cols = cols
+        index.labels = labels
+        index.component_sizes = list(component_sizes)
+        return index
+
+    def rebuild(self, layout: List[List[int]]):
+        """Relabel every component (call after layout edits)"""
+        self.rows = len(layout)
+        self.cols = len(layout[0]) if layout else 0
+        cols = self.cols
+        size = self.rows * cols
+        labels = array('i', [-1]) * size
+        walkable = compile_walkable(layout)
+
+        sizes = []
+        last_col = cols - 1
+        for seed in range(size):
+            if not walkable[seed] or labels[seed] != -1:
+                continue
+            component = len(sizes)
+            labels[seed] = component
+            queue = deque([seed])
+            count = 0
+            while queue:
+                node = queue.popleft()
+                count += 1
+                col = node % cols
+                for neighbor, inside in ((node + 1, col < last_col), (node - 1, col > 0),
+                                         (node + cols, node + cols < size), (node - cols, node >= cols)):
+                    if inside and walkable[neighbor] and labels[neighbor] == -1:
+                        labels[neighbor] = component
+                        queue.append(neighbor)
+            sizes.append(count)
+
+        self.labels = labels
+        self.component_sizes = sizes
+
+    def update_cells(self, layout: List[List[int]], cells: Iterable[Tuple[int, int]]):
+        """Relabel only around edited cells.
+
+        An opened cell joins its neighbours' components (the smaller ones are
+        relabelled into the largest); a blocked cell can split its component,
+        which is detected by growing one BFS per neighbour in turn until they
+        meet, so only pieces that really broke off are relabelled.
+        """
+        if len(layout) != self.rows or (layout and len(layout[0]) != self.cols):
+            self.rebuild(layout)
+            return
+        if not isinstance(self.labels, array):
+            self.labels = array('i', self.labels)  # e.g. a read-only precompute mapping
+        cols = self.cols
+        for row, col in cells:
+            node = row * cols + col
+            walkable = layout[row][col] in WALKABLE_CODES
+            if walkable and self.labels[node] == -1:
+                self._open(node)
+            elif not walkable and self.labels[node] != -1:
+                self._block(node)
+
+    def _neighbors(self, node: int) -> List[int]:
+        cols = self.cols
+        col = node % cols
+        return [neighbor for neighbor, inside in ((node + 1, col < cols - 1), (node - 1, col > 0),
+                                                  (node + cols, node + cols < len(self.labels)),
+                                                  (node - cols, node >= cols))
+                if inside]
+
+    def _open(self, node: int):
+        labels, sizes = self.labels, self.component_sizes
+        touching = {}
+        for neighbor in self._neighbors(node):
+            if labels[neighbor] != -1:
+                touching.setdefault(labels[neighbor], neighbor)
+        if not touching:
+            labels[node] = len(sizes)
+            sizes.append(1)
+            return
+        largest = max(touching, key=sizes.__getitem__)
+        labels[node] = largest
+        sizes[largest] += 1
+        for component, seed in touching.items():
+            if component != largest:
+                sizes[largest] += self._relabel(seed, component, largest)
+                sizes[component] = 0
+
+    def _relabel(self, seed: int, old: int, new: int) -> int:
+        """Flood one component from seed with a new id; returns its size"""
+        labels = self.labels
+        labels[seed] = new
+        queue = deque([seed])
+        count = 0
+        while queue:
+            node = queue.popleft()
+            count += 1
+            for neighbor in self._neighbors(node):
+                if labels[neighbor] == old:
+                    labels[neighbor] = new
+                    queue.append(neighbor)
+        return count
+
+    def _block(self, node: int):
+        labels, sizes = self.labels, self.component_sizes
+        component = labels[node]
+        labels[node] = -1
+        sizes[component] -= 1
+        starts = [neighbor for neighbor in self._neighbors(node) if labels[neighbor] == component]
+        if len(starts) < 2:
+            return  # nothing to split
+
+        # One BFS per neighbour, advanced one cell at a time in turn.  Searches
+        # that touch are unioned; a group whose queues all run dry before the
+        # others reach it is a separate piece and gets a new id
+        group = list(range(len(starts)))
+
+        def find(index: int) -> int:
+            while group[index] != index:
+                group[index] = group[group[index]]
+                index = group[index]
+            return index
+
+        owner = {start: index for index, start in enumerate(starts)}
+        queues = [deque([start]) for start in starts]
+        members: List[List[int]] = [[start] for start in starts]
+        live = set(range(len(starts)))
+        while len({find(index) for index in live}) > 1:
+            for index in list(live):
+                queue = queues[index]
+                if queue:
+                    current = queue.popleft()
+                    for neighbor in self._neighbors(current):
+                        if labels[neighbor] != component:
+                            continue
+                        other = owner.get(neighbor)
+                        if other is None:
+                            owner[neighbor] = index
+                            queue.append(neighbor)
+                            members[index].append(neighbor)
+                        elif find(other) != find(index):
+                            group[find(other)] = find(index)
+            for root in {find(index) for index in live}:
+                searches = [index for index in live if find(index) == root]
+                if not any(queues[index] for index in searches):
+                    new = len(sizes)
+                    count = 0
+                    for index in searches:
+                        for cell in members[index]:
+                            labels[cell] = new
+                        count += len(members[index])
+                        live.discard(index)
+                    sizes.append(count)
+                    sizes[component] -= count
+
+    def component_of(self, pos: Tuple[int, int]) -> int:
+        """Component id of a cell, or -1 if it is not walkable / off the map"""
+        row, col = pos
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.labels[row * self.cols + col]
+        return -1
+
+    def is_reachable(self, start: Tuple[int, int], goal: Tuple[int, int]) -> bool:
+        component = self.component_of(start)
+        return component != -1 and component == self.component_of(goal)
+
+    def component_size(self, pos: Tuple[int, int]) -> Optional[int]:
+        component = self.component_of(pos)
+        return self.component_sizes[component] if component != -1 else None
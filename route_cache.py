@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Dict, Hashable
+
+class RouteCache:
+    """Bounded LRU cache of route results.
+
+    Entries are capped both by count and by the total number of path cells
+    they hold, so long-running kiosks keep a fixed memory ceiling.  Callers
+    build the key; EnhancedPathFinder uses (start, frozenset(goals),
+    layout_version, cost_version), plus ('turns', turn_penalty) for
+    find_path_min_turns routes, so neither a layout edit nor a cost change
+    can serve a stale route.
+    """
+
+    def __init__(self, capacity: int = 256, max_cells: int = 200_000):
+        self.capacity = capacity
+        self.max_cells = max_cells
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._cells = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value and mark it most recently used"""
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value, cells: int = 0):
+        """Store a value; cells is its size used for the memory cap"""
+        if self.capacity <= 0 or cells > self.max_cells:
+            return
+        if key in self._entries:
+            self._cells -= self._entries.pop(key)[1]
+        self._entries[key] = (value, cells)
+        self._cells += cells
+        while len(self._entries) > self.capacity or self._cells > self.max_cells:
+            _, (_, evicted_cells) = self._entries.popitem(last=False)
+            self._cells -= evicted_cells
+
+    def clear(self):
+        self._entries.clear()
+        self._cells = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current occupancy"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'cells': self._cells,
+        }
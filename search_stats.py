@@ -0,0 +1,88 @@
+import heapq
+from typing import Dict, List, Optional
+
+class SearchStats:
+    """Counters for one route query (EnhancedPathFinder with collect_stats=True).
+
+    expanded counts the cells whose neighbours were generated; stale_pops
+    counts heap entries that were outdated when popped (the cell had been
+    reached more cheaply after the entry was pushed).  Engines that keep no
+    counters of their own only report expanded (if they expose an
+    `expansions` attribute) and wall_time.
+    """
+
+    __slots__ = ('engine', 'expanded', 'pushes', 'pops', 'stale_pops', 'peak_open', 'wall_time', 'found', 'cached')
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.expanded: Optional[int] = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.peak_open = 0
+        self.wall_time = 0.0   # seconds
+        self.found = False
+        self.cached = False    # served from the route cache, no search ran
+
+    # Drop-in replacements for heapq.heappush/heappop used by instrumented loops
+    def push(self, heap: List, item):
+        heapq.heappush(heap, item)
+        self.pushes += 1
+        if len(heap) > self.peak_open:
+            self.peak_open = len(heap)
+
+    def pop(self, heap: List):
+        self.pops += 1
+        return heapq.heappop(heap)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"SearchStats(engine={self.engine!r}, expanded={self.expanded}, pushes={self.pushes}, "
+                f"stale_pops={self.stale_pops}, peak_open={self.peak_open}, "
+                f"wall_time={self.wall_time * 1000:.3f} ms, cached={self.cached})")
+
+class SearchStatsTotals:
+    """Lifetime aggregates over every SearchStats recorded by a finder"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.searches = 0
+        self.cache_hits = 0
+        self.found = 0
+        self.expanded = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.peak_open = 0
+        self.wall_time = 0.0
+
+    def record(self, stats: SearchStats):
+        self.searches += 1
+        self.found += stats.found
+        self.wall_time += stats.wall_time
+        if stats.cached:
+            self.cache_hits += 1
+            return
+        self.expanded += stats.expanded or 0
+        self.pushes += stats.pushes
+        self.stale_pops += stats.stale_pops
+        if stats.peak_open > self.peak_open:
+            self.peak_open = stats.peak_open
+
+    def summary(self) -> Dict[str, float]:
+        searched = self.searches - self.cache_hits
+        return {
+            'searches': self.searches,
+            'cache_hits': self.cache_hits,
+            'found': self.found,
+            'expanded': self.expanded,
+            'pushes': self.pushes,
+            'stale_pops': self.stale_pops,
+            'peak_open': self.peak_open,
+            'wall_time': self.wall_time,
+            'mean_expanded': self.expanded / searched if searched else 0.0,
+            'mean_wall_time': self.wall_time / self.searches if self.searches else 0.0,
+        }
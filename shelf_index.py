@@ -0,0 +1,98 @@
+from array import array
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from grid_common import compile_walkable
+
+class ShelfIndex:
+    """Lookup tables over a PRODUCT_CATEGORIES-style mapping and its layout.
+
+    Built in one pass over the shelves, so every lookup is a dict read or an
+    array read instead of a scan of the categories:
+
+    * by_key / by_shelf_id: keyboard key or shelf_id -> category name
+    * cell_shelf: array over rows * cols with the shelf_id on each shelf
+      cell and 0 elsewhere ('H' while shelf ids fit, 'I' beyond)
+    * access cells: the deduplicated walkable neighbours of every shelf, in
+      get_shelf_access_points order, as one flat id array plus offsets
+
+    Per shelf this costs a few array slots plus its access cells (4 bytes
+    each), so tens of thousands of shelves stay small.  Access cells depend
+    on walkability: rebuild after layout edits.
+    """
+
+    def __init__(self, layout: List[List[int]], categories: Dict[Hashable, Dict]):
+        self.rows = len(layout)
+        self.cols = len(layout[0]) if layout else 0
+        rows, cols = self.rows, self.cols
+        self.names: List[Hashable] = list(categories)
+        self.by_key: Dict[str, Hashable] = {}
+        self.by_shelf_id: Dict[int, Hashable] = {}
+        self._slot: Dict[Hashable, int] = {}
+
+        shelf_ids = [info.get('shelf_id', slot + 1) for slot, info in enumerate(categories.values())]
+        self.cell_shelf = array('H' if max(shelf_ids, default=0) < 0xFFFF else 'I', [0]) * (rows * cols)
+        self.centers = array('i')
+        self.access_ids = array('i')
+        self.access_offsets = array('I', [0])
+
+        cell_shelf = self.cell_shelf
+        access_ids = self.access_ids
+        walkable = compile_walkable(layout)
+        for slot, (name, info) in enumerate(categories.items()):
+            self._slot[name] = slot
+            if info.get('key') is not None:
+                self.by_key.setdefault(info['key'], name)
+            self.by_shelf_id.setdefault(shelf_ids[slot], name)
+            positions = info['positions']
+
+            # Same middle cell as the old get_shelf_center
+            self.centers.append(self._node(positions[len(positions) // 2]) if len(positions) else -1)
+            seen = set()
+            for row, col in positions:
+                if 0 <= row < rows and 0 <= col < cols:
+                    cell_shelf[row * cols + col] = shelf_ids[slot]
+                for target_row, target_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                    if 0 <= target_row < rows and 0 <= target_col < cols:
+                        node = target_row * cols + target_col
+                        if walkable[node] and node not in seen:
+                            seen.add(node)
+                            access_ids.append(node)
+            self.access_offsets.append(len(access_ids))
+
+    def _node(self, cell: Tuple[int, int]) -> int:
+        return cell[0] * self.cols + cell[1]
+
+    def category_by_key(self, key: str) -> Optional[Hashable]:
+        return self.by_key.get(key)
+
+    def category_by_shelf_id(self, shelf_id: int) -> Optional[Hashable]:
+        return self.by_shelf_id.get(shelf_id)
+
+    def shelf_at(self, row: int, col: int) -> Optional[int]:
+        """shelf_id of the shelf covering a cell, or None"""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.cell_shelf[row * self.cols + col] or None
+        return None
+
+    def category_at(self, row: int, col: int) -> Optional[Hashable]:
+        shelf_id = self.shelf_at(row, col)
+        return None if shelf_id is None else self.by_shelf_id.get(shelf_id)
+
+    def shelf_center(self, shelf_id: int) -> Optional[Tuple[int, int]]:
+        name = self.by_shelf_id.get(shelf_id)
+        if name is None:
+            return None
+        node = self.centers[self._slot[name]]
+        return None if node < 0 else divmod(node, self.cols)
+
+    def access_points(self, category: Hashable) -> List[Tuple[int, int]]:
+        """Walkable cells next to a category's shelf (KeyError if unknown)"""
+        slot = self._slot[category]
+        cols = self.cols
+        return [divmod(node, cols) for node in self.access_ids[self.access_offsets[slot]:self.access_offsets[slot + 1]]]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"ShelfIndex({self.rows}x{self.cols}, shelves={len(self.names)})"
@@ -0,0 +1,314 @@
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from jump_point_search import JumpPointSearch
+from supermarket_board import PRODUCT_CATEGORIES
+
+class ShoppingRoute:
+    """Result of planning a multi-shelf trip"""
+
+    def __init__(self, order: List[str], stops: List[Tuple[int, int]], path: List[Tuple[int, int]],
+                 distance: int, exact: bool, unreachable: List[str]):
+        self.order = order              # categories in visiting order
+        self.stops = stops              # access cell used for each category
+        self.path = path                # stitched cell path start -> stops -> end
+        self.distance = distance        # number of steps
+        self.exact = exact              # True when the route is provably the shortest
+        self.unreachable = unreachable  # requested categories that cannot be reached
+
+    def __repr__(self) -> str:
+        return f"ShoppingRoute(order={self.order}, distance={self.distance}, exact={self.exact})"
+
+class ShoppingRoutePlanner:
+    """Plans the shortest trip through a shopping list.
+
+    A shelf can be visited from any of its access cells, and the best cell
+    depends on where the trip comes from and goes next, so the search runs
+    over (shelf, access cell) states.  Distances come from multi-source BFS
+    passes in which every source cell starts at its own offset: one pass
+    turns the best cost of a set of states into the best cost of reaching
+    every other cell.
+
+    Lists of up to exact_limit shelves are solved exactly with Held-Karp
+    over (visited shelves, access cell), one pass per visited set, when the
+    passes fit in the time budget.  Otherwise the order comes from
+    nearest-neighbour plus 2-opt/Or-opt on shelf-to-shelf distances, and the
+    access cells are then chosen optimally for that order.  time_budget
+    bounds all of the planning: shelf distances that do not fit fall back to
+    the Manhattan gap between the shelves' access cells, and cells that do
+    not fit are picked greedily.  The cell path is stitched afterwards with
+    one Jump Point Search per leg, which is not part of the budget.
+    """
+
+    def __init__(self, finder, categories: Optional[Dict[str, Dict]] = None, exact_limit: int = 10):
+        self.finder = finder
+        self.categories = categories if categories is not None else PRODUCT_CATEGORIES
+        self.exact_limit = exact_limit
+        self._legs: Optional[JumpPointSearch] = None
+        self._layout_version = None
+
+    def _refresh(self):
+        if self._legs is None or self._layout_version != self.finder.layout_version:
+            # The leg engine's padded bitmap also serves the BFS passes
+            self._legs = JumpPointSearch(self.finder.layout)
+            self._layout_version = self.finder.layout_version
+
+    def plan(self, categories: Sequence[str], start: Tuple[int, int], end: Tuple[int, int],
+             time_budget: float = 0.05) -> Optional[ShoppingRoute]:
+        """Plan start -> every category -> end; None if start or end is unreachable.
+
+        end may be a non-walkable marker such as an exit in the wall; the trip
+        then ends on whichever walkable neighbour of it is best.
+        """
+        deadline = time.perf_counter() + time_budget
+        self._refresh()
+        finder = self.finder
+        reachability = finder.reachability
+        component = reachability.component_of(start)
+        end_cells = [end] if finder.is_walkable(end[0], end[1]) else finder.get_shelf_access_points([end])
+        end_cells = [cell for cell in end_cells if reachability.component_of(cell) == component]
+        if component == -1 or not end_cells:
+            return None
+
+        names, groups, unreachable = [], [], []
+        for category in categories:
+            if category not in self.categories or category in names or category in unreachable:
+                continue
+            cells = [cell for cell in finder.get_shelf_access_points(self.categories[category]['positions'])
+                     if reachability.component_of(cell) == component]
+            if cells:
+                names.append(category)
+                groups.append(cells)
+            else:
+                unreachable.append(category)
+
+        node = self._legs.node_id
+        start_id = node(*start)
+        stops = [[node(*cell) for cell in cells] for cells in groups]
+        end_ids = [node(*cell) for cell in end_cells]
+        visits = None
+        if len(stops) <= self.exact_limit:
+            visits = self._plan_exact(start_id, stops, end_ids, deadline)
+        exact = visits is not None
+        if visits is None:
+            visits = self._plan_heuristic(start_id, stops, end_ids, deadline)
+
+        # Stitch the legs; a visit without a chosen cell goes to the nearest one
+        legs = self._legs
+        path = [start]
+        order, stop_cells = [], []
+        current = start
+        for indices, cell in visits:
+            goals = [legs.cell(cell)] if cell is not None else groups[indices[0]]
+            current, leg = legs.find_path_to_any(current, goals)
+            path.extend(leg[1:])
+            for index in indices:
+                order.append(names[index])
+                stop_cells.append(current)
+        _, leg = legs.find_path_to_any(current, end_cells)
+        path.extend(leg[1:])
+        return ShoppingRoute(order, stop_cells, path, len(path) - 1, exact, unreachable)
+
+    def _spread(self, sources: Dict[int, int], deadline: float) -> Optional[Tuple[array, array]]:
+        """BFS from several padded cells, each starting at its own offset.
+
+        Returns (distance, origin): distance[node] is the smallest offset +
+        steps over all sources (-1 if unreachable) and origin[node] the
+        source that achieves it.  None if the deadline passes first.
+        """
+        legs = self._legs
+        stride = legs.stride
+        walkable = legs.walkable
+        distance = array('i', [-1]) * legs.size
+        origin = array('i', [-1]) * legs.size
+        pending = sorted(((offset, node) for node, offset in sources.items()), reverse=True)
+        frontier: List[int] = []
+        level = pending[-1][0] if pending else 0
+        while frontier or pending:
+            if time.perf_counter() >= deadline:
+                return None
+            if not frontier and pending[-1][0] > level:
+                level = pending[-1][0]
+            while pending and pending[-1][0] <= level:
+                _, node = pending.pop()
+                if distance[node] == -1:
+                    distance[node] = level
+                    origin[node] = node
+                    frontier.append(node)
+            level += 1
+            next_frontier = []
+            for node in frontier:
+                source = origin[node]
+                for neighbor in (node + 1, node + stride, node - 1, node - stride):
+                    if walkable[neighbor] and distance[neighbor] == -1:
+                        distance[neighbor] = level
+                        origin[neighbor] = source
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distance, origin
+
+    def _plan_exact(self, start: int, stops: List[List[int]], end_cells: List[int],
+                    deadline: float) -> Optional[List[Tuple[Tuple[int, ...], Optional[int]]]]:
+        """Held-Karp over (visited stops, access cell); None if it cannot finish in time.
+
+        An access cell shared by several shelves visits all of them at once.
+        """
+        n = len(stops)
+        full = (1 << n) - 1
+        serves: Dict[int, int] = {}
+        for index, cells in enumerate(stops):
+            for cell in cells:
+                serves[cell] = serves.get(cell, 0) | (1 << index)
+
+        began = time.perf_counter()
+        spread = self._spread({cell: 0 for cell in end_cells}, deadline)
+        if spread is None:
+            return None
+        to_end = spread[0]
+        # One pass per visited set: give up at once if they cannot all fit
+        if (time.perf_counter() - began) * (1 << n) > deadline - time.perf_counter():
+            return None
+
+        # states[mask][cell] = (cost, previous mask, previous cell)
+        states: Dict[int, Dict[int, Tuple[int, int, int]]] = {serves.get(start, 0): {start: (0, -1, -1)}}
+        for mask in range(full):  # supersets always come later
+            layer = states.get(mask)
+            if not layer:
+                continue
+            spread = self._spread({cell: state[0] for cell, state in layer.items()}, deadline)
+            if spread is None:
+                return None
+            distance, origin = spread
+            for cell, cell_mask in serves.items():
+                if cell_mask & ~mask:
+                    cost = distance[cell]
+                    target = states.setdefault(mask | cell_mask, {})
+                    if cell not in target or cost < target[cell][0]:
+                        target[cell] = (cost, mask, origin[cell])
+
+        final = states[full]
+        cell = min(final, key=lambda cell: final[cell][0] + to_end[cell])
+        mask = full
+        visits = []
+        while cell != -1:
+            _, previous_mask, previous_cell = states[mask][cell]
+            # The start state has no previous mask and covers what its own cell serves
+            covered = mask & ~previous_mask if previous_mask != -1 else mask
+            if covered:
+                visits.append((tuple(index for index in range(n) if covered >> index & 1), cell))
+            mask, cell = previous_mask, previous_cell
+        visits.reverse()
+        return visits
+
+    def _plan_heuristic(self, start: int, stops: List[List[int]], end_cells: List[int],
+                        deadline: float) -> List[Tuple[Tuple[int, ...], Optional[int]]]:
+        """Order by local search on shelf-to-shelf distances, then choose cells for it"""
+        n = len(stops)
+        groups = [[start]] + stops + [end_cells]
+        fields: List[Optional[array]] = [None] * (n + 2)
+        for index, cells in enumerate(groups):
+            spread = self._spread({cell: 0 for cell in cells}, deadline)
+            if spread is None:
+                break
+            fields[index] = spread[0]
+
+        # Symmetric shelf-to-shelf distances: nearest pair of access cells
+        # when a field is available, the Manhattan gap between them otherwise
+        stride = self._legs.stride
+        boxes = []
+        for cells in groups:
+            rows = [cell // stride for cell in cells]
+            cols = [cell % stride for cell in cells]
+            boxes.append((min(rows), max(rows), min(cols), max(cols)))
+        matrix = [[0] * (n + 2) for _ in range(n + 2)]
+        for i in range(n + 2):
+            for j in range(i + 1, n + 2):
+                if fields[j] is not None:
+                    distance = min(fields[j][cell] for cell in groups[i])
+                elif fields[i] is not None:
+                    distance = min(fields[i][cell] for cell in groups[j])
+                else:
+                    first, second = boxes[i], boxes[j]
+                    distance = (max(first[0] - second[1], second[0] - first[1], 0)
+                                + max(first[2] - second[3], second[2] - first[3], 0))
+                matrix[i][j] = matrix[j][i] = distance
+
+        sequence = self._nearest_neighbour(matrix, n)
+        self._improve(sequence, matrix, n, deadline)
+
+        # Best access cell per stop for this order: one pass per leg
+        layers = []
+        sources = {start: 0}
+        for stop in sequence + [n + 1]:
+            spread = self._spread(sources, deadline)
+            if spread is None:
+                return [((stop - 1,), None) for stop in sequence]
+            distance, origin = spread
+            layers.append({cell: origin[cell] for cell in groups[stop]})
+            sources = {cell: distance[cell] for cell in groups[stop]}
+        cell = min(sources, key=sources.get)
+        cells = []
+        for layer in reversed(layers[1:]):
+            cell = layer[cell]
+            cells.append(cell)
+        cells.reverse()
+        return [((stop - 1,), cell) for stop, cell in zip(sequence, cells)]
+
+    def _nearest_neighbour(self, matrix: List[List[int]], n: int) -> List[int]:
+        remaining = set(range(1, n + 1))
+        current = 0
+        sequence = []
+        while remaining:
+            current = min(remaining, key=lambda stop: (matrix[current][stop], stop))
+            remaining.remove(current)
+            sequence.append(current)
+        return sequence
+
+    def _improve(self, sequence: List[int], matrix: List[List[int]], n: int, deadline: float):
+        """2-opt and Or-opt local search in place until no move helps or time is up"""
+        def d(a, b):
+            return matrix[a][b]
+
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            tour = [0] + sequence + [n + 1]
+            # 2-opt: reverse tour[i..j]
+            for i in range(1, n):
+                for j in range(i + 1, n + 1):
+                    delta = (d(tour[i - 1], tour[j]) + d(tour[i], tour[j + 1])
+                             - d(tour[i - 1], tour[i]) - d(tour[j], tour[j + 1]))
+                    if delta < 0:
+                        tour[i:j + 1] = reversed(tour[i:j + 1])
+                        improved = True
+                if time.perf_counter() >= deadline:
+                    break
+            # Or-opt: move a run of 1-3 stops between two other neighbours
+            for length in (1, 2, 3):
+                i = 1
+                while i + length - 1 <= n and time.perf_counter() < deadline:
+                    first, last = tour[i], tour[i + length - 1]
+                    before, after = tour[i - 1], tour[i + length]
+                    removal_gain = d(before, first) + d(last, after) - d(before, after)
+                    rest = tour[:i] + tour[i + length:]
+                    segment = tour[i:i + length]
+                    best = None
+                    for j in range(len(rest) - 1):
+                        a, b = rest[j], rest[j + 1]
+                        forward = d(a, first) + d(last, b) - d(a, b)
+                        backward = d(a, last) + d(first, b) - d(a, b)
+                        cost, reverse = (forward, False) if forward <= backward else (backward, True)
+                        if cost < removal_gain and (best is None or cost < best[0]):
+                            best = (cost, j, reverse)
+                    if best is not None:
+                        _, j, reverse = best
+                        tour = rest[:j + 1] + (segment[::-1] if reverse else segment) + rest[j + 1:]
+                        improved = True
+                    i += 1
+            sequence[:] = tour[1:-1]
+
+def plan_shopping_route(finder, categories: Sequence[str], start: Tuple[int, int], end: Tuple[int, int],
+                        time_budget: float = 0.05) -> Optional[ShoppingRoute]:
+    """Convenience wrapper around ShoppingRoutePlanner for PRODUCT_CATEGORIES"""
+    return ShoppingRoutePlanner(finder).plan(categories, start, end, time_budget)
@@ -1,3 +1,5 @@
+from shelf_index import ShelfIndex
+
 # Updated Supermarket layout - 5 rows x 4 columns = 20 shelves
 # 0 = walkway (black), 1 = product shelf, 9 = entrance/exit
 
@@ -223,21 +225,27 @@ supermarket_layout = [
     [7, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 9, 9, 9, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 8]   # Bottom border with entrance
 ]
 
+_shelf_index = None
+
+def get_shelf_index():
+    """ShelfIndex over PRODUCT_CATEGORIES and the static supermarket_layout, built on first use.
+
+    It is never rebuilt, so it only serves the board's fixed lookups (key
+    and shelf_id to category, shelf centers).  Code that edits a layout
+    should use EnhancedPathFinder(..., categories=...).shelf_index, which is
+    rebuilt with the layout, for access cells and anything else that
+    depends on walkability.
+    """
+    global _shelf_index
+    if _shelf_index is None:
+        _shelf_index = ShelfIndex(supermarket_layout, PRODUCT_CATEGORIES)
+    return _shelf_index
+
 # Helper function to get category by key
 def get_category_by_key(key):
-    for category, info in PRODUCT_CATEGORIES.items():
-        if info['key'] == key:
-            return category
-    return None
+    return get_shelf_index().category_by_key(key)
 
 # Helper function to get shelf center position
 def get_shelf_center(shelf_id):
     """Get the center position of a shelf for pathfinding target"""
-    for category, info in PRODUCT_CATEGORIES.items():
-        if info['shelf_id'] == shelf_id:
-            positions = info['positions']
-            if positions:
-                # Return center of the shelf (middle position)
-                center_idx = len(positions) // 2
-                return positions[center_idx]
-    return None
+    return get_shelf_index().shelf_center(shelf_id)
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from batch_routing import BatchRouter
+from enhanced_pathfinding import EnhancedPathFinder
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+def _queries(count, seed=3):
+    rng = random.Random(seed)
+    cells = [(row, col) for row, line in enumerate(supermarket_layout)
+             for col, cell in enumerate(line) if cell in (0, 9)]
+    names = list(PRODUCT_CATEGORIES)
+    return [(rng.choice(cells), rng.choice(names)) for _ in range(count)]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_results_match_finder_in_input_order(workers):
+    finder = EnhancedPathFinder(supermarket_layout)
+    queries = _queries(600)
+    with BatchRouter(finder, workers=workers, chunk_size=16, max_pending=2) as router:
+        results = list(router.route(iter(queries)))
+    assert len(results) == len(queries)
+    for (start, category), got in zip(queries, results):
+        want = finder.find_nearest_shelf_access(start, PRODUCT_CATEGORIES[category]['positions'])
+        assert (want is None) == (got is None)
+        if want is not None:
+            assert got[2] == want[2] and got[1][0] == start and got[1][-1] == got[0]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_input_is_read_lazily(workers):
+    consumed = []
+    def stream():
+        for query in _queries(2000):
+            consumed.append(query)
+            yield query
+
+    finder = EnhancedPathFinder(supermarket_layout)
+    with BatchRouter(finder, workers=workers, chunk_size=16, max_pending=2) as router:
+        results = router.route(stream())
+        next(results)
+        # One window plus the next one being read, never the whole stream
+        assert len(consumed) <= 2 * 16 * 2
+        assert sum(1 for _ in results) == 1999
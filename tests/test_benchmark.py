@@ -0,0 +1,24 @@
+from benchmark import compare, random_queries, run_case
+from supermarket_board import supermarket_layout
+
+def _report(p50_ms, spread=0.0, path_cells=100):
+    return {'results': [{'map': 'm', 'engine': 'astar', 'p50_ms': p50_ms, 'p50_spread': spread,
+                         'path_cells': path_cells}]}
+
+def test_identical_runs_compare_clean():
+    queries = random_queries(supermarket_layout, 30)
+    first = {'results': [dict(run_case('astar', supermarket_layout, queries, repeats=3), map='m')]}
+    second = {'results': [dict(run_case('astar', supermarket_layout, queries, repeats=3), map='m')]}
+    assert first['results'][0]['repeats'] == 3
+    assert compare(second, first) == []
+
+def test_real_slowdown_is_flagged():
+    assert compare(_report(2.0), _report(1.0))
+    assert compare(_report(1.0, path_cells=101), _report(1.0))
+
+def test_noise_is_not_flagged():
+    # Sub-millisecond jitter below the absolute floor
+    assert compare(_report(0.03), _report(0.02)) == []
+    # Within the pass-to-pass spread both runs measured
+    assert compare(_report(1.5, spread=0.2), _report(1.0, spread=0.2)) == []
+    assert compare(_report(1.7, spread=0.2), _report(1.0, spread=0.2))
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from compressed_path import DIRECTION_NAMES, STEPS, CompressedPath
+
+def _random_cells(rng, length):
+    cells = [(50, 50)]
+    step = rng.choice(STEPS)
+    for _ in range(length):
+        if rng.random() < 0.3:
+            step = rng.choice(STEPS)
+        cells.append((cells[-1][0] + step[0], cells[-1][1] + step[1]))
+    return cells
+
+def _segments(cells):
+    """Reference (direction, count) runs of a list of cells"""
+    runs = []
+    for a, b in zip(cells, cells[1:]):
+        name = DIRECTION_NAMES[STEPS.index((b[0] - a[0], b[1] - a[1]))]
+        if runs and runs[-1][0] == name:
+            runs[-1] = (name, runs[-1][1] + 1)
+        else:
+            runs.append((name, 1))
+    return runs
+
+def _check(path, cells):
+    assert len(path) == len(cells)
+    assert list(path) == cells
+    assert path.start == cells[0] and path.end == cells[-1]
+    for index in range(len(cells)):
+        assert path[index] == cells[index]
+        assert path[index - len(cells)] == cells[index - len(cells)]
+    assert path[1:4] == cells[1:4]
+    assert list(path.segments()) == _segments(cells)
+    assert path == cells and path == tuple(cells)
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_list_while_popping(seed):
+    rng = random.Random(seed)
+    cells = _random_cells(rng, rng.randrange(0, 40))
+    path = CompressedPath.from_cells(cells)
+    _check(path, cells)
+    while len(cells) > 1:
+        assert path.popleft() == cells.pop(0)
+        _check(path, cells)
+    with pytest.raises(IndexError):
+        path.popleft()
+
+def test_indexing_out_of_range():
+    path = CompressedPath.from_cells([(0, 0), (0, 1), (1, 1)])
+    path.popleft()
+    with pytest.raises(IndexError):
+        path[2]
+    with pytest.raises(IndexError):
+        path[-3]
+
+def test_segments_and_corners():
+    path = CompressedPath((5, 5), [('PHAI', 3), ('XUONG', 2), ('TRAI', 1)])
+    assert list(path.segments()) == [('PHAI', 3), ('XUONG', 2), ('TRAI', 1)]
+    assert list(path.corners()) == [(5, 5), (5, 8), (7, 8), (7, 7)]
+    assert path.end == (7, 7) and len(path) == 7
+    path.popleft()
+    path.popleft()
+    assert list(path.segments()) == [('PHAI', 1), ('XUONG', 2), ('TRAI', 1)]
+    path.popleft()
+    assert list(path.segments()) == [('XUONG', 2), ('TRAI', 1)]
+    assert list(path.runs()) == [(1, 0, 2), (0, -1, 1)]
+
+def test_append_run_after_popping_everything():
+    path = CompressedPath.from_cells([(0, 0), (0, 1)])
+    path.popleft()
+    assert len(path) == 1 and path.end == (0, 1) and list(path.segments()) == []
+    path.append_run(STEPS.index((1, 0)), 2)
+    assert path == [(0, 1), (1, 1), (2, 1)]
+
+def test_equality():
+    cells = [(0, 0), (0, 1), (0, 2), (1, 2)]
+    path = CompressedPath.from_cells(cells)
+    assert path == CompressedPath((0, 0), [('PHAI', 2), ('XUONG', 1)])
+    assert path == [list(cell) for cell in cells]
+    assert path != cells[:-1] and path != cells[1:]
+    assert path != CompressedPath((0, 0), [('PHAI', 3)])
+    assert (path == 'path') is False
+
+def test_from_cells_rejects_bad_input():
+    with pytest.raises(ValueError):
+        CompressedPath.from_cells([])
+    with pytest.raises(ValueError):
+        CompressedPath.from_cells([(0, 0), (0, 2)])
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from cooperative_pathfinding import AgentPlan, CooperativePlanner, find_conflicts
+from enhanced_pathfinding import EnhancedPathFinder
+from layout_generator import generate_store
+
+CORRIDOR = [[3, 3, 3, 3, 3, 3, 3],
+            [3, 0, 0, 0, 0, 0, 3],
+            [3, 3, 3, 3, 3, 3, 3]]
+
+def test_stuck_robot_blocks_its_start_for_earlier_robots():
+    finder = EnhancedPathFinder(CORRIDOR)
+    # Robot 1 cannot reach a wall; robot 0 would have to pass through it
+    plans = CooperativePlanner(finder).plan([((1, 1), [(1, 5)]), ((1, 3), [(0, 0)])])
+    assert plans[1].path is None
+    assert plans[0].path is None
+    assert find_conflicts(plans) == []
+
+def test_find_conflicts_counts_stuck_robots_on_their_start():
+    moving = AgentPlan(0, [(1, 1), (1, 2), (1, 3)], 0.0, 0)
+    stuck = AgentPlan(1, None, 0.0, 0, start=(1, 2))
+    assert find_conflicts([moving, stuck]) == [('vertex', 0, 1, 1)]
+
+def test_swap_is_an_edge_conflict():
+    first = AgentPlan(0, [(1, 1), (1, 2)], 0.0, 0)
+    second = AgentPlan(1, [(1, 2), (1, 1)], 0.0, 0)
+    assert ('edge', 0, 1, 0) in find_conflicts([first, second])
+
+@pytest.mark.parametrize("seed", range(10))
+def test_crowded_plans_have_no_conflicts(seed):
+    store = generate_store(shelf_rows=2, shelf_cols=2, seed=seed)
+    finder = EnhancedPathFinder(store.layout)
+    cells = [(row, col) for row in range(finder.rows) for col in range(finder.cols) if finder.is_walkable(row, col)]
+    rng = random.Random(seed)
+    agents = [(start, [rng.choice(cells)]) for start in rng.sample(cells, 40)]
+    # Tight limits leave many robots stuck on their start
+    plans = CooperativePlanner(finder, max_delay=8, max_expansions=300).plan(agents)
+    assert any(plan.path is None for plan in plans)
+    assert find_conflicts(plans) == []
+    for plan, (start, goals) in zip(plans, agents):
+        assert plan.position_at(0) == start
+        if plan.path:
+            assert plan.target in goals
+
+def test_routes_are_shortest_without_traffic():
+    store = generate_store(shelf_rows=2, shelf_cols=2, seed=3)
+    finder = EnhancedPathFinder(store.layout)
+    shelf = next(iter(store.categories.values()))['positions']
+    goals = finder.get_shelf_access_points(shelf)
+    start = (finder.rows - 2, finder.cols // 2)
+    plan, = CooperativePlanner(finder).plan([(start, goals)])
+    assert plan.arrival == finder.find_nearest_shelf_access(start, shelf)[2]
+
+def test_time_budget_gives_up_cleanly():
+    store = generate_store(shelf_rows=3, shelf_cols=3, seed=5)
+    finder = EnhancedPathFinder(store.layout)
+    cells = [(row, col) for row in range(finder.rows) for col in range(finder.cols) if finder.is_walkable(row, col)]
+    rng = random.Random(5)
+    agents = [(start, [rng.choice(cells)]) for start in rng.sample(cells, 20)]
+    plans = CooperativePlanner(finder, time_budget=0.0).plan(agents)
+    assert all(plan.path is None for plan in plans)
+    assert find_conflicts(plans) == []
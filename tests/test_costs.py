@@ -0,0 +1,36 @@
+import pytest
+
+from enhanced_pathfinding import EnhancedPathFinder
+from supermarket_board import supermarket_layout
+
+START, GOAL = (26, 17), (1, 17)
+
+def test_invalid_update_leaves_grid_and_cache_untouched():
+    finder = EnhancedPathFinder(supermarket_layout)
+    finder.update_costs({(25, 17): 4.0})
+    before = finder.costs.tobytes()
+    version = finder.cost_version
+    route = finder.find_shortest_path(START, GOAL)
+
+    with pytest.raises(ValueError):
+        finder.update_costs({(24, 17): 9.0, (23, 17): 0})
+    with pytest.raises(ValueError):
+        finder.update_costs({(24, 17): 9.0, (finder.rows, 0): 2.0})
+    assert finder.costs.tobytes() == before
+    assert finder.cost_version == version
+    assert finder.find_shortest_path(START, GOAL) == route
+    assert finder.get_cache_stats()['hits'] >= 1
+
+def test_valid_update_bumps_version_once_and_reroutes():
+    finder = EnhancedPathFinder(supermarket_layout)
+    path = finder.find_shortest_path(START, GOAL)
+    version = finder.cost_version
+    finder.update_costs({cell: 50.0 for cell in path[1:-1]})
+    assert finder.cost_version == version + 1
+    detour = finder.find_shortest_path(START, GOAL)
+    assert finder.path_cost(detour) < finder.path_cost(path)
+
+def test_min_cost_tracks_cheaper_cells():
+    finder = EnhancedPathFinder(supermarket_layout)
+    finder.update_costs({(25, 17): 0.5, (24, 17): 3.0})
+    assert finder._min_cost == 0.5
@@ -0,0 +1,173 @@
+import random
+
+import pytest
+
+from enhanced_pathfinding import ENGINES, EnhancedPathFinder
+from layout_generator import generate_store
+
+# Every engine except hpa is exact: it must match the built-in A* step for step
+EXACT_ENGINES = [name for name in ENGINES if name not in ('astar', 'hpa')]
+
+STORES = [
+    dict(seed=0),
+    dict(shelf_rows=4, shelf_cols=6, aisle_width=2, obstacles=25, dead_ends=6, seed=1),
+    dict(shelf_rows=6, shelf_cols=3, shelf_length=7, cross_aisle_width=1, obstacles=40, dead_ends=10, seed=2),
+]
+
+def _queries(store, count=40, seed=0):
+    """(start, goals) pairs: shelf access cells and single far cells"""
+    rng = random.Random(seed)
+    finder = EnhancedPathFinder(store.to_lists())
+    cells = [(row, col) for row in range(store.rows) for col in range(store.cols)
+             if finder.is_walkable(row, col)]
+    shelves = [finder.get_shelf_access_points(info['positions']) for info in store.categories.values()]
+    queries = []
+    for index in range(count):
+        goals = rng.choice(shelves) if index % 2 else [rng.choice(cells)]
+        queries.append((rng.choice(cells), goals))
+    return queries
+
+def _check_path(finder, start, goals, result):
+    target, path = result
+    assert path[0] == start and path[-1] == target and target in goals
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(row - next_row) + abs(col - next_col) == 1
+        assert finder.is_walkable(next_row, next_col)
+
+def _lengths(finder, queries):
+    lengths = []
+    for start, goals in queries:
+        result = finder.find_path_to_any(start, goals)
+        if result is None:
+            lengths.append(None)
+        else:
+            _check_path(finder, start, goals, result)
+            lengths.append(len(result[1]) - 1)
+    return lengths
+
+@pytest.mark.parametrize('options', STORES)
+@pytest.mark.parametrize('engine', EXACT_ENGINES)
+def test_engine_matches_builtin_astar(options, engine):
+    store = generate_store(**options)
+    queries = _queries(store)
+    reference = EnhancedPathFinder(store.to_lists(), cache_size=0)
+    finder = EnhancedPathFinder(store.to_lists(), engine=engine, cache_size=0)
+    assert _lengths(finder, queries) == _lengths(reference, queries)
+
+    # Same again after walling off a few cells, through update_cells
+    rng = random.Random(options['seed'])
+    walkway = [(row, col) for row in range(store.rows) for col in range(store.cols)
+               if reference.is_walkable(row, col)]
+    changes = {cell: 1 for cell in rng.sample(walkway, 20)}
+    reference.update_cells(changes)
+    finder.update_cells(changes)
+    queries = [(start, goals) for start, goals in queries if start not in changes]
+    assert _lengths(finder, queries) == _lengths(reference, queries)
+
+@pytest.mark.parametrize('options', STORES)
+def test_hpa_routes_are_valid_and_never_shorter(options):
+    store = generate_store(**options)
+    queries = _queries(store)
+    reference = EnhancedPathFinder(store.to_lists(), cache_size=0)
+    finder = EnhancedPathFinder(store.to_lists(), engine='hpa', cache_size=0)
+    for got, want in zip(_lengths(finder, queries), _lengths(reference, queries)):
+        assert (got is None) == (want is None)
+        assert got is None or got >= want
+
+@pytest.mark.parametrize('options', STORES)
+def test_anytime_and_min_turns_match_builtin_astar(options):
+    store = generate_store(**options)
+    queries = _queries(store)
+    finder = EnhancedPathFinder(store.to_lists(), cache_size=0)
+    for (start, goals), want in zip(queries, _lengths(finder, queries)):
+        search = finder.find_path_anytime(start, goals)
+        while not search.done:
+            search.step()
+        turned = finder.find_path_min_turns(start, goals)
+        if want is None:
+            assert search.result() is None and turned is None
+            continue
+        _check_path(finder, start, goals, search.result())
+        _check_path(finder, start, goals, turned)
+        assert search.cost == want and search.bound == 1
+        assert len(turned[1]) - 1 == want
+
+# Route cache invalidation
+
+START, GOAL = (27, 17), (1, 1)  # entrance and the top-left corner
+
+@pytest.fixture
+def finder():
+    return EnhancedPathFinder(generate_store(seed=0).to_lists())
+
+def test_repeated_query_is_served_from_cache(finder):
+    first = finder.find_shortest_path(START, GOAL)
+    hits = finder.get_cache_stats()['hits']
+    second = finder.find_shortest_path(START, GOAL)
+    assert second == first and finder.get_cache_stats()['hits'] == hits + 1
+    # Callers get a copy; editing it does not touch the cached route
+    second.clear()
+    assert finder.find_shortest_path(START, GOAL) == first
+
+def test_update_cells_invalidates_cached_routes(finder):
+    path = finder.find_shortest_path(START, GOAL)
+    blocked = path[len(path) // 2]
+    finder.update_cells({blocked: 1})
+    detour = finder.find_shortest_path(START, GOAL)
+    assert blocked not in detour and len(detour) >= len(path)
+    finder.update_cells({blocked: 0})
+    assert len(finder.find_shortest_path(START, GOAL)) == len(path)
+
+def test_layout_replacement_invalidates_cached_routes(finder):
+    path = finder.find_shortest_path(START, GOAL)
+    layout = [list(row) for row in finder.layout]
+    blocked = path[len(path) // 2]
+    layout[blocked[0]][blocked[1]] = 1
+    finder.layout = layout
+    assert blocked not in finder.find_shortest_path(START, GOAL)
+
+def test_layout_changed_invalidates_cached_routes(finder):
+    path = finder.find_shortest_path(START, GOAL)
+    blocked = path[len(path) // 2]
+    finder.layout[blocked[0]][blocked[1]] = 1
+    finder.layout_changed()
+    assert blocked not in finder.find_shortest_path(START, GOAL)
+
+def test_cost_changes_invalidate_cached_routes(finder):
+    path = finder.find_shortest_path(START, GOAL)
+    misses = finder.get_cache_stats()['misses']
+    finder.update_costs({cell: 20.0 for cell in path[1:-1]})
+    assert finder.find_shortest_path(START, GOAL) != path
+    assert finder.get_cache_stats()['misses'] == misses + 1
+    finder.clear_costs()
+    assert len(finder.find_shortest_path(START, GOAL)) == len(path)
+
+def test_no_route_is_cached_and_invalidated(finder):
+    walled = {(row, col): 1 for row, col in finder.get_neighbors(*GOAL)}
+    finder.update_cells(walled)
+    assert finder.find_shortest_path(START, GOAL) is None
+    hits = finder.get_cache_stats()['hits']
+    assert finder.find_shortest_path(START, GOAL) is None
+    assert finder.get_cache_stats()['hits'] == hits + 1
+    finder.update_cells({cell: 0 for cell in walled})
+    assert finder.find_shortest_path(START, GOAL) is not None
+
+@pytest.mark.parametrize('changes', [
+    {(5, 5): 1, (-1, 3): 1},          # negative index would wrap around
+    {(5, 5): 1, (0, 35): 1},          # past the last column
+    {(5, 5): 1, (6, 6): 1.5},
+    {(5, 5): 1, (6, 6): 256},
+])
+def test_invalid_cell_edit_changes_nothing(finder, changes):
+    path = finder.find_shortest_path(START, GOAL)
+    before = [bytes(row) for row in finder.layout]
+    version = finder.layout_version
+    component = finder.reachability.component_of(START)
+    with pytest.raises(ValueError):
+        finder.update_cells(changes)
+    assert [bytes(row) for row in finder.layout] == before
+    assert finder.layout_version == version
+    assert finder.reachability.component_of(START) == component
+    hits = finder.get_cache_stats()['hits']
+    assert finder.find_shortest_path(START, GOAL) == path
+    assert finder.get_cache_stats()['hits'] == hits + 1
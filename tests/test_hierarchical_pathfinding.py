@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from enhanced_pathfinding import EnhancedPathFinder
+from hierarchical_pathfinding import HierarchicalPathFinder
+from layout_generator import generate_store
+
+def abstract_graph(engine):
+    inter = {node: neighbors for node, neighbors in engine._inter.items() if neighbors}
+    return engine._borders, inter, engine._intra
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_update_matches_full_rebuild(seed):
+    store = generate_store(shelf_rows=3, shelf_cols=3, obstacles=8, seed=seed)
+    layout = [list(row) for row in store.layout]
+    engine = HierarchicalPathFinder(layout, cluster_size=8)
+    rng = random.Random(seed)
+    rows, cols = len(layout), len(layout[0])
+    walkable = [(row, col) for row in range(rows) for col in range(cols) if layout[row][col] in (0, 9)]
+    for _ in range(40):
+        edits = {(rng.randrange(rows), rng.randrange(cols)): rng.choice((0, 3)) for _ in range(rng.randint(1, 4))}
+        for (row, col), value in edits.items():
+            layout[row][col] = value
+        engine.update_cells(layout, edits)
+        fresh = HierarchicalPathFinder(layout, cluster_size=8)
+        assert abstract_graph(engine) == abstract_graph(fresh)
+        start, goal = rng.choice(walkable), rng.choice(walkable)
+        assert engine.find_path_to_any(start, [goal]) == fresh.find_path_to_any(start, [goal])
+
+def test_paths_are_valid_but_not_always_shortest():
+    store = generate_store(shelf_rows=3, shelf_cols=3, seed=2)
+    reference = EnhancedPathFinder(store.layout)
+    finder = EnhancedPathFinder(store.layout, engine='hpa')
+    cells = [(row, col) for row in range(finder.rows) for col in range(finder.cols) if finder.is_walkable(row, col)]
+    rng = random.Random(2)
+    for _ in range(100):
+        start, goal = rng.choice(cells), rng.choice(cells)
+        expected = reference.find_shortest_path(start, goal)
+        path = finder.find_shortest_path(start, goal)
+        assert path[0] == start and path[-1] == goal
+        assert all(finder.is_walkable(*cell) for cell in path)
+        assert len(path) >= len(expected)
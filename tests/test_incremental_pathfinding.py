@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from enhanced_pathfinding import EnhancedPathFinder
+from incremental_pathfinding import DStarLitePlanner
+from layout_generator import generate_store
+
+def _setup(seed):
+    store = generate_store(shelf_rows=4, shelf_cols=4, obstacles=20, dead_ends=4, seed=seed)
+    finder = EnhancedPathFinder(store.to_lists())
+    rng = random.Random(seed)
+    walkway = [(row, col) for row in range(store.rows) for col in range(store.cols)
+               if finder.is_walkable(row, col)]
+    info = rng.choice(list(store.categories.values()))
+    goals = finder.get_shelf_access_points(info['positions'])
+    return finder, rng, walkway, goals
+
+def _check(finder, planner, goals):
+    reference = finder.find_path_to_any(planner.start, goals)
+    path = planner.get_path()
+    if reference is None:
+        assert path is None
+        return
+    assert path is not None and len(path) == len(reference[1])
+    assert path[0] == planner.start and path[-1] in goals
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(row - next_row) + abs(col - next_col) == 1
+        assert finder.is_walkable(next_row, next_col)
+
+def _step(finder, rng, walkway, planner, path):
+    """Walk one step along the route, or jump off it"""
+    if path and len(path) > 1 and rng.random() < 0.7:
+        return path[1]
+    row, col = planner.start
+    options = finder.get_neighbors(row, col)
+    return rng.choice(options) if options and rng.random() < 0.8 else rng.choice(walkway)
+
+@pytest.mark.parametrize('seed', range(4))
+def test_moves_and_edits_match_builtin_astar(seed):
+    finder, rng, walkway, goals = _setup(seed)
+    planner = DStarLitePlanner(finder, goals, rng.choice(walkway))
+    _check(finder, planner, goals)
+    blocked = []
+    for _ in range(60):
+        planner.move_start(_step(finder, rng, walkway, planner, planner.get_path()))
+        if rng.random() < 0.3:
+            # Block a free cell or reopen an earlier one, never under the user
+            if blocked and rng.random() < 0.4:
+                cell = blocked.pop(rng.randrange(len(blocked)))
+                finder.update_cells({cell: 0})
+            else:
+                cell = rng.choice(walkway)
+                if cell == planner.start or cell in blocked:
+                    continue
+                blocked.append(cell)
+                finder.update_cells({cell: 1})
+            planner.update_cells([cell])
+        if finder.is_walkable(*planner.start):
+            _check(finder, planner, goals)
+
+def test_stale_layout_version_resets_the_search():
+    finder, rng, walkway, goals = _setup(7)
+    planner = DStarLitePlanner(finder, goals, walkway[0])
+    path = planner.get_path()
+    assert path is not None
+
+    # Edit without telling the planner: it must notice the new layout version
+    blocked = {cell: 1 for cell in path[1:-1]}
+    finder.update_cells(blocked)
+    assert planner._layout_version != finder.layout_version
+    _check(finder, planner, goals)
+    assert planner._layout_version == finder.layout_version
+    assert not set(planner.get_path() or []) & set(blocked)
+
+    # Replacing the whole layout goes through the same check
+    layout = [list(row) for row in finder.layout]
+    for row, col in blocked:
+        layout[row][col] = 0
+    finder.layout = layout
+    _check(finder, planner, goals)
+    assert len(planner.get_path()) == len(path)
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from layout_loader import _CACHE_HEADER, dump_layout, load_layout
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+@pytest.fixture
+def layout_file(tmp_path):
+    path = str(tmp_path / 'store.json')
+    dump_layout(path, supermarket_layout, PRODUCT_CATEGORIES)
+    return path
+
+def _same(a, b):
+    assert a.cells == b.cells and (a.rows, a.cols) == (b.rows, b.cols)
+    assert list(a.categories) == list(b.categories)
+    for name in a.categories:
+        assert a.categories[name] == b.categories[name]
+
+def test_cache_round_trip(layout_file):
+    parsed = load_layout(layout_file)
+    cached = load_layout(layout_file)
+    assert not parsed.from_cache and cached.from_cache
+    _same(parsed, cached)
+
+def _damage_truncate(data):
+    return data[:len(data) // 2]
+
+def _damage_counts(data):
+    # Counts JSON that no longer parses
+    start = _CACHE_HEADER.size
+    return data[:start] + b'\xff' + data[start + 1:]
+
+def _damage_cells(data):
+    # One byte fewer than rows * cols, everything after shifted
+    start = _CACHE_HEADER.size + data[_CACHE_HEADER.size:].index(b'}') + 1
+    return data[:start] + data[start + 1:]
+
+def _damage_tail(data):
+    return data + b'\0\0\0\0'
+
+@pytest.mark.parametrize('damage', [_damage_truncate, _damage_counts, _damage_cells, _damage_tail])
+def test_damaged_cache_is_a_miss(layout_file, damage):
+    parsed = load_layout(layout_file)
+    cache_path = layout_file + '.bin'
+    with open(cache_path, 'rb') as handle:
+        data = handle.read()
+    with open(cache_path, 'wb') as handle:
+        handle.write(damage(data))
+
+    store = load_layout(layout_file)
+    assert not store.from_cache
+    _same(parsed, store)
+    # The cache was rewritten and is good again
+    assert load_layout(layout_file).from_cache
+    assert os.path.getsize(cache_path) == len(data)
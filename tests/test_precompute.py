@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from enhanced_pathfinding import EnhancedPathFinder
+from precompute import _HEADER, build_precomputed, load_precomputed
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+START, GOAL = (26, 17), (1, 17)
+
+@pytest.fixture(scope='module')
+def precompute_file(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('precompute') / 'findbot.bin')
+    return build_precomputed(supermarket_layout, PRODUCT_CATEGORIES, path, workers=2, landmark_count=4)
+
+def _data_start(data):
+    _, _, header_length = _HEADER.unpack_from(data, 0)
+    start = _HEADER.size + header_length
+    return start + -start % 8
+
+def test_tables_match_a_fresh_build(precompute_file):
+    tables = load_precomputed(supermarket_layout, precompute_file)
+    assert tables is not None
+    for engine in ('flow_field', 'alt'):
+        finder = EnhancedPathFinder(supermarket_layout, engine=engine, precomputed=tables)
+        reference = EnhancedPathFinder(supermarket_layout)
+        assert len(finder.find_shortest_path(START, GOAL)) == len(reference.find_shortest_path(START, GOAL))
+
+@pytest.mark.parametrize('cut', [
+    lambda data: len(data) - 3,            # not a whole item
+    lambda data: _data_start(data) + 400,  # short labels
+    lambda data: _data_start(data) + 402,
+    lambda data: len(data) // 2,           # half the fields
+    lambda data: _HEADER.size + 10,        # inside the JSON index
+    lambda data: 4,                        # inside the header
+])
+def test_truncated_file_is_a_miss(precompute_file, tmp_path, cut):
+    with open(precompute_file, 'rb') as handle:
+        data = handle.read()
+    damaged = str(tmp_path / 'damaged.bin')
+    with open(damaged, 'wb') as handle:
+        handle.write(data[:cut(data)])
+    assert load_precomputed(supermarket_layout, damaged) is None
+
+def test_inconsistent_index_is_a_miss(precompute_file, tmp_path):
+    with open(precompute_file, 'rb') as handle:
+        data = handle.read()
+    magic, version, header_length = _HEADER.unpack_from(data, 0)
+    index = json.loads(data[_HEADER.size:_HEADER.size + header_length])
+    # A label table one row short, still inside the file
+    index['sections']['labels'][2] -= len(supermarket_layout[0])
+    header = json.dumps(index, separators=(',', ':')).encode().ljust(header_length)
+    damaged = str(tmp_path / 'damaged.bin')
+    with open(damaged, 'wb') as handle:
+        handle.write(data[:_HEADER.size] + header + data[_HEADER.size + header_length:])
+    assert load_precomputed(supermarket_layout, damaged) is None
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from enhanced_pathfinding import EnhancedPathFinder
+from layout_generator import generate_store
+from reachability import ReachabilityIndex
+
+def assert_same_partition(index, layout):
+    """Same components as a fresh labelling, whatever the ids"""
+    fresh = ReachabilityIndex(layout)
+    mapping = {}
+    for label, expected in zip(index.labels, fresh.labels):
+        assert (label == -1) == (expected == -1)
+        if label != -1:
+            assert mapping.setdefault(label, expected) == expected
+    assert len(set(mapping.values())) == len(mapping)
+    for label, expected in mapping.items():
+        assert index.component_sizes[label] == fresh.component_sizes[expected]
+    live = [size for size in index.component_sizes if size]
+    assert sorted(live) == sorted(fresh.component_sizes)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_labels_match_full_relabel(seed):
+    store = generate_store(shelf_rows=3, shelf_cols=3, obstacles=6, dead_ends=2, seed=seed)
+    layout = [list(row) for row in store.layout]
+    index = ReachabilityIndex(layout)
+    rng = random.Random(seed)
+    rows, cols = len(layout), len(layout[0])
+    for _ in range(150):
+        edits = {}
+        for _ in range(rng.randint(1, 3)):
+            edits[(rng.randrange(rows), rng.randrange(cols))] = rng.choice((0, 0, 3, 9, 1))
+        for (row, col), value in edits.items():
+            layout[row][col] = value
+        index.update_cells(layout, edits)
+        assert_same_partition(index, layout)
+
+def test_blocking_a_corridor_splits_and_reopening_merges():
+    layout = [[3, 3, 3, 3, 3, 3, 3],
+              [3, 0, 0, 0, 0, 0, 3],
+              [3, 3, 3, 3, 3, 3, 3]]
+    index = ReachabilityIndex(layout)
+    assert index.is_reachable((1, 1), (1, 5))
+    layout[1][3] = 1
+    index.update_cells(layout, [(1, 3)])
+    assert not index.is_reachable((1, 1), (1, 5))
+    assert index.component_size((1, 1)) == index.component_size((1, 5)) == 2
+    layout[1][3] = 0
+    index.update_cells(layout, [(1, 3)])
+    assert index.is_reachable((1, 1), (1, 5))
+    assert index.component_size((1, 3)) == 5
+
+def test_finder_keeps_labels_across_cell_edits():
+    store = generate_store(shelf_rows=2, shelf_cols=2, seed=1)
+    finder = EnhancedPathFinder([list(row) for row in store.layout], engine='jps')
+    labels = finder.reachability
+    cell = next((row, col) for row in range(finder.rows) for col in range(finder.cols)
+                if finder.is_walkable(row, col))
+    finder.update_cells({cell: 3})
+    assert finder.reachability is labels
+    assert finder.reachability.component_of(cell) == -1
+    finder.layout_changed()
+    assert finder.reachability is not labels
@@ -0,0 +1,17 @@
+from enhanced_pathfinding import EnhancedPathFinder
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+def test_category_access_points_match_scan():
+    finder = EnhancedPathFinder(supermarket_layout, categories=PRODUCT_CATEGORIES)
+    for name, info in PRODUCT_CATEGORIES.items():
+        # A copy of the positions list scans; the name reads the index
+        assert finder.get_category_access_points(name) == finder.get_shelf_access_points(list(info['positions']))
+
+def test_index_follows_layout_edits():
+    layout = [list(row) for row in supermarket_layout]
+    finder = EnhancedPathFinder(layout, categories=PRODUCT_CATEGORIES)
+    name, info = next(iter(PRODUCT_CATEGORIES.items()))
+    cell = finder.get_category_access_points(name)[0]
+    finder.update_cells({cell: 1})
+    assert cell not in finder.get_category_access_points(name)
+    assert finder.get_category_access_points(name) == finder.get_shelf_access_points(info['positions'])
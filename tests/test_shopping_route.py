@@ -0,0 +1,80 @@
+import itertools
+import random
+
+import pytest
+
+from enhanced_pathfinding import EnhancedPathFinder
+from flow_field import FlowFieldRouter
+from layout_generator import generate_store
+from shopping_route import ShoppingRoutePlanner
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+START, EXIT = (26, 17), (0, 17)
+
+def brute_force(finder, categories, names, start, end):
+    """Shortest trip over every visiting order and every access cell choice"""
+    router = FlowFieldRouter(finder.layout)
+    groups = [finder.get_shelf_access_points(categories[name]['positions']) for name in names]
+    end_cells = [end] if finder.is_walkable(*end) else finder.get_shelf_access_points([end])
+    best = None
+    for order in itertools.permutations(range(len(names))):
+        # Exact cell choice for this order, one leg at a time
+        costs = {start: 0}
+        for index in order:
+            costs = {cell: min(cost + router.distance(source, [cell]) for source, cost in costs.items())
+                     for cell in groups[index]}
+        total = min(cost + router.distance(cell, end_cells) for cell, cost in costs.items())
+        best = total if best is None else min(best, total)
+    return best
+
+def check_route(finder, route, names, start):
+    assert sorted(route.order) == sorted(names)
+    assert route.path[0] == start
+    assert route.distance == len(route.path) - 1
+    for (row, col), (next_row, next_col) in zip(route.path, route.path[1:]):
+        assert abs(row - next_row) + abs(col - next_col) == 1
+        assert finder.is_walkable(next_row, next_col)
+    for stop in route.stops:
+        assert stop in route.path
+
+@pytest.mark.parametrize("seed", range(6))
+def test_small_baskets_match_brute_force(seed):
+    finder = EnhancedPathFinder(supermarket_layout)
+    names = random.Random(seed).sample(sorted(PRODUCT_CATEGORIES), 2 + seed % 2)
+    route = ShoppingRoutePlanner(finder).plan(names, START, EXIT, time_budget=5.0)
+    assert route.exact
+    assert route.distance == brute_force(finder, PRODUCT_CATEGORIES, names, START, EXIT)
+    check_route(finder, route, names, START)
+
+def test_access_cell_choice_beats_nearest_to_start():
+    finder = EnhancedPathFinder(supermarket_layout)
+    names = ['rau_cu', 'mi_tom', 'gia_dung']
+    route = ShoppingRoutePlanner(finder).plan(names, START, EXIT, time_budget=5.0)
+    assert route.distance == brute_force(finder, PRODUCT_CATEGORIES, names, START, EXIT)
+
+def test_generated_store_matches_brute_force():
+    store = generate_store(shelf_rows=3, shelf_cols=3, seed=4)
+    finder = EnhancedPathFinder(store.layout)
+    walkable = [(row, col) for row in range(finder.rows) for col in range(finder.cols)
+                if finder.is_walkable(row, col)]
+    rng = random.Random(4)
+    for _ in range(3):
+        names = rng.sample(sorted(store.categories), 3)
+        start, end = rng.choice(walkable), rng.choice(walkable)
+        route = ShoppingRoutePlanner(finder, store.categories).plan(names, start, end, time_budget=5.0)
+        assert route.exact
+        assert route.distance == brute_force(finder, store.categories, names, start, end)
+        check_route(finder, route, names, start)
+
+def test_long_list_is_heuristic_but_complete():
+    finder = EnhancedPathFinder(supermarket_layout)
+    names = sorted(PRODUCT_CATEGORIES)
+    route = ShoppingRoutePlanner(finder, exact_limit=4).plan(names, START, EXIT, time_budget=0.01)
+    assert not route.exact
+    check_route(finder, route, names, START)
+
+def test_unreachable_and_unknown_categories():
+    finder = EnhancedPathFinder(supermarket_layout)
+    route = ShoppingRoutePlanner(finder).plan(['sua_nuoc', 'khong_co'], START, EXIT)
+    assert route.order == ['sua_nuoc']
+    assert ShoppingRoutePlanner(finder).plan(['sua_nuoc'], (-1, -1), EXIT) is None
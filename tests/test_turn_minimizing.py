@@ -0,0 +1,28 @@
+from enhanced_pathfinding import EnhancedPathFinder
+from supermarket_board import PRODUCT_CATEGORIES, supermarket_layout
+
+START = (26, 17)
+
+def _turns(path):
+    headings = [(b[0] - a[0], b[1] - a[1]) for a, b in zip(path, path[1:])]
+    return sum(1 for a, b in zip(headings, headings[1:]) if a != b)
+
+def test_min_turns_keeps_length_and_never_adds_turns():
+    finder = EnhancedPathFinder(supermarket_layout)
+    for info in PRODUCT_CATEGORIES.values():
+        plain = finder.find_nearest_shelf_access(START, info['positions'])
+        turned = finder.find_nearest_shelf_access(START, info['positions'], min_turns=True)
+        assert turned[2] == plain[2]
+        assert _turns(turned[1]) <= _turns(plain[1])
+
+def test_min_turns_records_stats():
+    finder = EnhancedPathFinder(supermarket_layout, collect_stats=True)
+    positions = next(iter(PRODUCT_CATEGORIES.values()))['positions']
+    finder.find_nearest_shelf_access(START, positions, min_turns=True)
+    stats = finder.last_stats
+    assert stats.engine == 'turns' and stats.found and not stats.cached
+    assert stats.expanded > 0
+
+    finder.find_nearest_shelf_access(START, positions, min_turns=True)
+    assert finder.last_stats is not stats and finder.last_stats.cached
+    assert finder.get_search_stats()['totals']['searches'] == 2
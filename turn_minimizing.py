@@ -0,0 +1,114 @@
+import heapq
+from typing import Iterable, List, Optional, Tuple
+
+from grid_common import goal_box_tables
+
+# Headings in EnhancedPathFinder.get_neighbors order (right, down, left, up);
+# NO_HEADING is the start state, whose first step is not a turn
+NO_HEADING = 4
+
+class TurnMinimizingSearch:
+    """A* over (cell, heading) states that prefers routes with fewer turns.
+
+    Every shortest route has the same number of steps, but the spoken
+    directions get one sentence per straight run, so a zig-zag through the
+    aisles costs far more speaking time than an L-shaped route.  States
+    carry the heading of the last move; a move in another heading is a turn.
+
+    With turn_penalty=0 routes are ranked by (length, turns): still shortest,
+    and the fewest turns among the shortest.  A positive turn_penalty charges
+    that many steps per turn, so a slightly longer route with fewer turns
+    can win.  Step lengths follow the finder's cost grid when one is set.
+    """
+
+    def __init__(self, finder, turn_penalty: float = 0.0):
+        if turn_penalty < 0:
+            raise ValueError("turn_penalty must not be negative")
+        self.finder = finder
+        self.turn_penalty = turn_penalty
+        self.expansions = 0
+
+    def find_path_to_any(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]]) -> Optional[Tuple[Tuple[int, int], List[Tuple[int, int]]]]:
+        """(target, path) with the best (length + penalty * turns, turns), or None"""
+        self.expansions = 0
+        finder = self.finder
+        reachability = finder.reachability
+        component = reachability.component_of(start)
+        goal_cells = [goal for goal in goals if reachability.component_of(goal) == component]
+        if component == -1 or not goal_cells:
+            return None
+        if start in goal_cells:
+            return start, [start]
+
+        labels = reachability.labels
+        cols = finder.cols
+        size = len(labels)
+        last_col = cols - 1
+        costs = finder.costs
+        penalty = self.turn_penalty
+        goal_ids = {row * cols + col for row, col in goal_cells}
+        scale = finder._min_cost if costs is not None else 1
+        row_h, col_h = goal_box_tables(goal_cells, finder.rows, cols, scale=scale)
+
+        # A state is node * 5 + heading.  Keys are (f, turns, state): with
+        # penalty 0 the tuple order is exactly "shortest, then fewest turns"
+        start_node = start[0] * cols + start[1]
+        start_state = start_node * 5 + NO_HEADING
+        best = {start_state: (0, 0)}
+        parent = {start_state: -1}
+        open_set = [(row_h[start[0]] + col_h[start[1]], 0, 0, start_state)]
+        closed = set()
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        while open_set:
+            _, turns, g, state = heappop(open_set)
+            if state in closed:
+                continue
+            node, heading = divmod(state, 5)
+            if node in goal_ids:
+                return self._reconstruct(state, parent, cols)
+            closed.add(state)
+            self.expansions += 1
+
+            col = node % cols
+            for next_heading, neighbor, inside in ((0, node + 1, col < last_col), (1, node + cols, node + cols < size),
+                                                   (2, node - 1, col > 0), (3, node - cols, node >= cols)):
+                if not inside or labels[neighbor] != component:
+                    continue
+                next_state = neighbor * 5 + next_heading
+                if next_state in closed:
+                    continue
+                next_g = g + (costs[neighbor] if costs is not None else 1)
+                next_turns = turns
+                if heading != next_heading and heading != NO_HEADING:
+                    next_turns += 1
+                    next_g += penalty
+                key = (next_g, next_turns)
+                if key < best.get(next_state, (float('inf'), 0)):
+                    best[next_state] = key
+                    parent[next_state] = state
+                    row = neighbor // cols
+                    heappush(open_set, (next_g + row_h[row] + col_h[neighbor - row * cols], next_turns,
+                                        next_g, next_state))
+
+        return None  # No path found
+
+    def _reconstruct(self, state: int, parent, cols: int) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+        path = []
+        while state != -1:
+            path.append(divmod(state // 5, cols))
+            state = parent[state]
+        path.reverse()
+        return path[-1], path
+
+def count_turns(path: List[Tuple[int, int]]) -> int:
+    """Heading changes along a 4-connected path"""
+    turns = 0
+    previous = None
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        step = (next_row - row, next_col - col)
+        if previous is not None and step != previous:
+            turns += 1
+        previous = step
+    return turns